@@ -142,8 +142,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'pedagogical.pagination.KeysetPagination',
 }
 
+# Pagination Settings (cursor pagination, see pedagogical/pagination.py)
+PAGINATION_PAGE_SIZE = int(os.environ.get('PAGINATION_PAGE_SIZE', 50))
+PAGINATION_MAX_PAGE_SIZE = int(os.environ.get('PAGINATION_MAX_PAGE_SIZE', 500))  # Upper bound for ?page_size=
+
 # JWT Settings
 from datetime import timedelta
 
@@ -163,9 +168,64 @@ CORS_ALLOW_CREDENTIALS = True
 # OpenAI API Configuration
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 
+# Shared LLM client (see pedagogical/llm.py and pedagogical/llm_backends.py)
+# pedagogical.llm_backends.LocalBackend answers offline, deterministically (load tests, CI)
+LLM_BACKEND = os.environ.get('LLM_BACKEND', 'pedagogical.llm_backends.OpenAIBackend')
+LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-3.5-turbo')
+LLM_BASE_URL = os.environ.get('LLM_BASE_URL', '')  # Empty: the OpenAI API
+LLM_TIMEOUT = 30  # Seconds per call
+LLM_MAX_CONCURRENCY = 8  # Calls in flight per process, also the connection pool size
+LLM_MAX_RETRIES = 3  # Retries on 429, 5xx and connection errors
+LLM_RETRY_BASE_DELAY = 0.5  # Seconds, doubled on each retry with full jitter
+LLM_RETRY_MAX_DELAY = 8
+LLM_CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failed calls before failing fast
+LLM_CIRCUIT_RESET_TIMEOUT = 30  # Seconds before a trial call is let through
+LLM_CALL_LOG_SIZE = 1000  # Recent calls kept in memory with their tokens and latency
+# LocalBackend: seconds per call, plus seconds per generated token, and an optional
+# JSON file mapping call purposes ('quiz', 'feedback', 'feedback_batch', 'analysis') to answers
+LLM_LOCAL_LATENCY = float(os.environ.get('LLM_LOCAL_LATENCY', 0))
+LLM_LOCAL_TOKEN_LATENCY = float(os.environ.get('LLM_LOCAL_TOKEN_LATENCY', 0))
+LLM_LOCAL_FIXTURES = os.environ.get('LLM_LOCAL_FIXTURES', '')
+
 # File Upload Settings
 MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10 MB
 ALLOWED_DOCUMENT_EXTENSIONS = ['.pdf', '.docx', '.txt']
+DOCUMENT_TEXT_PAGE_SIZE = 5  # Pages returned per request by the full-text endpoint
+DOCUMENT_TEXT_MAX_PAGE_SIZE = 50
+# Size bound of the extracted text cache, least recently used entries are evicted first
+EXTRACTION_CACHE_MAX_BYTES = int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+# Uploaded documents kept for paging, pruned by `manage.py extraction_cache --evict`
+DOCUMENTS_MAX_BYTES = int(os.environ.get('DOCUMENTS_MAX_BYTES', 500 * 1024 * 1024))
+DOCUMENT_RETENTION_DAYS = int(os.environ.get('DOCUMENT_RETENTION_DAYS', 30))
+
+# Document parsing runs in a pool of worker processes (0 = in the request thread, no limits)
+EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS', min(4, os.cpu_count() or 1)))
+EXTRACTION_QUEUE_SIZE = 8  # Documents waiting for a worker before uploads get a 503
+EXTRACTION_TIMEOUT = 20  # Seconds (wall clock) before an extraction is abandoned with a 504
+EXTRACTION_CPU_LIMIT = 15  # Seconds of CPU time per document, enforced inside the worker
 
 # Quiz Generation Settings
 MAX_TEXT_LENGTH_FOR_QUIZ = 3000  # Maximum text length for quiz generation to avoid excessive API costs
+QUIZ_CACHE_TTL = 7 * 24 * 3600  # Seconds a generated quiz is reused for the same text
+QUIZ_CACHE_MAX_ENTRIES = 1000  # Least recently used quizzes are evicted beyond this
+# Long-document mode: sections of MAX_TEXT_LENGTH_FOR_QUIZ characters generated concurrently
+QUIZ_LONG_DOCUMENT_MAX_CHARS = 200000
+QUIZ_MAX_SECTIONS = 8  # Sections beyond this are sampled evenly across the document
+QUIZ_GENERATION_CONCURRENCY = 4  # OpenAI calls in flight at once, across all requests
+
+# Quiz statistics: learners under this percentage on a completed quiz are flagged at risk
+QUIZ_AT_RISK_PERCENTAGE = 50
+# Seconds a formateur's overview stays cached (it is invalidated on every change anyway)
+QUIZ_OVERVIEW_CACHE_TTL = 3600
+
+# Feedback Settings (see pedagogical/feedback.py, warm with `manage.py precompute_feedback`)
+FEEDBACK_CACHE_TTL = 30 * 24 * 3600  # Seconds a feedback is reused for the same answer
+FEEDBACK_CACHE_MAX_ENTRIES = 10000  # Least recently used feedback is evicted beyond this
+FEEDBACK_BATCH_SIZE = 10  # Responses per completion for whole-session feedback
+
+# Background Job Queue Settings (see pedagogical/jobs.py, run with `manage.py run_jobs`)
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 30  # Seconds before the first retry, doubled on each attempt
+JOB_LOCK_TIMEOUT = 300  # Seconds without heartbeat after which a running job is considered abandoned
+JOB_HEARTBEAT_INTERVAL = 30  # Seconds between heartbeats of a running job, below JOB_LOCK_TIMEOUT
+JOB_POLL_INTERVAL = 2  # Seconds between polls of an empty queue
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import (
-    User, File, Progress, Quiz, QuizAssignment,
-    EvaluationSession, QuestionResponse, CognitiveProfile
+    User, File, Progress, LearnerProgressSummary, Quiz, QuizAssignment,
+    EvaluationSession, QuestionResponse, CognitiveProfile, Job, ExtractedText,
+    GeneratedQuiz, CachedFeedback
 )
 
 
@@ -49,18 +50,21 @@ class ProgressAdmin(admin.ModelAdmin):
     percentage.short_description = 'Percentage'
 
 
+@admin.register(LearnerProgressSummary)
+class LearnerProgressSummaryAdmin(admin.ModelAdmin):
+    """Admin configuration for LearnerProgressSummary model (maintained automatically)."""
+    list_display = ['learner', 'total_quizzes', 'completed_quizzes', 'percentage_sum', 'updated_at']
+    search_fields = ['learner__username']
+    readonly_fields = ['learner', 'total_quizzes', 'completed_quizzes', 'percentage_sum', 'updated_at']
+
+
 @admin.register(Quiz)
 class QuizAdmin(admin.ModelAdmin):
     """Admin configuration for Quiz model."""
     list_display = ['title', 'subject', 'created_by', 'num_questions', 'created_at']
     list_filter = ['created_at', 'subject']
     search_fields = ['title', 'subject', 'description', 'created_by__username']
-    readonly_fields = ['created_at', 'updated_at', 'num_questions']
-    
-    def num_questions(self, obj):
-        """Display number of questions in admin."""
-        return obj.num_questions
-    num_questions.short_description = 'Questions'
+    readonly_fields = ['created_at', 'updated_at', 'num_questions', 'questions_hash']
 
 
 @admin.register(QuizAssignment)
@@ -97,3 +101,39 @@ class CognitiveProfileAdmin(admin.ModelAdmin):
     list_filter = ['confidence_level', 'learning_style', 'updated_at']
     search_fields = ['learner__username']
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Admin configuration for Job model."""
+    list_display = ['id', 'kind', 'status', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['kind', 'status', 'created_at']
+    search_fields = ['kind', 'error', 'created_by__username']
+    readonly_fields = ['created_at', 'started_at', 'finished_at', 'worker']
+
+
+@admin.register(ExtractedText)
+class ExtractedTextAdmin(admin.ModelAdmin):
+    """Admin configuration for ExtractedText model."""
+    list_display = ['content_hash', 'file_ext', 'complete', 'size', 'hits', 'misses', 'last_used_at']
+    list_filter = ['file_ext', 'complete']
+    search_fields = ['content_hash']
+    readonly_fields = ['created_at', 'last_used_at', 'hits', 'misses', 'bytes_saved']
+
+
+@admin.register(GeneratedQuiz)
+class GeneratedQuizAdmin(admin.ModelAdmin):
+    """Admin configuration for GeneratedQuiz model."""
+    list_display = ['cache_key', 'num_questions', 'model', 'prompt_version', 'hits', 'tokens_saved', 'expires_at']
+    list_filter = ['model', 'prompt_version']
+    search_fields = ['cache_key']
+    readonly_fields = ['created_at', 'last_used_at', 'hits', 'tokens_saved']
+
+
+@admin.register(CachedFeedback)
+class CachedFeedbackAdmin(admin.ModelAdmin):
+    """Admin configuration for CachedFeedback model."""
+    list_display = ['cache_key', 'answer', 'is_correct', 'prompt_version', 'hits', 'tokens_saved', 'expires_at']
+    list_filter = ['is_correct', 'prompt_version']
+    search_fields = ['cache_key', 'question_hash', 'answer']
+    readonly_fields = ['created_at', 'last_used_at', 'hits', 'tokens_saved']
@@ -0,0 +1,192 @@
+"""
+Cognitive profile analysis of evaluation sessions.
+
+Shared by EvaluationSessionViewSet (immediate rule-based profile) and the
+background job queue (AI analysis, see pedagogical/jobs.py).
+"""
+import json
+
+from . import llm
+from .models import CognitiveProfile, EvaluationSession
+
+# Thresholds of the rule-based analysis (percentages and milliseconds)
+STRENGTH_SUCCESS_RATE = 70
+WEAKNESS_SUCCESS_RATE = 50
+AUTONOMOUS_HELP_RATE = 20
+AUTONOMOUS_RESPONSE_TIME = 10000
+GUIDED_HELP_RATE = 50
+HIGH_CONFIDENCE_SUCCESS_RATE = 70
+MEDIUM_CONFIDENCE_SUCCESS_RATE = 50
+
+
+def session_indicators(session):
+    """
+    Cognitive indicators of a session, read from its running aggregates (see
+    EvaluationSession.apply_responses) without loading its responses.
+    `cohort.indicators_by_session` computes the same from the responses.
+    """
+    total = session.response_count
+    if total <= 0:
+        return {}
+    
+    by_competence = {}
+    for stats in session.competence_stats.all():
+        count = stats.response_count
+        by_competence[stats.competence_type] = {
+            'count': count,
+            'success_rate': stats.correct_count / count * 100,
+            'avg_time': stats.response_time_sum / count,
+            'help_rate': stats.help_count / count * 100,
+            'avg_attempts': stats.attempts_sum / count,
+        }
+    
+    return {
+        'total_responses': total,
+        'overall_success_rate': session.correct_count / total * 100,
+        'average_response_time': session.response_time_mean,
+        'help_usage_rate': session.help_count / total * 100,
+        'by_competence': by_competence,
+        # M2 can drift just below zero after removals
+        'response_time_variability': (max(session.response_time_m2, 0) / total) ** 0.5,
+    }
+
+
+def get_ai_analysis(indicators):
+    """Use OpenAI to generate pedagogical insights."""
+    # Prepare data summary for AI
+    summary = {
+        'total_questions': indicators['total_responses'],
+        'success_rate': round(indicators['overall_success_rate'], 2),
+        'avg_response_time_seconds': round(indicators['average_response_time'] / 1000, 2),
+        'help_usage': round(indicators['help_usage_rate'], 2),
+        'competences': indicators['by_competence']
+    }
+    
+    prompt = f"""En tant qu'expert pédagogique, analyse ces résultats d'évaluation diagnostique d'un élève.
+
+Données d'évaluation :
+{json.dumps(summary, indent=2, ensure_ascii=False)}
+
+Consignes STRICTES :
+1. Tu dois formuler des HYPOTHÈSES PÉDAGOGIQUES, JAMAIS de diagnostics médicaux
+2. Identifie OBLIGATOIREMENT au moins 2 forces cognitives
+3. Identifie les fragilités possibles (pas plus de 3)
+4. Propose un style d'apprentissage (visuel/logique/guidé)
+5. Donne 3-4 recommandations pédagogiques concrètes
+
+Format de réponse JSON STRICTEMENT :
+{{
+  "strengths": ["force1", "force2"],
+  "weaknesses": ["fragilité1", "fragilité2"],
+  "learning_style": "style d'apprentissage",
+  "confidence_level": "faible|moyen|élevé",
+  "recommendations": ["recommandation1", "recommandation2", "recommandation3"],
+  "reasoning": "Explication brève de l'analyse"
+}}"""
+
+    ai_text = llm.chat_text(
+        [
+            {
+                "role": "system",
+                "content": "Tu es un expert pédagogique qui analyse les performances d'élèves pour identifier leurs forces et adapter l'enseignement. Tu ne poses JAMAIS de diagnostic médical."
+            },
+            {"role": "user", "content": prompt}
+        ],
+        purpose='analysis',
+        temperature=0.7,
+        max_tokens=1000
+    )
+    
+    try:
+        return json.loads(ai_text)
+    except json.JSONDecodeError:
+        # Try to extract JSON from markdown code blocks
+        if '```json' in ai_text:
+            ai_text = ai_text.split('```json')[1].split('```')[0].strip()
+        elif '```' in ai_text:
+            ai_text = ai_text.split('```')[1].split('```')[0].strip()
+        return json.loads(ai_text)
+
+
+def fallback_analysis(indicators):
+    """Rule-based analysis as fallback."""
+    by_comp = indicators.get('by_competence', {})
+    
+    # Identify strengths (success rate > 70%)
+    strengths = [
+        comp for comp, data in by_comp.items()
+        if data['success_rate'] > STRENGTH_SUCCESS_RATE
+    ]
+    
+    # Identify weaknesses (success rate < 50%)
+    weaknesses = [
+        comp for comp, data in by_comp.items()
+        if data['success_rate'] < WEAKNESS_SUCCESS_RATE
+    ]
+    
+    # Determine learning style
+    help_rate = indicators.get('help_usage_rate', 0)
+    avg_time = indicators.get('average_response_time', 0)
+    
+    if help_rate < AUTONOMOUS_HELP_RATE and avg_time < AUTONOMOUS_RESPONSE_TIME:
+        learning_style = "autonome et rapide"
+    elif help_rate > GUIDED_HELP_RATE:
+        learning_style = "guidé avec étayage"
+    else:
+        learning_style = "équilibré"
+    
+    # Confidence level
+    success_rate = indicators.get('overall_success_rate', 0)
+    if success_rate > HIGH_CONFIDENCE_SUCCESS_RATE:
+        confidence = 'élevé'
+    elif success_rate > MEDIUM_CONFIDENCE_SUCCESS_RATE:
+        confidence = 'moyen'
+    else:
+        confidence = 'faible'
+    
+    return {
+        'strengths': strengths[:2] if strengths else ['persévérance'],
+        'weaknesses': weaknesses[:3],
+        'learning_style': learning_style,
+        'confidence_level': confidence,
+        'recommendations': [
+            f"Valoriser les compétences en {strengths[0] if strengths else 'réflexion'}",
+            f"Renforcer progressivement {weaknesses[0] if weaknesses else 'les bases'}",
+            "Adapter le rythme selon les besoins"
+        ]
+    }
+
+
+def save_profile(session, analysis, indicators):
+    """Create or update the learner's cognitive profile from an analysis."""
+    profile, created = CognitiveProfile.objects.update_or_create(
+        learner=session.learner,
+        defaults={
+            'strengths': analysis.get('strengths', []),
+            'weaknesses': analysis.get('weaknesses', []),
+            'learning_style': analysis.get('learning_style', ''),
+            'confidence_level': analysis.get('confidence_level', 'moyen'),
+            'recommendations': analysis.get('recommendations', []),
+            'analysis_data': indicators,
+            'last_evaluation_session': session
+        }
+    )
+    return profile
+
+
+def run_session_analysis_job(payload):
+    """
+    Job handler: replace the immediate rule-based profile with the AI analysis.
+    Errors propagate so the queue can retry; the fallback profile stays meanwhile.
+    """
+    session = EvaluationSession.objects.select_related('learner').get(pk=payload['session_id'])
+    indicators = session_indicators(session)
+    ai_analysis = get_ai_analysis(indicators)
+    
+    # Do not overwrite a profile generated by a more recent session
+    profile = CognitiveProfile.objects.filter(learner=session.learner).first()
+    if profile and profile.last_evaluation_session_id not in (None, session.id):
+        return {'skipped': True, 'reason': 'Profil issu d\'une session plus récente'}
+    
+    profile = save_profile(session, ai_analysis, indicators)
+    return {'profile_id': profile.id}
@@ -0,0 +1,125 @@
+"""
+Vectorized cognitive indicators for many evaluation sessions at once.
+
+Responses are loaded as columnar NumPy arrays, rows grouped by session in
+answer order, and every indicator of `analysis.session_indicators` is
+computed with grouped reductions (`np.bincount` over session and session ×
+competence group indices) instead of Python passes over model instances.
+The running aggregates of the sessions give the same indicators; the
+recompute_profiles command uses this module to rebuild them from scratch.
+"""
+import numpy as np
+
+from .models import QuestionResponse
+
+FIELDS = ('session_id', 'competence_type', 'is_correct', 'response_time_ms', 'attempts', 'help_used')
+
+
+class ResponseColumns:
+    """Question responses as parallel arrays, one per field of FIELDS."""
+    
+    def __init__(self, session_ids, competences, is_correct, times, attempts, help_used):
+        self.session_ids = np.asarray(session_ids, dtype=np.int64)
+        self.competences = np.asarray(competences, dtype=str)
+        self.is_correct = np.asarray(is_correct, dtype=bool)
+        self.times = np.asarray(times, dtype=np.float64)
+        self.attempts = np.asarray(attempts, dtype=np.float64)
+        self.help_used = np.asarray(help_used, dtype=bool)
+    
+    def __len__(self):
+        return len(self.session_ids)
+    
+    @classmethod
+    def from_rows(cls, rows):
+        """Build the columns from tuples ordered like FIELDS."""
+        rows = list(rows)
+        if not rows:
+            return cls([], [], [], [], [], [])
+        return cls(*zip(*rows))
+    
+    @classmethod
+    def from_responses(cls, responses):
+        """Build the columns from QuestionResponse instances."""
+        return cls.from_rows(
+            tuple(getattr(response, field) for field in FIELDS) for response in responses
+        )
+
+
+def load_columns(session_ids=None):
+    """Responses of `session_ids` (every session if None) as ResponseColumns."""
+    queryset = QuestionResponse.objects.order_by('session_id', 'created_at', 'id')
+    if session_ids is not None:
+        queryset = queryset.filter(session_id__in=session_ids)
+    return ResponseColumns.from_rows(queryset.values_list(*FIELDS).iterator(chunk_size=10000))
+
+
+def indicators_by_session(columns):
+    """
+    Indicators of every session in `columns`, as `{session_id: indicators}`.
+    
+    The indicators have the structure of `session_indicators`; competences
+    are listed in the order they were first answered in the session.
+    """
+    if not len(columns):
+        return {}
+    
+    sessions, session_index = np.unique(columns.session_ids, return_inverse=True)
+    competences, competence_index = np.unique(columns.competences, return_inverse=True)
+    correct = columns.is_correct.astype(np.float64)
+    helped = columns.help_used.astype(np.float64)
+    
+    def per_session(weights=None):
+        return np.bincount(session_index, weights=weights, minlength=len(sessions))
+    
+    count = per_session()
+    time_sum = per_session(columns.times)
+    mean_time = time_sum / count
+    deviation = columns.times - mean_time[session_index]
+    variability = (per_session(deviation ** 2) / count) ** 0.5
+    success_rate = per_session(correct) / count * 100
+    help_rate = per_session(helped) / count * 100
+    
+    # One group per (session, competence), ordered by session then first answer
+    group_key = session_index * len(competences) + competence_index
+    groups, first_row, group_index = np.unique(group_key, return_index=True, return_inverse=True)
+    
+    def per_group(weights=None):
+        return np.bincount(group_index, weights=weights, minlength=len(groups))
+    
+    group_count = per_group()
+    group_session = groups // len(competences)
+    order = np.lexsort((first_row, group_session))
+    group_columns = zip(
+        group_session[order].tolist(),
+        competences[groups[order] % len(competences)].tolist(),
+        group_count[order].tolist(),
+        (per_group(correct) / group_count * 100)[order].tolist(),
+        (per_group(columns.times) / group_count)[order].tolist(),
+        (per_group(helped) / group_count * 100)[order].tolist(),
+        (per_group(columns.attempts) / group_count)[order].tolist(),
+    )
+    
+    indicators = {}
+    session_ids = sessions.tolist()
+    session_rows = zip(
+        session_ids, count.tolist(), success_rate.tolist(), mean_time.tolist(),
+        help_rate.tolist(), variability.tolist()
+    )
+    for session_id, total, success, average_time, help_usage, time_variability in session_rows:
+        indicators[session_id] = {
+            'total_responses': total,
+            'overall_success_rate': success,
+            'average_response_time': average_time,
+            'help_usage_rate': help_usage,
+            'by_competence': {},
+            'response_time_variability': time_variability,
+        }
+    for session, competence, total, success, average_time, help_usage, attempts in group_columns:
+        indicators[session_ids[session]]['by_competence'][competence] = {
+            'count': total,
+            'success_rate': success,
+            'avg_time': average_time,
+            'help_rate': help_usage,
+            'avg_attempts': attempts,
+        }
+    return indicators
@@ -0,0 +1,290 @@
+"""
+Text extraction for uploaded documents.
+
+Parsing (see pedagogical/parsing.py) is CPU-bound pure Python, so it runs in a
+bounded pool of worker processes rather than in the request thread: each task
+has a CPU limit enforced inside the worker and a wall-clock timeout enforced
+here, and the number of queued tasks is capped. Extracted pages are cached by
+content hash in the ExtractedText table.
+"""
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+import hashlib
+import multiprocessing
+import re
+import threading
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ExtractedText
+from .parsing import ExtractionTimeout, collect, extract_budget, extract_slice
+
+DOCUMENTS_DIR = 'documents'
+
+# Documents are named by the SHA-256 of their content (see content_hash)
+DOCUMENT_ID_RE = re.compile(r'[0-9a-f]{64}')
+
+
+class ExtractionBusy(Exception):
+    """Raised when the extraction pool already has too many queued documents."""
+
+
+class ExtractionError(Exception):
+    """Raised when a worker process dies while parsing a document."""
+
+
+_pool = None
+_pending = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    """Create the worker pool on first use."""
+    global _pool, _pending
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _pending = threading.BoundedSemaphore(
+                settings.EXTRACTION_WORKERS + settings.EXTRACTION_QUEUE_SIZE
+            )
+        return _pool, _pending
+
+
+def _discard_pool(pool):
+    """Drop a broken pool so the next task starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_in_pool(task, *args):
+    """
+    Run a parsing task in the worker pool and return its result.
+
+    Raises ExtractionBusy when the queue is full and ExtractionTimeout when
+    the task exceeds EXTRACTION_TIMEOUT (wall clock) or EXTRACTION_CPU_LIMIT
+    (CPU time, enforced in the worker). With EXTRACTION_WORKERS = 0 the task
+    runs in the calling thread without limits.
+    """
+    if not settings.EXTRACTION_WORKERS:
+        return task(*args)
+    
+    pool, pending = _get_pool()
+    if not pending.acquire(blocking=False):
+        raise ExtractionBusy('Trop de documents en cours d\'extraction, réessayez plus tard')
+    try:
+        future = pool.submit(task, *args, cpu_seconds=settings.EXTRACTION_CPU_LIMIT)
+    except BaseException:
+        pending.release()
+        raise
+    # The slot is freed when the worker is really done, not when we stop waiting
+    future.add_done_callback(lambda f: pending.release())
+    try:
+        return future.result(timeout=settings.EXTRACTION_TIMEOUT)
+    except FuturesTimeoutError:
+        # Still queued: dropped here; already running: stopped by its CPU limit
+        future.cancel()
+        raise ExtractionTimeout(
+            f'Extraction interrompue après {settings.EXTRACTION_TIMEOUT} s'
+        )
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise ExtractionError('Le processus d\'extraction s\'est arrêté brutalement')
+
+
+def _read(file):
+    file.seek(0)
+    data = b''.join(file.chunks())
+    file.seek(0)
+    return data
+
+
+def extract_pages(file, file_ext, max_chars=None):
+    """
+    Extract text from `file` page by page, stopping once `max_chars` is reached.
+
+    Returns a dict with the (possibly truncated) `text`, a `truncated` flag and
+    the number of `pages_read`, along with the full text of the pages read.
+    With `max_chars=None` the whole document is read.
+    """
+    return run_in_pool(extract_budget, _read(file), file_ext, max_chars)
+
+
+def extract_text(file, file_ext, max_chars=None):
+    """Like `extract_pages`, without the page texts."""
+    return extract_pages(file, file_ext, max_chars)[0]
+
+
+def read_pages(file, file_ext, start, count):
+    """Text of at most `count` pages of `file`, from page index `start`."""
+    return run_in_pool(extract_slice, _read(file), file_ext, start, count)
+
+
+def content_hash(file):
+    """SHA-256 of the uploaded bytes, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def extract_text_cached(file, file_ext, document_id, max_chars=None):
+    """
+    Like `extract_text`, but served from the ExtractedText cache when the pages
+    stored for `document_id` cover the budget. The result carries a `cache`
+    key set to 'hit' or 'miss'.
+    """
+    entry = ExtractedText.objects.filter(content_hash=document_id, file_ext=file_ext).first()
+    if entry is not None and entry.covers(max_chars):
+        ExtractedText.objects.filter(pk=entry.pk).update(
+            hits=F('hits') + 1,
+            bytes_saved=F('bytes_saved') + file.size,
+            last_used_at=timezone.now()
+        )
+        result = collect(entry.pages, max_chars)[0]
+        result['cache'] = 'hit'
+        return result
+    
+    result, pages = extract_pages(file, file_ext, max_chars)
+    fields = {
+        'pages': pages,
+        'complete': not result['truncated'],
+        'size': sum(len(page.encode('utf-8')) for page in pages),
+        'source_size': file.size,
+        'last_used_at': timezone.now(),
+    }
+    if entry is None:
+        try:
+            with transaction.atomic():
+                ExtractedText.objects.create(
+                    content_hash=document_id, file_ext=file_ext, misses=1, **fields
+                )
+        except IntegrityError:
+            # Another upload of the same document won the race
+            pass
+    else:
+        ExtractedText.objects.filter(pk=entry.pk).update(misses=F('misses') + 1, **fields)
+    evict_extraction_cache()
+    result['cache'] = 'miss'
+    return result
+
+
+def evict_extraction_cache(max_bytes=None):
+    """Delete least recently used entries until the cache fits in `max_bytes`."""
+    if max_bytes is None:
+        max_bytes = settings.EXTRACTION_CACHE_MAX_BYTES
+    total = ExtractedText.objects.aggregate(total=Sum('size'))['total'] or 0
+    if total <= max_bytes:
+        return 0
+    kept = 0
+    stale = []
+    for pk, size in ExtractedText.objects.order_by('-last_used_at', '-id').values_list('pk', 'size'):
+        kept += size
+        if kept > max_bytes:
+            stale.append(pk)
+    return ExtractedText.objects.filter(pk__in=stale).delete()[0]
+
+
+def extraction_cache_stats():
+    """Hit/miss counters and bytes saved across the entries currently cached."""
+    return ExtractedText.objects.aggregate(
+        entries=Count('id'),
+        size=Coalesce(Sum('size'), 0),
+        hits=Coalesce(Sum('hits'), 0),
+        misses=Coalesce(Sum('misses'), 0),
+        bytes_saved=Coalesce(Sum('bytes_saved'), 0),
+    )
+
+
+def _document_path(user, document_id, file_ext):
+    # The id comes from the client: anything but a hash could leave the
+    # user's directory (e.g. '../7/<hash>')
+    if not isinstance(document_id, str) or not DOCUMENT_ID_RE.fullmatch(document_id):
+        raise ValueError(f'Identifiant de document invalide: {document_id!r}')
+    return f'{DOCUMENTS_DIR}/{user.pk}/{document_id}{file_ext}'
+
+
+def store_document(file, file_ext, user, document_id):
+    """
+    Keep a copy of an uploaded document so its full text can be paged later.
+
+    Documents are stored per user under their SHA-256 (`document_id`);
+    uploading the same file twice reuses the stored copy.
+    """
+    path = _document_path(user, document_id, file_ext)
+    if not default_storage.exists(path):
+        file.seek(0)
+        default_storage.save(path, file)
+    file.seek(0)
+
+
+def open_document(document_id, user):
+    """Return `(file, file_ext)` for a document stored by `user`, or None."""
+    if not isinstance(document_id, str) or not DOCUMENT_ID_RE.fullmatch(document_id):
+        return None
+    for file_ext in settings.ALLOWED_DOCUMENT_EXTENSIONS:
+        path = _document_path(user, document_id, file_ext)
+        if default_storage.exists(path):
+            return default_storage.open(path, 'rb'), file_ext
+    return None
+
+
+def stored_documents():
+    """
+    Every stored document as `(path, size, last_used)`. A document is last
+    used when it was uploaded or its cached text was last read.
+    """
+    if not default_storage.exists(DOCUMENTS_DIR):
+        return []
+    files = []
+    for user_dir in default_storage.listdir(DOCUMENTS_DIR)[0]:
+        directory = f'{DOCUMENTS_DIR}/{user_dir}'
+        for name in default_storage.listdir(directory)[1]:
+            path = f'{directory}/{name}'
+            files.append((
+                path,
+                name.split('.', 1)[0],
+                default_storage.size(path),
+                default_storage.get_modified_time(path),
+            ))
+    used = dict(
+        ExtractedText.objects.filter(content_hash__in={file[1] for file in files})
+        .values_list('content_hash', 'last_used_at')
+    )
+    return [
+        (path, size, max(modified, used.get(document_id, modified)))
+        for path, document_id, size, modified in files
+    ]
+
+
+def prune_documents(max_bytes=None, max_age_days=None):
+    """
+    Delete stored documents unused for `max_age_days`, then the least recently
+    used ones until the rest fit in `max_bytes`. Returns `(deleted, freed bytes)`.
+    """
+    if max_bytes is None:
+        max_bytes = settings.DOCUMENTS_MAX_BYTES
+    if max_age_days is None:
+        max_age_days = settings.DOCUMENT_RETENTION_DAYS
+    cutoff = timezone.now() - timedelta(days=max_age_days)
+    kept = 0
+    stale = []
+    for path, size, last_used in sorted(stored_documents(), key=lambda file: file[2], reverse=True):
+        kept += size
+        if last_used < cutoff or kept > max_bytes:
+            stale.append((path, size))
+    for path, size in stale:
+        default_storage.delete(path)
+    return len(stale), sum(size for _, size in stale)
@@ -0,0 +1,167 @@
+"""
+Local stand-in for the OpenAI chat completions HTTP API.
+
+Used by the tests and for offline development (`manage.py fake_llm_server`):
+point LLM_BASE_URL at `FakeLLMServer.url` and every LLM call goes through the
+real client, connection pool, retries and circuit breaker of pedagogical.llm.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+
+class FakeLLMServer:
+    """
+    Threaded HTTP server answering POST /v1/chat/completions.
+
+    `content` is the assistant message: a string, or a callable receiving the
+    request body. `fail(*statuses)` queues error statuses returned before the
+    next successful answers, and `delay` slows every answer down. Streamed
+    requests get the message in chunks of `chunk_size` characters, sent
+    `chunk_delay` seconds apart.
+    """
+
+    def __init__(self, content='{}', host='127.0.0.1', port=0, delay=0, chunk_size=8, chunk_delay=0):
+        self.content = content
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.requests = []
+        self.connections = set()
+        self._failures = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+
+    def fail(self, *statuses):
+        """Answer the next requests with these HTTP error statuses."""
+        with self._lock:
+            self._failures.extend(statuses)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _next_failure(self):
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def _content(self, body):
+        return self.content(body) if callable(self.content) else self.content
+
+    def _usage(self, body, content):
+        prompt_tokens = sum(len(str(m.get('content', '')).split()) for m in body.get('messages', []))
+        completion_tokens = len(content.split())
+        return {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        }
+
+    def _chunks(self, body):
+        """Chunks of a streamed answer, as chat.completion.chunk payloads."""
+        content = self._content(body)
+        base = {
+            'id': f'chatcmpl-fake-{len(self.requests)}',
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake'),
+        }
+        for start in range(0, len(content), self.chunk_size):
+            piece = content[start:start + self.chunk_size]
+            yield {**base, 'choices': [{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]}
+        yield {**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]}
+        if body.get('stream_options', {}).get('include_usage'):
+            yield {**base, 'choices': [], 'usage': self._usage(body, content)}
+
+    def _answer(self, body):
+        content = self._content(body)
+        return {
+            'id': f'chatcmpl-fake-{len(self.requests)}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': self._usage(body, content),
+        }
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so connection reuse by the client can be observed
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                with fake._lock:
+                    fake.requests.append(body)
+                    fake.connections.add(self.client_address)
+                if fake.delay:
+                    time.sleep(fake.delay)
+                failure = fake._next_failure()
+                if failure is not None:
+                    payload = {'error': {'message': f'Erreur simulée {failure}', 'type': 'fake_error'}}
+                    self._send(failure, payload, {'Retry-After': '0'} if failure == 429 else {})
+                elif not self.path.rstrip('/').endswith('/chat/completions'):
+                    self._send(404, {'error': {'message': 'Not found', 'type': 'fake_error'}})
+                elif body.get('stream'):
+                    self._stream(body)
+                else:
+                    self._send(200, fake._answer(body))
+
+            def _send(self, code, payload, headers=None):
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, body):
+                # No Content-Length: the end of the stream is the end of the connection
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                for chunk in fake._chunks(body):
+                    self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode('utf-8'))
+                    self.wfile.flush()
+                    if fake.chunk_delay:
+                        time.sleep(fake.chunk_delay)
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,419 @@
+"""
+Feedback on individual question responses.
+
+The AI feedback goes through the shared LLM client; `fallback_feedback` is the
+rule-based answer used when the API is unavailable.
+
+The prompt only sees buckets of the response time and attempts, so feedback
+depends on (question, answer, correct answer, result, time bucket, attempts
+bucket, help used) alone and is cached under that key in CachedFeedback:
+learners giving the same wrong answer to a question share one OpenAI call.
+`manage.py precompute_feedback` warms the cache for the most common wrong
+answers, and `session_feedback` covers a whole session in batched calls.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+import openai
+
+from . import llm
+from .generation import normalize_text
+from .models import CachedFeedback, QuestionResponse
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the feedback prompt changes so stale feedback is not served
+FEEDBACK_PROMPT_VERSION = 1
+
+# Response time buckets (upper bounds in milliseconds) and their prompt labels
+FAST_RESPONSE_MS = 5000
+SLOW_RESPONSE_MS = 30000
+TIME_BUCKET_LABELS = {
+    'rapide': 'rapide (moins de 5 secondes)',
+    'normal': 'normal (entre 5 et 30 secondes)',
+    'lent': 'long (plus de 30 secondes)',
+}
+# Attempts beyond this share one bucket
+MAX_ATTEMPTS_BUCKET = 3
+
+
+def time_bucket(response_time_ms):
+    if response_time_ms < FAST_RESPONSE_MS:
+        return 'rapide'
+    if response_time_ms < SLOW_RESPONSE_MS:
+        return 'normal'
+    return 'lent'
+
+
+def attempts_bucket(attempts):
+    return min(max(attempts, 1), MAX_ATTEMPTS_BUCKET)
+
+
+def bucket_annotations():
+    """`time_bucket` and `attempts_bucket` computed in SQL, as the functions above."""
+    return {
+        'time_bucket': Case(
+            When(response_time_ms__lt=FAST_RESPONSE_MS, then=Value('rapide')),
+            When(response_time_ms__lt=SLOW_RESPONSE_MS, then=Value('normal')),
+            default=Value('lent')
+        ),
+        'attempts_bucket': Case(
+            When(attempts__lte=1, then=Value(1)),
+            When(attempts__gte=MAX_ATTEMPTS_BUCKET, then=Value(MAX_ATTEMPTS_BUCKET)),
+            default=F('attempts'),
+            output_field=IntegerField()
+        ),
+    }
+
+
+def make_context(question_text, answer, correct_answer, is_correct, time_bucket, attempts_bucket, help_used):
+    """Everything the feedback prompt depends on."""
+    return {
+        'question': normalize_text(question_text),
+        'student_answer': normalize_text(answer),
+        'correct_answer': normalize_text(correct_answer),
+        'is_correct': is_correct,
+        'time_bucket': time_bucket,
+        'attempts_bucket': attempts_bucket,
+        'help_used': help_used,
+    }
+
+
+def feedback_context(response_obj):
+    """`make_context` for a QuestionResponse."""
+    return make_context(
+        response_obj.question_text,
+        response_obj.answer,
+        response_obj.correct_answer,
+        response_obj.is_correct,
+        time_bucket(response_obj.response_time_ms),
+        attempts_bucket(response_obj.attempts),
+        response_obj.help_used
+    )
+
+
+def question_hash(question_text):
+    return hashlib.sha256(normalize_text(question_text).encode('utf-8')).hexdigest()
+
+
+def feedback_key(context):
+    """Cache key of a feedback context for the current prompt."""
+    parts = [
+        question_hash(context['question']),
+        context['student_answer'],
+        context['correct_answer'],
+        str(context['is_correct']),
+        context['time_bucket'],
+        str(context['attempts_bucket']),
+        str(context['help_used']),
+        llm.model_id(),
+        str(FEEDBACK_PROMPT_VERSION),
+    ]
+    # Separator that cannot appear in normalized text
+    return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+
+def _describe(context):
+    attempts = context['attempts_bucket']
+    if attempts >= MAX_ATTEMPTS_BUCKET:
+        attempts = f'{MAX_ATTEMPTS_BUCKET} ou plus'
+    return f"""Question : {context['question']}
+Réponse de l'élève : {context['student_answer']}
+Réponse correcte : {context['correct_answer']}
+Résultat : {"✓ Correct" if context['is_correct'] else "✗ Incorrect"}
+Temps de réponse : {TIME_BUCKET_LABELS[context['time_bucket']]}
+Tentatives : {attempts}
+Aide utilisée : {"Oui" if context['help_used'] else "Non"}"""
+
+
+GUIDELINES = """Consignes pour le feedback :
+1. VALORISE le raisonnement, même si la réponse est incorrecte
+2. EXPLIQUE l'erreur sans culpabiliser
+3. PROPOSE une stratégie alternative si nécessaire
+4. Reste BIENVEILLANT et ENCOURAGEANT
+5. Maximum 3-4 phrases"""
+
+SYSTEM_PROMPT = "Tu es un enseignant bienveillant qui donne des feedbacks constructifs et encourageants."
+
+
+def build_prompt(context):
+    return f"""En tant qu'enseignant bienveillant, donne un feedback pédagogique à un élève.
+
+{_describe(context)}
+
+{GUIDELINES}
+
+Ton feedback :"""
+
+
+def build_batch_prompt(contexts):
+    """Prompt asking for the feedback on several responses at once, as JSON."""
+    responses = '\n\n'.join(
+        f'Réponse {number} :\n{_describe(context)}'
+        for number, context in enumerate(contexts, start=1)
+    )
+    return f"""En tant qu'enseignant bienveillant, donne un feedback pédagogique à un élève pour chacune des réponses suivantes.
+
+{responses}
+
+{GUIDELINES} par réponse
+
+Format de réponse en JSON :
+{{
+  "feedbacks": [
+    {{"id": 1, "feedback": "Feedback de la réponse 1"}}
+  ]
+}}"""
+
+
+def generate_ai_feedback(context):
+    """
+    Generate adaptive feedback using OpenAI; returns `(feedback, total_tokens)`.
+
+    OpenAI and LLMUnavailable exceptions are left to the caller.
+    """
+    completion = llm.chat(
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_prompt(context)}
+        ],
+        purpose='feedback',
+        temperature=0.7,
+        max_tokens=200
+    )
+    return completion.text, completion.total_tokens
+
+
+def _cached_feedback(key):
+    """Return the cached result for `key` and count the hit, or None."""
+    now = timezone.now()
+    entry = CachedFeedback.objects.filter(cache_key=key, expires_at__gt=now).first()
+    if entry is None:
+        return None
+    CachedFeedback.objects.filter(pk=entry.pk).update(
+        hits=F('hits') + 1,
+        tokens_saved=F('tokens_saved') + entry.total_tokens,
+        last_used_at=now
+    )
+    return {
+        'feedback': entry.feedback,
+        'cache': 'hit',
+        'tokens_used': 0,
+        'tokens_saved': entry.total_tokens,
+    }
+
+
+def _store_feedback(key, context, feedback, total_tokens, evict=True):
+    now = timezone.now()
+    fields = {
+        'question_hash': question_hash(context['question']),
+        'answer': context['student_answer'],
+        'is_correct': context['is_correct'],
+        'prompt_version': FEEDBACK_PROMPT_VERSION,
+        'feedback': feedback,
+        'total_tokens': total_tokens,
+        'expires_at': now + timedelta(seconds=settings.FEEDBACK_CACHE_TTL),
+        'last_used_at': now,
+    }
+    try:
+        with transaction.atomic():
+            CachedFeedback.objects.update_or_create(cache_key=key, defaults=fields)
+    except IntegrityError:
+        # Another request stored the same feedback concurrently
+        pass
+    if evict:
+        evict_feedback_cache()
+
+
+def get_feedback(context, force_refresh=False):
+    """
+    Return AI feedback for a `feedback_context`, from the cache when possible.
+
+    The result is a dict with `feedback`, `cache` ('hit', 'miss' or
+    'refresh'), `tokens_used` and `tokens_saved`.
+    """
+    key = feedback_key(context)
+    if not force_refresh:
+        cached = _cached_feedback(key)
+        if cached is not None:
+            return cached
+    feedback, total_tokens = generate_ai_feedback(context)
+    _store_feedback(key, context, feedback, total_tokens)
+    return {
+        'feedback': feedback,
+        'cache': 'refresh' if force_refresh else 'miss',
+        'tokens_used': total_tokens,
+        'tokens_saved': 0,
+    }
+
+
+def generate_batch_feedback(contexts):
+    """
+    Generate the feedback on several responses in one completion.
+
+    Returns `(feedbacks, total_tokens)`, `feedbacks` holding one text per
+    context, or None where the answer left it out. OpenAI and LLMUnavailable
+    exceptions are left to the caller.
+    """
+    completion = llm.chat(
+        [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": build_batch_prompt(contexts)}
+        ],
+        purpose='feedback_batch',
+        temperature=0.7,
+        max_tokens=min(200 * len(contexts), 4000)
+    )
+    total_tokens = completion.total_tokens
+    feedbacks = [None] * len(contexts)
+    try:
+        items = json.loads(completion.text).get('feedbacks', [])
+    except (json.JSONDecodeError, AttributeError):
+        logger.warning("Réponse non JSON pour un lot de %s feedbacks", len(contexts))
+        return feedbacks, total_tokens
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('feedback'), str):
+            continue
+        number = item.get('id')
+        if isinstance(number, int) and 1 <= number <= len(contexts):
+            feedbacks[number - 1] = item['feedback']
+    return feedbacks, total_tokens
+
+
+def session_feedback(responses, force_refresh=False):
+    """
+    Build the feedback on every response of a session with as few OpenAI
+    calls as possible, and store it on the responses.
+
+    Feedback already stored on a response or found in the cache is reused;
+    the remaining distinct contexts are sent FEEDBACK_BATCH_SIZE at a time,
+    the batches concurrently. Responses a batch could not cover (API down,
+    item missing from the answer) get the rule-based feedback, which is
+    neither cached nor stored.
+
+    Returns a dict with `responses` (`id`, `question_id`, `feedback` and
+    `cache`: 'stored', 'hit', 'miss', 'refresh' or 'fallback'),
+    `completions`, `tokens_used` and `tokens_saved`.
+    """
+    responses = list(responses)
+    results = {}
+    pending = {}  # Cache key -> (context, responses needing it)
+    for response_obj in responses:
+        if response_obj.feedback and not force_refresh:
+            results[response_obj.pk] = (response_obj.feedback, 'stored')
+            continue
+        context = feedback_context(response_obj)
+        key = feedback_key(context)
+        pending.setdefault(key, (context, []))[1].append(response_obj)
+    
+    tokens_saved = 0
+    if pending and not force_refresh:
+        now = timezone.now()
+        entries = list(
+            CachedFeedback.objects.filter(cache_key__in=pending.keys(), expires_at__gt=now)
+        )
+        CachedFeedback.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+            hits=F('hits') + 1,
+            tokens_saved=F('tokens_saved') + F('total_tokens'),
+            last_used_at=now
+        )
+        for entry in entries:
+            tokens_saved += entry.total_tokens
+            for response_obj in pending.pop(entry.cache_key)[1]:
+                results[response_obj.pk] = (entry.feedback, 'hit')
+    
+    keys = list(pending)
+    batches = [
+        keys[start:start + settings.FEEDBACK_BATCH_SIZE]
+        for start in range(0, len(keys), settings.FEEDBACK_BATCH_SIZE)
+    ]
+    tokens_used = 0
+    if batches:
+        # No more threads than LLM calls allowed in flight
+        workers = min(len(batches), settings.LLM_MAX_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(generate_batch_feedback, [pending[key][0] for key in batch])
+                for batch in batches
+            ]
+        for batch, future in zip(batches, futures):
+            try:
+                feedbacks, total_tokens = future.result()
+            except (llm.LLMUnavailable, openai.OpenAIError):
+                # API down, overloaded or refusing the call: rule-based feedback for this batch
+                logger.warning("Lot de %s feedbacks non généré", len(batch), exc_info=True)
+                continue
+            tokens_used += total_tokens
+            for key, feedback in zip(batch, feedbacks):
+                if feedback is None:
+                    continue
+                context, batch_responses = pending[key]
+                _store_feedback(key, context, feedback, total_tokens // len(batch), evict=False)
+                for response_obj in batch_responses:
+                    results[response_obj.pk] = (feedback, 'refresh' if force_refresh else 'miss')
+        evict_feedback_cache()
+    
+    stored = []
+    payload = []
+    for response_obj in responses:
+        if response_obj.pk in results:
+            feedback, cache = results[response_obj.pk]
+            if feedback != response_obj.feedback:
+                response_obj.feedback = feedback
+                stored.append(response_obj)
+        else:
+            feedback, cache = fallback_feedback(response_obj), 'fallback'
+        payload.append({
+            'id': response_obj.pk,
+            'question_id': response_obj.question_id,
+            'feedback': feedback,
+            'cache': cache,
+        })
+    QuestionResponse.objects.bulk_update(stored, ['feedback'])
+    return {
+        'responses': payload,
+        'completions': len(batches),
+        'tokens_used': tokens_used,
+        'tokens_saved': tokens_saved,
+    }
+
+
+def evict_feedback_cache(max_entries=None):
+    """Delete expired entries, then the least recently used beyond `max_entries`."""
+    if max_entries is None:
+        max_entries = settings.FEEDBACK_CACHE_MAX_ENTRIES
+    deleted = CachedFeedback.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+    stale = list(
+        CachedFeedback.objects.order_by('-last_used_at', '-id')
+        .values_list('pk', flat=True)[max_entries:]
+    )
+    if stale:
+        deleted += CachedFeedback.objects.filter(pk__in=stale).delete()[0]
+    return deleted
+
+
+def fallback_feedback(response_obj):
+    """Rule-based feedback, used when the AI feedback cannot be generated."""
+    if response_obj.is_correct:
+        if response_obj.attempts > 1 or response_obj.help_used:
+            return (
+                "Bonne réponse ! Tu as persévéré pour y arriver, c'est une belle démarche. "
+                "Essaie la prochaine fois de retrouver seul le raisonnement qui t'a mené au résultat."
+            )
+        return "Bonne réponse ! Ton raisonnement est juste, continue ainsi."
+    feedback = (
+        f"Ce n'est pas tout à fait ça : la bonne réponse était « {response_obj.correct_answer} ». "
+        "Ton essai montre que tu as cherché, c'est important. "
+    )
+    if response_obj.response_time_ms < FAST_RESPONSE_MS:
+        feedback += "Prends le temps de relire la question avant de répondre."
+    else:
+        feedback += "Relis la question en repérant les mots-clés, puis compare-les avec chaque proposition."
+    return feedback
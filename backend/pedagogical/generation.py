@@ -0,0 +1,456 @@
+"""
+Quiz generation from document text, with a cache of generated quizzes.
+
+Long documents are generated map-reduce style: the text is split into
+sections, each section gets its own (cached) generation, run concurrently
+under a process-wide limit, and the questions are merged and deduplicated.
+
+Generated quizzes are cached under the hash of the normalized source text,
+the number of questions, the backend and model and PROMPT_VERSION, so formateurs
+generating from the same chapter share one OpenAI call. Entries expire after
+QUIZ_CACHE_TTL seconds and the least recently used ones are evicted beyond
+QUIZ_CACHE_MAX_ENTRIES.
+
+`stream_quiz` streams the completion instead and hands out each question as
+soon as its JSON object is complete in the token stream.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+import openai
+
+from . import llm
+from .models import GeneratedQuiz
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever build_prompt changes so stale quizzes are not served
+PROMPT_VERSION = 1
+# Word overlap (Jaccard) above which two questions are considered duplicates
+DUPLICATE_QUESTION_SIMILARITY = 0.8
+
+
+def build_prompt(text, num_questions):
+    """Prompt asking for `num_questions` multiple choice questions as JSON."""
+    return f"""À partir du texte suivant, génère {num_questions} questions pédagogiques à choix multiples.
+
+Texte :
+\"\"\"{text}\"\"\"
+
+Pour chaque question, fournis :
+1. La question
+2. Quatre options de réponse (A, B, C, D)
+3. La bonne réponse (indiquer la lettre)
+4. Une brève explication
+
+Format de réponse en JSON :
+{{
+  "questions": [
+    {{
+      "question": "Texte de la question",
+      "options": {{
+        "A": "Option A",
+        "B": "Option B",
+        "C": "Option C",
+        "D": "Option D"
+      }},
+      "correct_answer": "A",
+      "explanation": "Explication de la bonne réponse"
+    }}
+  ]
+}}"""
+
+
+def _messages(text, num_questions):
+    return [
+        {"role": "system", "content": "Tu es un assistant pédagogique qui génère des questions de quiz de haute qualité."},
+        {"role": "user", "content": build_prompt(text, num_questions)}
+    ]
+
+
+def generate_quiz(text, num_questions):
+    """
+    Call OpenAI and return `(generated_text, total_tokens)`.
+
+    OpenAI and LLMUnavailable exceptions are left to the caller.
+    """
+    completion = llm.chat(
+        _messages(text, num_questions),
+        purpose='quiz',
+        temperature=0.7,
+        max_tokens=2000
+    )
+    return completion.text, completion.total_tokens
+
+
+def normalize_text(text):
+    """Unicode and whitespace normalization, so trivial reformatting shares a cache entry."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def cache_key(text, num_questions):
+    """Cache key of a generation request for the current model and prompt."""
+    text_hash = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+    return hashlib.sha256(
+        f'{text_hash}:{num_questions}:{llm.model_id()}:{PROMPT_VERSION}'.encode('utf-8')
+    ).hexdigest()
+
+
+def _cached_quiz(key):
+    """Return the cached result for `key` and count the hit, or None."""
+    now = timezone.now()
+    entry = GeneratedQuiz.objects.filter(cache_key=key, expires_at__gt=now).first()
+    if entry is None:
+        return None
+    GeneratedQuiz.objects.filter(pk=entry.pk).update(
+        hits=F('hits') + 1,
+        tokens_saved=F('tokens_saved') + entry.total_tokens,
+        last_used_at=now
+    )
+    return {
+        'quiz': entry.quiz,
+        'cache': 'hit',
+        'tokens_used': 0,
+        'tokens_saved': entry.total_tokens,
+    }
+
+
+def _store_quiz(key, num_questions, generated_text, total_tokens, force_refresh):
+    """
+    Parse a generated answer and cache it when it is valid JSON.
+
+    Returns the same result dict as `generate_quiz_cached`.
+    """
+    result = {
+        'cache': 'refresh' if force_refresh else 'miss',
+        'tokens_used': total_tokens,
+        'tokens_saved': 0,
+    }
+    try:
+        quiz = json.loads(generated_text)
+    except json.JSONDecodeError:
+        result['quiz_text'] = generated_text
+        return result
+    
+    result['quiz'] = quiz
+    now = timezone.now()
+    fields = {
+        'num_questions': num_questions,
+        'model': llm.model_id(),
+        'prompt_version': PROMPT_VERSION,
+        'quiz': quiz,
+        'total_tokens': total_tokens,
+        'expires_at': now + timedelta(seconds=settings.QUIZ_CACHE_TTL),
+        'last_used_at': now,
+    }
+    try:
+        with transaction.atomic():
+            GeneratedQuiz.objects.update_or_create(cache_key=key, defaults=fields)
+    except IntegrityError:
+        # Another request stored the same quiz concurrently
+        pass
+    evict_quiz_cache()
+    return result
+
+
+def generate_quiz_cached(text, num_questions, force_refresh=False):
+    """
+    Return a generated quiz, from the cache when possible.
+
+    The result is a dict with either `quiz` (parsed JSON) or `quiz_text` (the
+    raw answer when it is not valid JSON, never cached), plus `cache` ('hit',
+    'miss' or 'refresh'), `tokens_used` and `tokens_saved`.
+    """
+    key = cache_key(text, num_questions)
+    if not force_refresh:
+        cached = _cached_quiz(key)
+        if cached is not None:
+            return cached
+    generated_text, total_tokens = generate_quiz(text, num_questions)
+    return _store_quiz(key, num_questions, generated_text, total_tokens, force_refresh)
+
+
+def evict_quiz_cache(max_entries=None):
+    """Delete expired entries, then the least recently used beyond `max_entries`."""
+    if max_entries is None:
+        max_entries = settings.QUIZ_CACHE_MAX_ENTRIES
+    deleted = GeneratedQuiz.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+    stale = list(
+        GeneratedQuiz.objects.order_by('-last_used_at', '-id')
+        .values_list('pk', flat=True)[max_entries:]
+    )
+    if stale:
+        deleted += GeneratedQuiz.objects.filter(pk__in=stale).delete()[0]
+    return deleted
+
+
+_generation_slots = None
+_generation_slots_lock = threading.Lock()
+
+
+def _generate_limited(text, num_questions):
+    """`generate_quiz` under the process-wide QUIZ_GENERATION_CONCURRENCY limit."""
+    global _generation_slots
+    with _generation_slots_lock:
+        if _generation_slots is None:
+            _generation_slots = threading.BoundedSemaphore(settings.QUIZ_GENERATION_CONCURRENCY)
+    with _generation_slots:
+        return generate_quiz(text, num_questions)
+
+
+def split_sections(text, section_length):
+    """
+    Split `text` into sections of at most `section_length` characters.
+
+    Sections are cut between paragraphs; a paragraph longer than a section
+    is cut at the last space that fits.
+    """
+    units = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        while len(paragraph) > section_length:
+            cut = paragraph.rfind(' ', 0, section_length + 1)
+            if cut <= 0:
+                cut = section_length
+            units.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if paragraph:
+            units.append(paragraph)
+    
+    sections = []
+    current = ''
+    for unit in units:
+        if current and len(current) + 2 + len(unit) > section_length:
+            sections.append(current)
+            current = unit
+        else:
+            current = f'{current}\n\n{unit}' if current else unit
+    if current:
+        sections.append(current)
+    return sections
+
+
+def select_sections(sections, max_sections):
+    """Keep at most `max_sections` sections, evenly spread over the document."""
+    if len(sections) <= max_sections:
+        return sections
+    if max_sections == 1:
+        return sections[:1]
+    step = (len(sections) - 1) / (max_sections - 1)
+    return [sections[round(i * step)] for i in range(max_sections)]
+
+
+def _question_words(question):
+    return frozenset(re.findall(r'\w+', str(question.get('question', '')).casefold()))
+
+
+def _in_turns(question_lists):
+    """Yield the i-th question of every section, for increasing i."""
+    for index in range(max((len(questions) for questions in question_lists), default=0)):
+        yield [questions[index] for questions in question_lists if index < len(questions)]
+
+
+def merge_questions(question_lists, num_questions):
+    """
+    Merge per-section questions into at most `num_questions`, dropping near
+    duplicates. Sections are taken in turn so every part of the document is
+    represented.
+    """
+    merged = []
+    seen = []
+    for round_questions in _in_turns(question_lists):
+        for question in round_questions:
+            if not isinstance(question, dict) or not question.get('question'):
+                continue
+            words = _question_words(question)
+            if any(
+                len(words & other) / max(len(words | other), 1) >= DUPLICATE_QUESTION_SIMILARITY
+                for other in seen
+            ):
+                continue
+            merged.append(question)
+            seen.append(words)
+            if len(merged) == num_questions:
+                return merged
+    return merged
+
+
+def generate_long_quiz(text, num_questions, force_refresh=False):
+    """
+    Generate a quiz covering the whole of a long text.
+
+    Each section is generated (or read from the cache) for a share of the
+    questions plus one spare, the missing ones concurrently; the results are
+    merged by `merge_questions`. Returns the same dict as
+    `generate_quiz_cached` with an extra `sections` count.
+    """
+    sections = select_sections(
+        split_sections(text, settings.MAX_TEXT_LENGTH_FOR_QUIZ), settings.QUIZ_MAX_SECTIONS
+    )
+    if len(sections) <= 1:
+        result = generate_quiz_cached(sections[0] if sections else text, num_questions, force_refresh)
+        result['sections'] = 1
+        return result
+    
+    per_section = min(num_questions, math.ceil(num_questions / len(sections)) + 1)
+    keys = [cache_key(section, per_section) for section in sections]
+    results = [None if force_refresh else _cached_quiz(key) for key in keys]
+    missing = [index for index, result in enumerate(results) if result is None]
+    
+    if missing:
+        workers = min(len(missing), settings.QUIZ_GENERATION_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                index: executor.submit(_generate_limited, sections[index], per_section)
+                for index in missing
+            }
+        for index, future in futures.items():
+            try:
+                generated_text, total_tokens = future.result()
+            except (openai.AuthenticationError, openai.RateLimitError, llm.LLMUnavailable):
+                raise
+            except Exception:
+                # One failed section should not sink the whole quiz
+                logger.warning("Génération de la section %s échouée", index, exc_info=True)
+                continue
+            results[index] = _store_quiz(
+                keys[index], per_section, generated_text, total_tokens, force_refresh
+            )
+    
+    done = [result for result in results if result is not None]
+    question_lists = [
+        result['quiz'].get('questions', [])
+        for result in done
+        if isinstance(result.get('quiz'), dict)
+    ]
+    questions = merge_questions(question_lists, num_questions)
+    if not questions:
+        raise ValueError('Aucune question n\'a pu être générée')
+    
+    if not missing:
+        cache = 'hit'
+    else:
+        cache = 'refresh' if force_refresh else 'miss'
+    return {
+        'quiz': {'questions': questions},
+        'cache': cache,
+        'tokens_used': sum(result['tokens_used'] for result in done),
+        'tokens_saved': sum(result['tokens_saved'] for result in done),
+        'sections': len(sections),
+    }
+
+
+class QuestionStreamParser:
+    """
+    Incremental parser for a `{"questions": [...]}` answer.
+
+    `feed()` takes the next piece of generated text and returns the question
+    objects completed by it. Braces are counted outside of JSON strings, so
+    each question is decoded once, as soon as its closing brace arrives.
+    """
+    
+    START = re.compile(r'"questions"\s*:\s*\[')
+    
+    def __init__(self):
+        self.buffer = ''
+        self.position = None  # Next character to scan, once inside the array
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+        self.finished = False
+    
+    def feed(self, text):
+        self.buffer += text
+        if self.position is None:
+            match = self.START.search(self.buffer)
+            if match is None:
+                return []
+            self.position = match.end()
+        
+        questions = []
+        while self.position < len(self.buffer) and not self.finished:
+            char = self.buffer[self.position]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                if self.depth == 0:
+                    self.object_start = self.position
+                self.depth += 1
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    question = self._decode(self.buffer[self.object_start:self.position + 1])
+                    if question is not None:
+                        questions.append(question)
+            elif char == ']' and self.depth == 0:
+                self.finished = True
+            self.position += 1
+        return questions
+    
+    @staticmethod
+    def _decode(chunk):
+        try:
+            question = json.loads(chunk)
+        except json.JSONDecodeError:
+            return None
+        return question if isinstance(question, dict) else None
+
+
+def stream_quiz(text, num_questions, force_refresh=False):
+    """
+    Generate a quiz like `generate_quiz_cached`, one question at a time.
+
+    Yields `('question', question)` for each question as soon as it has been
+    parsed from the token stream, then `('done', result)` where `result` is
+    the `generate_quiz_cached` dict without `quiz`. A cached quiz is yielded
+    at once. OpenAI and LLMUnavailable exceptions are left to the caller.
+    """
+    key = cache_key(text, num_questions)
+    cached = None if force_refresh else _cached_quiz(key)
+    if cached is not None:
+        quiz = cached.pop('quiz')
+        questions = quiz.get('questions', []) if isinstance(quiz, dict) else []
+        for question in questions:
+            yield 'question', question
+        yield 'done', cached
+        return
+    
+    stream = llm.ChatStream(
+        _messages(text, num_questions),
+        purpose='quiz',
+        temperature=0.7,
+        max_tokens=2000
+    )
+    parser = QuestionStreamParser()
+    pieces = []
+    try:
+        for piece in stream:
+            pieces.append(piece)
+            for question in parser.feed(piece):
+                yield 'question', question
+    finally:
+        # Stops the completion when the client goes away mid-stream
+        stream.close()
+    
+    result = _store_quiz(key, num_questions, ''.join(pieces), stream.total_tokens, force_refresh)
+    result.pop('quiz', None)
+    yield 'done', result
@@ -0,0 +1,236 @@
+"""
+Item analysis of the questions of regular quizzes.
+
+A learner submits all their answers to a quiz at once (`record_attempt`):
+the answers are graded against the stored questions, saved as QuizAnswer
+rows with the resulting Progress entry, and added to the QuizItemStats row
+of each question in the same transaction. The statistics are therefore
+always current and served as stored; `rebuild_item_stats` recomputes them
+from the answers after deletions.
+
+Each row is tied to a hash of its question: editing a question restarts
+its statistics, answers to the previous version no longer count.
+"""
+import hashlib
+import json
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Progress, QuizAnswer, QuizItemStats
+
+# Points per correct answer in the Progress entry of a submission
+POINTS_PER_QUESTION = 10
+
+# Flags of the item analysis, only raised from MIN_RESPONSES answers on
+MIN_RESPONSES = 5
+HARD_DIFFICULTY = 0.3  # Fewer correct answers than this share: too hard
+EASY_DIFFICULTY = 0.9  # More correct answers than this share: too easy
+LOW_DISCRIMINATION = 0.2  # Below this, the question does not tell learners apart
+UNUSED_DISTRACTOR_SHARE = 0.05  # Wrong options chosen less often than this are not distractors
+
+
+class InvalidAnswers(ValueError):
+    """The submitted answers do not match the questions of the quiz."""
+
+
+def quiz_questions(quiz):
+    """The questions of a quiz, as stored in its `questions` JSON."""
+    if isinstance(quiz.questions, dict) and isinstance(quiz.questions.get('questions'), list):
+        return quiz.questions['questions']
+    return []
+
+
+def item_hash(question):
+    """Hash of everything that defines a question: text, options and correct answer."""
+    content = {
+        'question': question.get('question'),
+        'options': question.get('options'),
+        'correct_answer': question.get('correct_answer'),
+    }
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+
+def grade_answers(questions, answers):
+    """
+    Validate `answers` (a list of `{'question_index', 'answer'}`) and return
+    `(question_index, answer, is_correct)` tuples in question order.
+    """
+    if not isinstance(answers, list) or not answers:
+        raise InvalidAnswers('Une liste non vide de réponses est requise')
+    graded = {}
+    for item in answers:
+        if not isinstance(item, dict):
+            raise InvalidAnswers('Chaque réponse doit contenir question_index et answer')
+        index = item.get('question_index')
+        answer = item.get('answer')
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(questions):
+            raise InvalidAnswers(f'Question inexistante: {index}')
+        if index in graded:
+            raise InvalidAnswers(f'Question {index} répondue plusieurs fois')
+        if not isinstance(answer, str) or not answer.strip():
+            raise InvalidAnswers(f'Réponse manquante pour la question {index}')
+        answer = answer.strip()
+        options = questions[index].get('options')
+        if isinstance(options, dict) and answer not in options:
+            raise InvalidAnswers(f'Option inconnue pour la question {index}: {answer}')
+        correct_answer = str(questions[index].get('correct_answer', '')).strip()
+        graded[index] = (index, answer, answer == correct_answer)
+    return [graded[index] for index in sorted(graded)]
+
+
+def update_item_stats(quiz, questions, graded):
+    """Add one graded attempt to the item statistics of its questions."""
+    total = sum(1 for _, _, is_correct in graded if is_correct)
+    hashes = {index: item_hash(questions[index]) for index, _, _ in graded}
+    QuizItemStats.objects.bulk_create(
+        [
+            QuizItemStats(quiz=quiz, question_index=index, question_hash=hashes[index])
+            for index, _, _ in graded
+        ],
+        ignore_conflicts=True
+    )
+    # Locked in index order, so concurrent submissions cannot deadlock
+    rows = {
+        row.question_index: row
+        for row in QuizItemStats.objects.select_for_update()
+        .filter(quiz=quiz, question_index__in=hashes)
+        .order_by('question_index')
+    }
+    now = timezone.now()
+    for index, answer, is_correct in graded:
+        row = rows[index]
+        if row.question_hash != hashes[index]:
+            row.reset(hashes[index])
+        row.add_answer(answer, is_correct, total - int(is_correct))
+        # auto_now is not applied by bulk_update
+        row.updated_at = now
+    QuizItemStats.objects.bulk_update(
+        rows.values(),
+        QuizItemStats.COUNTER_FIELDS + ('question_hash', 'difficulty', 'discrimination', 'updated_at')
+    )
+
+
+def record_attempt(quiz, learner, answers):
+    """
+    Grade and save a learner's answers to a quiz, with its completed
+    Progress entry, and update the item statistics. Returns the Progress.
+    Raises InvalidAnswers before writing anything.
+    """
+    questions = quiz_questions(quiz)
+    graded = grade_answers(questions, answers)
+    correct = sum(1 for _, _, is_correct in graded if is_correct)
+    
+    with transaction.atomic():
+        progress = Progress.objects.create(
+            user=learner,
+            quiz=quiz,
+            quiz_title=quiz.title,
+            quiz_subject=quiz.subject,
+            score=correct * POINTS_PER_QUESTION,
+            max_score=len(questions) * POINTS_PER_QUESTION,
+            completed=True,
+            completed_at=timezone.now()
+        )
+        QuizAnswer.objects.bulk_create([
+            QuizAnswer(
+                progress=progress,
+                quiz=quiz,
+                learner=learner,
+                question_index=index,
+                question_hash=item_hash(questions[index]),
+                answer=answer,
+                is_correct=is_correct
+            )
+            for index, answer, is_correct in graded
+        ])
+        update_item_stats(quiz, questions, graded)
+    return progress
+
+
+def rebuild_item_stats(quiz):
+    """Recompute the item statistics of a quiz from its recorded answers."""
+    questions = quiz_questions(quiz)
+    hashes = [item_hash(question) for question in questions]
+    rows = {
+        index: QuizItemStats(quiz=quiz, question_index=index, question_hash=question_hash)
+        for index, question_hash in enumerate(hashes)
+    }
+    
+    # Answers to the current version of each question, grouped by attempt;
+    # rest scores count every answer of the attempt, like at submission
+    attempts = {}
+    totals = {}
+    answers = QuizAnswer.objects.filter(quiz=quiz).order_by('progress_id', 'question_index')
+    for progress_id, index, question_hash, answer, is_correct in answers.values_list(
+        'progress_id', 'question_index', 'question_hash', 'answer', 'is_correct'
+    ).iterator():
+        totals[progress_id] = totals.get(progress_id, 0) + int(is_correct)
+        if index < len(hashes) and question_hash == hashes[index]:
+            attempts.setdefault(progress_id, []).append((index, answer, is_correct))
+    for progress_id, graded in attempts.items():
+        total = totals.get(progress_id, 0)
+        for index, answer, is_correct in graded:
+            rows[index].add_answer(answer, is_correct, total - int(is_correct))
+    
+    with transaction.atomic():
+        QuizItemStats.objects.filter(quiz=quiz).delete()
+        QuizItemStats.objects.bulk_create(
+            [row for row in rows.values() if row.responses], batch_size=500
+        )
+    return len(attempts)
+
+
+def item_report(quiz):
+    """
+    Statistics of every question of a quiz, from the stored rows, with
+    option shares and the flags of the item analysis.
+    """
+    questions = quiz_questions(quiz)
+    stored = {row.question_index: row for row in quiz.item_stats.all()}
+    report = []
+    for index, question in enumerate(questions):
+        row = stored.get(index)
+        if row is None or row.question_hash != item_hash(question):
+            row = QuizItemStats(quiz=quiz, question_index=index)
+        correct_answer = str(question.get('correct_answer', '')).strip()
+        options = question.get('options')
+        keys = list(options) if isinstance(options, dict) else []
+        keys += [key for key in row.option_counts if key not in keys]
+        option_stats = {
+            key: {
+                'count': row.option_counts.get(key, 0),
+                'share': round(row.option_counts.get(key, 0) / row.responses, 4) if row.responses else 0,
+                'correct': key == correct_answer,
+            }
+            for key in keys
+        }
+        
+        flags = []
+        if row.responses >= MIN_RESPONSES:
+            if row.difficulty < HARD_DIFFICULTY:
+                flags.append('trop_difficile')
+            elif row.difficulty > EASY_DIFFICULTY:
+                flags.append('trop_facile')
+            if row.discrimination is not None and row.discrimination < LOW_DISCRIMINATION:
+                flags.append('peu_discriminante')
+            if any(
+                not data['correct'] and data['share'] < UNUSED_DISTRACTOR_SHARE
+                for data in option_stats.values()
+            ):
+                flags.append('distracteur_inutile')
+        
+        report.append({
+            'question_index': index,
+            'question': question.get('question', ''),
+            'responses': row.responses,
+            'difficulty': round(row.difficulty, 4) if row.difficulty is not None else None,
+            'discrimination': (
+                round(row.discrimination, 4) if row.discrimination is not None else None
+            ),
+            'options': option_stats,
+            'flags': flags,
+        })
+    return report
@@ -0,0 +1,157 @@
+"""
+Database-backed job queue.
+
+Jobs are rows of the Job model. Workers (``manage.py run_jobs``) claim them
+with a conditional UPDATE, so several workers can poll the same table
+without a broker or row locks. While a job runs, its worker updates
+``heartbeat_at`` every JOB_HEARTBEAT_INTERVAL seconds; only jobs without a
+heartbeat for JOB_LOCK_TIMEOUT seconds are taken over by another worker.
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job kind -> dotted path of the handler, called with the job payload
+JOB_HANDLERS = {
+    'analyze_session': 'pedagogical.analysis.run_session_analysis_job',
+}
+
+
+def enqueue(kind, payload, user=None):
+    """Add a job to the queue and return it."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Type de tâche inconnu: {kind}")
+    return Job.objects.create(
+        kind=kind,
+        payload=payload,
+        created_by=user,
+        max_attempts=settings.JOB_MAX_ATTEMPTS
+    )
+
+
+def default_worker_name():
+    """Identify this worker process in claimed jobs."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next_job(worker):
+    """
+    Atomically claim the next runnable job, or return None.
+    
+    Running jobs whose worker stopped sending heartbeats for longer than
+    JOB_LOCK_TIMEOUT seconds are considered abandoned and reclaimed. The
+    claim counts as an attempt, so a job that keeps killing its worker
+    fails once it reaches max_attempts instead of being reclaimed forever.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    abandoned = Q(status='running', heartbeat_at__lt=stale)
+    Job.objects.filter(abandoned, attempts__gte=F('max_attempts')).update(
+        status='failed',
+        error='Worker arrêté pendant l\'exécution de la tâche',
+        finished_at=now
+    )
+    runnable = Job.objects.filter(
+        Q(status='pending', run_after__lte=now)
+        | (abandoned & Q(attempts__lt=F('max_attempts')))
+    ).order_by('run_after', 'id')
+    
+    for job_id in runnable.values_list('id', flat=True)[:10]:
+        claimed = runnable.filter(id=job_id).update(
+            status='running', worker=worker, started_at=now, heartbeat_at=now,
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def touch_job(job_id, worker):
+    """Record a heartbeat of a running job; False if another worker took it over."""
+    return bool(
+        Job.objects.filter(pk=job_id, worker=worker, status='running')
+        .update(heartbeat_at=timezone.now())
+    )
+
+
+def _send_heartbeats(job_id, worker, stop):
+    """Heartbeat loop run in a thread beside the job handler."""
+    try:
+        while not stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+            if not touch_job(job_id, worker):
+                logger.warning("Job %s repris par un autre worker, arrêt des heartbeats", job_id)
+                break
+    finally:
+        # The thread's own database connection
+        connections.close_all()
+
+
+def run_job(job):
+    """
+    Run a claimed job and record its outcome, scheduling a retry on failure.
+    
+    The outcome is only written while this worker still owns the job; if it
+    was reclaimed meanwhile, the result is dropped and None is returned.
+    """
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=_send_heartbeats, args=(job.id, job.worker, stop), daemon=True
+    )
+    heartbeat.start()
+    try:
+        handler = import_string(JOB_HANDLERS[job.kind])
+        job.result = handler(job.payload)
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job.id, job.kind)
+        job.error = f"{type(e).__name__}: {e}"
+        if job.attempts < job.max_attempts:
+            # Exponential backoff before the next attempt
+            job.status = 'pending'
+            job.run_after = timezone.now() + timedelta(
+                seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        else:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+    else:
+        job.status = 'succeeded'
+        job.error = ''
+        job.finished_at = timezone.now()
+    finally:
+        stop.set()
+        heartbeat.join()
+    
+    # attempts was already counted by the claim
+    recorded = Job.objects.filter(pk=job.id, worker=job.worker, status='running').update(
+        result=job.result, error=job.error, status=job.status,
+        run_after=job.run_after, finished_at=job.finished_at
+    )
+    if not recorded:
+        logger.warning("Job %s repris par un autre worker, résultat ignoré", job.id)
+        return None
+    return job
+
+
+def run_pending_jobs(worker=None, limit=None):
+    """Process runnable jobs until the queue is empty or ``limit`` is reached."""
+    worker = worker or default_worker_name()
+    processed = 0
+    while limit is None or processed < limit:
+        job = claim_next_job(worker)
+        if job is None:
+            break
+        run_job(job)
+        processed += 1
+    return processed
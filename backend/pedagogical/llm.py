@@ -0,0 +1,365 @@
+"""
+Process-wide entry point for LLM calls.
+
+Every call goes through `chat()` or `ChatStream`, so all of them share the
+backend selected by LLM_BACKEND (see pedagogical/llm_backends.py) and the
+same policies: at most LLM_MAX_CONCURRENCY calls in flight, a per-call
+timeout, jittered exponential retries on 429, 5xx and connection errors, and
+a circuit breaker that fails fast while the API is down so callers switch to
+their rule-based fallbacks.
+
+Each call is recorded with its purpose, tokens and latency: `recent_calls()`
+and `call_stats()` expose them to benchmarks and tests, and every call is
+logged on the `pedagogical.llm` logger.
+
+`pedagogical.fake_llm.FakeLLMServer` serves the OpenAI HTTP API locally, and
+`LocalBackend` answers in-process, so all of this can run offline.
+"""
+from collections import deque
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+import openai
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: the request may succeed a little later
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,  # Includes APITimeoutError
+)
+
+
+class LLMUnavailable(Exception):
+    """Raised without calling the API: circuit open or too many calls in flight."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failed calls, then rejects calls until
+    `reset_timeout` seconds have passed. A single trial call is then let
+    through: it closes the circuit on success and reopens it on failure.
+    """
+
+    def __init__(self, threshold, reset_timeout, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """Whether a call may be attempted now."""
+        with self.lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self.trial_running = False
+
+
+_lock = threading.Lock()
+_backend = None
+_backend_config = None
+_breaker = None
+_slots = None
+
+
+def _config():
+    return (
+        settings.LLM_BACKEND,
+        settings.OPENAI_API_KEY,
+        settings.LLM_BASE_URL,
+        settings.LLM_TIMEOUT,
+        settings.LLM_MAX_CONCURRENCY,
+        settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+        settings.LLM_CIRCUIT_RESET_TIMEOUT,
+        settings.LLM_LOCAL_LATENCY,
+        settings.LLM_LOCAL_TOKEN_LATENCY,
+        settings.LLM_LOCAL_FIXTURES,
+    )
+
+
+def _state():
+    """Return the shared (backend, breaker, slots), rebuilt if the settings changed."""
+    global _backend, _backend_config, _breaker, _slots
+    config = _config()
+    with _lock:
+        if _backend is None or _backend_config != config:
+            if _backend is not None:
+                _backend.close()
+            _backend = import_string(settings.LLM_BACKEND)()
+            _backend_config = config
+            _breaker = CircuitBreaker(
+                settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_TIMEOUT
+            )
+            _slots = threading.BoundedSemaphore(settings.LLM_MAX_CONCURRENCY)
+        return _backend, _breaker, _slots
+
+
+def reset():
+    """Close the shared backend and forget the circuit state."""
+    global _backend, _backend_config
+    with _lock:
+        if _backend is not None:
+            _backend.close()
+        _backend = None
+        _backend_config = None
+
+
+def circuit_state():
+    """State of the circuit breaker: 'closed', 'open' or 'half-open'."""
+    return _state()[1].state
+
+
+def is_configured():
+    """Whether the selected backend can be called (e.g. the OpenAI key is set)."""
+    return _state()[0].configured
+
+
+def model_id():
+    """Backend and model answering calls, e.g. 'openai:gpt-3.5-turbo', for cache keys."""
+    return f'{_state()[0].name}:{settings.LLM_MODEL}'
+
+
+_calls = deque()
+_calls_lock = threading.Lock()
+
+
+def _record(backend, purpose, started, completion=None, error=None, first_token_at=None):
+    """Record one call in the recent calls log and on the logger."""
+    latency_ms = (time.monotonic() - started) * 1000
+    call = {
+        'backend': backend.name,
+        'model': settings.LLM_MODEL,
+        'purpose': purpose,
+        'prompt_tokens': completion.prompt_tokens if completion else 0,
+        'completion_tokens': completion.completion_tokens if completion else 0,
+        'total_tokens': completion.total_tokens if completion else 0,
+        'latency_ms': round(latency_ms, 1),
+        'first_token_ms': (
+            round((first_token_at - started) * 1000, 1) if first_token_at is not None else None
+        ),
+        'error': type(error).__name__ if error is not None else None,
+    }
+    with _calls_lock:
+        _calls.append(call)
+        while len(_calls) > settings.LLM_CALL_LOG_SIZE:
+            _calls.popleft()
+    if error is None:
+        logger.info(
+            "Appel LLM %s (%s) : %s tokens en %.0f ms",
+            purpose, backend.name, call['total_tokens'], latency_ms
+        )
+    else:
+        logger.info("Appel LLM %s (%s) échoué en %.0f ms : %s", purpose, backend.name, latency_ms, call['error'])
+
+
+def recent_calls():
+    """The last LLM_CALL_LOG_SIZE calls of this process, oldest first."""
+    with _calls_lock:
+        return list(_calls)
+
+
+def clear_calls():
+    with _calls_lock:
+        _calls.clear()
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def call_stats():
+    """Calls, errors, tokens and latency percentiles (ms) of the recent calls, per purpose."""
+    by_purpose = {}
+    for call in recent_calls():
+        by_purpose.setdefault(call['purpose'], []).append(call)
+    stats = {}
+    for purpose, calls in by_purpose.items():
+        latencies = sorted(call['latency_ms'] for call in calls)
+        stats[purpose] = {
+            'calls': len(calls),
+            'errors': sum(1 for call in calls if call['error']),
+            'total_tokens': sum(call['total_tokens'] for call in calls),
+            'latency_p50_ms': _percentile(latencies, 0.5),
+            'latency_p95_ms': _percentile(latencies, 0.95),
+            'latency_max_ms': latencies[-1],
+        }
+    return stats
+
+
+def _retry_delay(error, attempt):
+    """Honour Retry-After when the API sends it, otherwise full-jitter backoff."""
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), settings.LLM_RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    ceiling = min(settings.LLM_RETRY_MAX_DELAY, settings.LLM_RETRY_BASE_DELAY * 2 ** attempt)
+    return random.uniform(0, ceiling)
+
+
+def _call(breaker, func, **kwargs):
+    """Call a backend method, retrying retryable errors; breaker bookkeeping included."""
+    attempt = 0
+    while True:
+        try:
+            result = func(**kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt >= settings.LLM_MAX_RETRIES:
+                breaker.record_failure()
+                raise
+            delay = _retry_delay(e, attempt)
+            logger.warning(
+                "Appel LLM échoué (%s), nouvel essai dans %.2f s", type(e).__name__, delay
+            )
+            time.sleep(delay)
+            attempt += 1
+        except openai.APIStatusError:
+            # The API answered (4xx): it is up, the request itself is wrong
+            breaker.record_success()
+            raise
+        except Exception:
+            # Anything else (invalid response, backend bug) still ends the
+            # call: a half-open trial must not stay running forever
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+
+def _acquire(breaker, slots):
+    """Take a concurrency slot and check the breaker; the caller releases the slot."""
+    if not slots.acquire(timeout=settings.LLM_TIMEOUT):
+        raise LLMUnavailable('Trop de requêtes IA en cours')
+    if not breaker.allow():
+        slots.release()
+        raise LLMUnavailable('Service IA temporairement indisponible')
+
+
+def _request(messages, purpose, temperature, max_tokens, timeout):
+    return {
+        'messages': messages,
+        'purpose': purpose,
+        'model': settings.LLM_MODEL,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'timeout': timeout or settings.LLM_TIMEOUT,
+    }
+
+
+def chat(messages, purpose='chat', temperature=0.7, max_tokens=None, timeout=None):
+    """
+    Run a chat completion and return its `Completion`.
+
+    Raises LLMUnavailable when the circuit is open or no slot frees up within
+    LLM_TIMEOUT, and the last backend error once retries are exhausted.
+    """
+    backend, breaker, slots = _state()
+    started = time.monotonic()
+    try:
+        _acquire(breaker, slots)
+        try:
+            completion = _call(
+                breaker, backend.complete,
+                **_request(messages, purpose, temperature, max_tokens, timeout)
+            )
+        finally:
+            slots.release()
+    except Exception as e:
+        _record(backend, purpose, started, error=e)
+        raise
+    _record(backend, purpose, started, completion)
+    return completion
+
+
+def chat_text(messages, **kwargs):
+    """`chat()` returning only the text."""
+    return chat(messages, **kwargs).text
+
+
+class ChatStream:
+    """
+    Iterator over the text deltas of a streamed chat completion.
+
+    Only opening the stream is retried: once tokens flow, an error is raised
+    to the caller. `total_tokens` is set when the stream ends. Closing the
+    iterator early releases the connection.
+    """
+    
+    def __init__(self, messages, purpose='chat', temperature=0.7, max_tokens=None, timeout=None):
+        self.purpose = purpose
+        self.request = _request(messages, purpose, temperature, max_tokens, timeout)
+        self.total_tokens = 0
+        self._deltas = self._iter_deltas()
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        return next(self._deltas)
+    
+    def close(self):
+        self._deltas.close()
+    
+    def _iter_deltas(self):
+        backend, breaker, slots = _state()
+        started = time.monotonic()
+        first_token_at = None
+        completion = None
+        try:
+            _acquire(breaker, slots)
+            try:
+                deltas, completion = _call(breaker, backend.stream, **self.request)
+                try:
+                    for delta in deltas:
+                        if first_token_at is None:
+                            first_token_at = time.monotonic()
+                        yield delta
+                except RETRYABLE_ERRORS:
+                    breaker.record_failure()
+                    raise
+                finally:
+                    deltas.close()
+            finally:
+                slots.release()
+        except BaseException as e:
+            # Includes GeneratorExit: a stream closed early is recorded too
+            _record(backend, self.purpose, started, completion, e, first_token_at)
+            raise
+        self.total_tokens = completion.total_tokens
+        _record(backend, self.purpose, started, completion, first_token_at=first_token_at)
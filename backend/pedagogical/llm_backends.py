@@ -0,0 +1,250 @@
+"""
+LLM backends behind pedagogical/llm.py, selected by the LLM_BACKEND setting.
+
+A backend turns chat messages into a `Completion`, at once (`complete`) or
+piece by piece (`stream`). Concurrency limits, retries, the circuit breaker
+and call recording stay in llm.py, so they apply to every backend.
+
+- `OpenAIBackend` calls the OpenAI API (or any server speaking it, see
+  LLM_BASE_URL).
+- `LocalBackend` answers in-process, deterministically, after a configurable
+  latency: load tests, benchmarks and CI run the full pipelines offline.
+"""
+import json
+import re
+import time
+
+from django.conf import settings
+import httpx
+import openai
+
+
+class Completion:
+    """Text and token usage of a chat completion."""
+
+    def __init__(self, text='', prompt_tokens=0, completion_tokens=0):
+        self.text = text
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+
+class LLMBackend:
+    """
+    Interface of the LLM backends.
+
+    `purpose` names the caller ('quiz', 'feedback', 'feedback_batch',
+    'analysis', ...); backends may use it to shape their answer.
+    """
+    name = None
+    # Whether calls can be made at all (e.g. an API key is set)
+    configured = True
+
+    def complete(self, messages, purpose, model, temperature, max_tokens, timeout):
+        """Return the `Completion` of `messages`."""
+        raise NotImplementedError
+
+    def stream(self, messages, purpose, model, temperature, max_tokens, timeout):
+        """
+        Open a streamed completion and return `(deltas, completion)`.
+
+        Errors opening the stream are raised here, so they can be retried;
+        `deltas` yields the text pieces and fills `completion` once exhausted.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release connections when the backend is replaced."""
+
+
+class OpenAIBackend(LLMBackend):
+    """The OpenAI chat completions API, over a pooled keep-alive HTTP client."""
+    name = 'openai'
+
+    def __init__(self):
+        self.configured = bool(settings.OPENAI_API_KEY)
+        self.client = None
+        if self.configured:
+            self.client = openai.OpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                base_url=settings.LLM_BASE_URL or None,
+                timeout=settings.LLM_TIMEOUT,
+                # Retries are handled by llm.py so they are jittered and counted
+                max_retries=0,
+                http_client=openai.DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=settings.LLM_MAX_CONCURRENCY,
+                        max_keepalive_connections=settings.LLM_MAX_CONCURRENCY
+                    )
+                )
+            )
+
+    def _create(self, messages, model, temperature, max_tokens, timeout, **kwargs):
+        if self.client is None:
+            raise openai.OpenAIError('Clé API OpenAI non configurée')
+        return self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=openai.NOT_GIVEN if max_tokens is None else max_tokens,
+            timeout=timeout,
+            **kwargs
+        )
+
+    def complete(self, messages, purpose, model, temperature, max_tokens, timeout):
+        response = self._create(messages, model, temperature, max_tokens, timeout)
+        usage = response.usage
+        return Completion(
+            response.choices[0].message.content or '',
+            getattr(usage, 'prompt_tokens', 0) or 0,
+            getattr(usage, 'completion_tokens', 0) or 0
+        )
+
+    def stream(self, messages, purpose, model, temperature, max_tokens, timeout):
+        raw = self._create(
+            messages, model, temperature, max_tokens, timeout,
+            stream=True, stream_options={'include_usage': True}
+        )
+        completion = Completion()
+        return self._deltas(raw, completion), completion
+
+    @staticmethod
+    def _deltas(raw, completion):
+        pieces = []
+        try:
+            for chunk in raw:
+                if chunk.usage is not None:
+                    completion.prompt_tokens = chunk.usage.prompt_tokens
+                    completion.completion_tokens = chunk.usage.completion_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    pieces.append(chunk.choices[0].delta.content)
+                    yield pieces[-1]
+        finally:
+            # Stops the completion when the caller goes away mid-stream
+            raw.close()
+            completion.text = ''.join(pieces)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+
+
+def _words(text):
+    return len(text.split())
+
+
+class LocalBackend(LLMBackend):
+    """
+    Deterministic in-process stand-in for the OpenAI API.
+
+    The answer to a call is the LLM_LOCAL_FIXTURES entry for its purpose (a
+    JSON file mapping purposes to answers; non-string answers are sent as
+    JSON), or else built from the prompt by the matching `answer_*` method,
+    so every pipeline gets a well-formed answer. A call takes
+    LLM_LOCAL_LATENCY seconds, plus LLM_LOCAL_TOKEN_LATENCY per generated
+    token (one token per word); streams yield word by word. Tokens are
+    counted as words.
+    """
+    name = 'local'
+
+    def __init__(self):
+        self.latency = settings.LLM_LOCAL_LATENCY
+        self.token_latency = settings.LLM_LOCAL_TOKEN_LATENCY
+        self.fixtures = {}
+        if settings.LLM_LOCAL_FIXTURES:
+            with open(settings.LLM_LOCAL_FIXTURES, encoding='utf-8') as f:
+                self.fixtures = json.load(f)
+
+    def answer(self, messages, purpose):
+        """Text answered to `messages`."""
+        if purpose in self.fixtures:
+            fixture = self.fixtures[purpose]
+            return fixture if isinstance(fixture, str) else json.dumps(fixture, ensure_ascii=False)
+        prompt = messages[-1]['content'] if messages else ''
+        responder = getattr(self, f'answer_{purpose}', None)
+        return responder(prompt) if responder is not None else 'Réponse locale.'
+
+    def _completion(self, messages, text):
+        prompt_tokens = sum(_words(str(message.get('content', ''))) for message in messages)
+        return Completion(text, prompt_tokens, _words(text))
+
+    def complete(self, messages, purpose, model, temperature, max_tokens, timeout):
+        completion = self._completion(messages, self.answer(messages, purpose))
+        time.sleep(self.latency + self.token_latency * completion.completion_tokens)
+        return completion
+
+    def stream(self, messages, purpose, model, temperature, max_tokens, timeout):
+        completion = self._completion(messages, self.answer(messages, purpose))
+        return self._deltas(completion), completion
+
+    def _deltas(self, completion):
+        time.sleep(self.latency)
+        for piece in re.findall(r'\s*\S+', completion.text):
+            time.sleep(self.token_latency)
+            yield piece
+
+    @staticmethod
+    def answer_quiz(prompt):
+        """Questions on the longest distinct words of the text, in order of appearance."""
+        match = re.search(r'génère (\d+) questions', prompt)
+        num_questions = int(match.group(1)) if match else 1
+        match = re.search(r'"""(.*?)"""', prompt, re.DOTALL)
+        text = match.group(1) if match else prompt
+        words = []
+        for word in re.findall(r'\w{5,}', text):
+            if word.casefold() not in (w.casefold() for w in words):
+                words.append(word)
+        words = words or ['texte']
+        questions = []
+        for index in range(num_questions):
+            word = words[index % len(words)]
+            questions.append({
+                'question': f'Question {index + 1} : que désigne « {word} » dans le texte ?',
+                'options': {
+                    'A': f'La notion « {word} » présentée dans le texte',
+                    'B': 'Une notion absente du texte',
+                    'C': 'Un exemple sans rapport',
+                    'D': 'Aucune de ces réponses',
+                },
+                'correct_answer': 'A',
+                'explanation': f'Le texte présente « {word} ».',
+            })
+        return json.dumps({'questions': questions}, ensure_ascii=False)
+
+    @staticmethod
+    def _feedback_text(correct):
+        if correct:
+            return "Bonne réponse ! Ton raisonnement est juste, continue ainsi."
+        return (
+            "Ce n'est pas la bonne réponse, mais ton essai montre que tu as cherché. "
+            "Relis la question et compare chaque proposition avec l'énoncé."
+        )
+
+    def answer_feedback(self, prompt):
+        return self._feedback_text('✓ Correct' in prompt)
+
+    def answer_feedback_batch(self, prompt):
+        parts = re.split(r'^Réponse (\d+) :$', prompt, flags=re.MULTILINE)
+        feedbacks = [
+            {'id': int(number), 'feedback': self._feedback_text('✓ Correct' in body)}
+            for number, body in zip(parts[1::2], parts[2::2])
+        ]
+        return json.dumps({'feedbacks': feedbacks}, ensure_ascii=False)
+
+    @staticmethod
+    def answer_analysis(prompt):
+        return json.dumps({
+            'strengths': ['comprehension', 'logique'],
+            'weaknesses': [],
+            'learning_style': 'équilibré',
+            'confidence_level': 'moyen',
+            'recommendations': [
+                'Varier les types d\'exercices',
+                'Proposer des questions de difficulté progressive',
+                'Faire verbaliser le raisonnement',
+            ],
+            'reasoning': 'Analyse produite par le backend local.',
+        }, ensure_ascii=False)
@@ -0,0 +1,121 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from pedagogical.models import (
+    User, File, Progress, LearnerProgressSummary, Quiz, QuizAssignment,
+    EvaluationSession, QuestionResponse
+)
+from pedagogical.views import QuizViewSet, QuestionResponseViewSet
+
+
+# Plan lines reporting a full table scan, per database vendor
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (?!CONSTANT ROW)(\S+)'),
+    'postgresql': re.compile(r'\bSeq Scan on (\S+)'),
+    'mysql': re.compile(r'\btype: ALL\b.*?\btable: (\S+)|\bTable scan on (\S+)'),
+}
+
+
+def sample_id(model):
+    """Return an existing primary key so plans use realistic parameters."""
+    return model.objects.order_by().values_list('pk', flat=True).first() or 0
+
+
+def hot_path_queries():
+    """Build the querysets issued by the hot API paths in views.py."""
+    learner_id = sample_id(User)
+    quiz_id = sample_id(Quiz)
+    session_id = sample_id(EvaluationSession)
+    responses = QuestionResponseViewSet()
+    
+    return [
+        (
+            'QuizViewSet.stats (assignments + latest progress)',
+            QuizViewSet()._annotate_learner_stats(
+                QuizAssignment.objects.filter(quiz_id=quiz_id), 0
+            ).order_by('-assigned_at', 'id'),
+        ),
+        (
+            'QuizViewSet.list (learner quizzes)',
+            Quiz.objects.filter(
+                id__in=QuizAssignment.objects.filter(learner_id=learner_id).values('quiz_id')
+            ),
+        ),
+        (
+            'ProgressViewSet.list (learner page)',
+            Progress.objects.filter(user_id=learner_id).order_by('-updated_at', '-id')[:50],
+        ),
+        (
+            'ProgressViewSet.stats (summary read)',
+            LearnerProgressSummary.objects.filter(pk=learner_id),
+        ),
+        (
+            'FileViewSet.list (formateur page)',
+            File.objects.filter(uploaded_by_id=learner_id).order_by('-uploaded_at', '-id')[:50],
+        ),
+        (
+            'EvaluationSessionViewSet.list (learner page)',
+            EvaluationSession.objects.filter(learner_id=learner_id).order_by('-started_at', '-id')[:50],
+        ),
+        (
+            'QuestionResponseViewSet.list (?session=)',
+            responses._apply_filters(
+                QuestionResponse.objects.all(), {'session': session_id}
+            ).order_by('created_at', 'id'),
+        ),
+        (
+            'QuestionResponseViewSet.list (?session=&competence_type=)',
+            responses._apply_filters(
+                QuestionResponse.objects.all(),
+                {'session': session_id, 'competence_type': 'calcul'}
+            ).order_by('created_at', 'id'),
+        ),
+        (
+            'QuestionResponseViewSet.list (?competence_type= page)',
+            responses._apply_filters(
+                QuestionResponse.objects.all(), {'competence_type': 'calcul'}
+            ).order_by('created_at', 'id')[:50],
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Exécute EXPLAIN sur les requêtes critiques et signale les parcours complets de table."
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fail-on-scan',
+            action='store_true',
+            help="Terminer en erreur si un parcours complet est détecté (CI)"
+        )
+        parser.add_argument(
+            '--show-plans',
+            action='store_true',
+            help="Afficher le plan d'exécution complet de chaque requête"
+        )
+    
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"Base de données non prise en charge: {connection.vendor}")
+        
+        flagged = []
+        for name, queryset in hot_path_queries():
+            plan = queryset.explain()
+            scanned = sorted({
+                next(group for group in match.groups() if group)
+                for match in pattern.finditer(plan)
+            })
+            if scanned:
+                flagged.append(name)
+                self.stdout.write(self.style.WARNING(
+                    f"SCAN  {name}: parcours complet de {', '.join(scanned)}"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK    {name}"))
+            if options['show_plans']:
+                self.stdout.write(plan)
+        
+        if flagged and options['fail_on_scan']:
+            raise CommandError(f"{len(flagged)} requête(s) avec parcours complet de table")
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from pedagogical.extraction import (
+    evict_extraction_cache, extraction_cache_stats, prune_documents, stored_documents
+)
+from pedagogical.models import ExtractedText
+
+
+class Command(BaseCommand):
+    help = (
+        "Affiche les statistiques du cache d'extraction de texte et des documents "
+        "conservés."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help="Vider le cache avant d'afficher les statistiques"
+        )
+        parser.add_argument(
+            '--evict',
+            action='store_true',
+            help=(
+                "Appliquer les limites EXTRACTION_CACHE_MAX_BYTES, DOCUMENTS_MAX_BYTES "
+                "et DOCUMENT_RETENTION_DAYS"
+            )
+        )
+    
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = ExtractedText.objects.all().delete()[0]
+            self.stdout.write(f"{deleted} entrée(s) supprimée(s).")
+        elif options['evict']:
+            self.stdout.write(f"{evict_extraction_cache()} entrée(s) évincée(s).")
+            deleted, freed = prune_documents()
+            self.stdout.write(f"{deleted} document(s) supprimé(s) ({freed} octets libérés).")
+        
+        stats = extraction_cache_stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / lookups * 100 if lookups else 0
+        self.stdout.write(f"Entrées: {stats['entries']} ({stats['size']} octets)")
+        self.stdout.write(f"Succès: {stats['hits']}, échecs: {stats['misses']} ({hit_rate:.1f}% de succès)")
+        self.stdout.write(f"Octets non ré-extraits: {stats['bytes_saved']}")
+        documents = stored_documents()
+        self.stdout.write(
+            f"Documents conservés: {len(documents)} "
+            f"({sum(size for _, size, _ in documents)} octets)"
+        )
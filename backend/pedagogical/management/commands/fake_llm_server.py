@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from pedagogical.fake_llm import FakeLLMServer
+
+
+class Command(BaseCommand):
+    help = "Lance un faux serveur OpenAI local pour travailler hors ligne."
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--content',
+            default='{"questions": []}',
+            help="Réponse renvoyée pour chaque complétion"
+        )
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=0,
+            help="Délai (secondes) avant chaque réponse"
+        )
+    
+    def handle(self, *args, **options):
+        server = FakeLLMServer(options['content'], port=options['port'], delay=options['delay'])
+        self.stdout.write(f"Faux serveur OpenAI sur {server.url} (LLM_BASE_URL={server.url})")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
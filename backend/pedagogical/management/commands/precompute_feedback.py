@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.utils import timezone
+import openai
+from pedagogical.feedback import (
+    bucket_annotations, feedback_key, get_feedback, make_context, question_hash
+)
+from pedagogical.llm import LLMUnavailable
+from pedagogical.models import CachedFeedback, QuestionResponse
+
+
+def common_wrong_answers(per_question, min_count):
+    """
+    Feedback contexts of the most frequent wrong answers, at most
+    `per_question` per question, as `(context, count)` sorted by count.
+    """
+    rows = (
+        QuestionResponse.objects.filter(is_correct=False)
+        .order_by()
+        .annotate(**bucket_annotations())
+        .values(
+            'question_text', 'answer', 'correct_answer',
+            'time_bucket', 'attempts_bucket', 'help_used'
+        )
+        .annotate(count=Count('id'))
+    )
+    # Rows differing only by whitespace share a cache key
+    contexts = {}
+    for row in rows:
+        context = make_context(
+            row['question_text'], row['answer'], row['correct_answer'], False,
+            row['time_bucket'], row['attempts_bucket'], row['help_used']
+        )
+        key = feedback_key(context)
+        if key in contexts:
+            contexts[key][1] += row['count']
+        else:
+            contexts[key] = [context, row['count']]
+    
+    selected = []
+    per_question_counts = {}
+    for key, (context, count) in sorted(contexts.items(), key=lambda item: -item[1][1]):
+        if count < min_count:
+            break
+        question = question_hash(context['question'])
+        if per_question_counts.get(question, 0) >= per_question:
+            continue
+        per_question_counts[question] = per_question_counts.get(question, 0) + 1
+        selected.append((key, context, count))
+    return selected
+
+
+class Command(BaseCommand):
+    help = "Précalcule le feedback IA des réponses fausses les plus fréquentes."
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--per-question',
+            type=int,
+            default=3,
+            help="Nombre de réponses fausses préchauffées par question (défaut: 3)"
+        )
+        parser.add_argument(
+            '--min-count',
+            type=int,
+            default=2,
+            help="Nombre minimal d'occurrences d'une réponse (défaut: 2)"
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Lister les réponses à préchauffer sans appeler l'API"
+        )
+    
+    def handle(self, *args, **options):
+        selected = common_wrong_answers(options['per_question'], options['min_count'])
+        cached_keys = set(
+            CachedFeedback.objects.filter(
+                cache_key__in=[key for key, _, _ in selected], expires_at__gt=timezone.now()
+            ).values_list('cache_key', flat=True)
+        )
+        warmed = failed = 0
+        for key, context, count in selected:
+            if key in cached_keys:
+                continue
+            if options['dry_run']:
+                self.stdout.write(f"{count} × « {context['student_answer'][:60]} » : {context['question'][:60]}")
+                continue
+            try:
+                get_feedback(context)
+            except LLMUnavailable as e:
+                self.stderr.write(f"Service IA indisponible, arrêt: {e}")
+                failed += 1
+                break
+            except openai.OpenAIError as e:
+                self.stderr.write(f"Échec pour « {context['student_answer'][:60]} »: {e}")
+                failed += 1
+                continue
+            warmed += 1
+        
+        self.stdout.write(
+            f"Feedback préchauffé: {warmed}, déjà en cache: {len(cached_keys)}, échecs: {failed}"
+        )
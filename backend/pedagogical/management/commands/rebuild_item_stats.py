@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from pedagogical.items import rebuild_item_stats
+from pedagogical.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Recalcule l'analyse des questions des quiz à partir des réponses enregistrées."
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quiz',
+            type=int,
+            action='append',
+            help="Limiter à ce quiz (option répétable)"
+        )
+    
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.order_by('id')
+        if options['quiz']:
+            quizzes = quizzes.filter(id__in=options['quiz'])
+        
+        total_quizzes = total_attempts = 0
+        for quiz in quizzes.iterator():
+            total_attempts += rebuild_item_stats(quiz)
+            total_quizzes += 1
+        
+        self.stdout.write(
+            f"Statistiques recalculées: {total_quizzes} quiz, {total_attempts} tentative(s)"
+        )
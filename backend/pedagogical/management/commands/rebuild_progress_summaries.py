@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from pedagogical.models import Progress, LearnerProgressSummary
+
+
+# Tolerance for the floating point drift of incrementally maintained sums
+PERCENTAGE_SUM_TOLERANCE = 1e-6
+
+
+def compute_summaries():
+    """Aggregate every learner's progress from scratch, keyed by learner id."""
+    rows = (
+        Progress.objects.order_by()
+        .values('user_id')
+        .annotate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(completed=True)),
+            percentage_sum=Sum(
+                Case(
+                    When(max_score__gt=0, then=F('score') * 100.0 / F('max_score')),
+                    default=Value(0.0),
+                    output_field=FloatField()
+                )
+            ),
+        )
+    )
+    return {
+        row['user_id']: (row['total'], row['completed'], row['percentage_sum'] or 0.0)
+        for row in rows
+    }
+
+
+def find_mismatches(expected):
+    """Compare stored summaries with freshly computed ones."""
+    stored = {
+        summary.learner_id: (
+            summary.total_quizzes, summary.completed_quizzes, summary.percentage_sum
+        )
+        for summary in LearnerProgressSummary.objects.all()
+    }
+    mismatches = []
+    for learner_id in expected.keys() | stored.keys():
+        want = expected.get(learner_id, (0, 0, 0.0))
+        have = stored.get(learner_id, (0, 0, 0.0))
+        if (
+            want[0] != have[0]
+            or want[1] != have[1]
+            or abs(want[2] - have[2]) > PERCENTAGE_SUM_TOLERANCE
+        ):
+            mismatches.append((learner_id, want, have))
+    return mismatches
+
+
+class Command(BaseCommand):
+    help = "Reconstruit et vérifie les résumés de progression des apprenants."
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Vérifier les résumés existants sans les reconstruire"
+        )
+    
+    def handle(self, *args, **options):
+        if not options['check']:
+            with transaction.atomic():
+                expected = compute_summaries()
+                LearnerProgressSummary.objects.all().delete()
+                LearnerProgressSummary.objects.bulk_create(
+                    [
+                        LearnerProgressSummary(
+                            learner_id=learner_id,
+                            total_quizzes=total,
+                            completed_quizzes=completed,
+                            percentage_sum=percentage_sum
+                        )
+                        for learner_id, (total, completed, percentage_sum) in expected.items()
+                    ],
+                    batch_size=500
+                )
+            self.stdout.write(f"{len(expected)} résumé(s) reconstruit(s).")
+        
+        mismatches = find_mismatches(compute_summaries())
+        for learner_id, want, have in mismatches:
+            self.stderr.write(f"Apprenant {learner_id}: attendu {want}, trouvé {have}")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} résumé(s) incohérent(s)")
+        self.stdout.write(self.style.SUCCESS("Tous les résumés sont cohérents."))
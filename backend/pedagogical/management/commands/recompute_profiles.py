@@ -0,0 +1,104 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from pedagogical.analysis import fallback_analysis
+from pedagogical.cohort import indicators_by_session, load_columns
+from pedagogical.models import CognitiveProfile, EvaluationSession
+
+PROFILE_FIELDS = (
+    'strengths', 'weaknesses', 'learning_style', 'confidence_level', 'recommendations'
+)
+
+
+def latest_sessions(learner_ids=None):
+    """Latest completed session of each learner, as `{learner_id: session_id}`."""
+    sessions = EvaluationSession.objects.filter(is_completed=True)
+    if learner_ids:
+        sessions = sessions.filter(learner_id__in=learner_ids)
+    latest = {}
+    rows = sessions.order_by('learner_id', '-completed_at', '-id').values_list('learner_id', 'id')
+    for learner_id, session_id in rows.iterator(chunk_size=10000):
+        latest.setdefault(learner_id, session_id)
+    return latest
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les profils cognitifs à partir de la dernière session terminée "
+        "de chaque apprenant (indicateurs vectorisés et analyse par règles)."
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--learner',
+            type=int,
+            action='append',
+            help="Limiter à cet apprenant (option répétable)"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help="Nombre de sessions chargées à la fois (défaut: 5000)"
+        )
+        parser.add_argument(
+            '--indicators-only',
+            action='store_true',
+            help="Mettre à jour les indicateurs sans remplacer l'analyse (ex: analyse IA)"
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Calculer les profils sans les enregistrer"
+        )
+    
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        latest = latest_sessions(options['learner'])
+        learners = list(latest.items())
+        created = updated = 0
+        
+        for start in range(0, len(learners), options['batch_size']):
+            batch = dict(learners[start:start + options['batch_size']])
+            indicators = indicators_by_session(load_columns(list(batch.values())))
+            profiles = {
+                profile.learner_id: profile
+                for profile in CognitiveProfile.objects.filter(learner_id__in=list(batch))
+            }
+            now = timezone.now()
+            to_create, to_update = [], []
+            for learner_id, session_id in batch.items():
+                session_indicators = indicators.get(session_id, {})
+                profile = profiles.get(learner_id)
+                if profile is None:
+                    profile = CognitiveProfile(learner_id=learner_id)
+                    to_create.append(profile)
+                else:
+                    to_update.append(profile)
+                if profile.pk is None or not options['indicators_only']:
+                    analysis = fallback_analysis(session_indicators)
+                    for field in PROFILE_FIELDS:
+                        setattr(profile, field, analysis[field])
+                profile.analysis_data = session_indicators
+                profile.last_evaluation_session_id = session_id
+                # auto_now is not applied by bulk_update
+                profile.updated_at = now
+            
+            if not options['dry_run']:
+                fields = ['analysis_data', 'last_evaluation_session', 'updated_at']
+                if not options['indicators_only']:
+                    fields += PROFILE_FIELDS
+                with transaction.atomic():
+                    CognitiveProfile.objects.bulk_create(to_create, batch_size=500)
+                    CognitiveProfile.objects.bulk_update(to_update, fields, batch_size=500)
+            created += len(to_create)
+            updated += len(to_update)
+        
+        prefix = "[simulation] " if options['dry_run'] else ""
+        self.stdout.write(
+            f"{prefix}Profils recalculés: {created + updated} "
+            f"(créés: {created}, mis à jour: {updated}) "
+            f"en {time.monotonic() - started:.2f} s"
+        )
@@ -0,0 +1,49 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from pedagogical.jobs import default_worker_name, run_pending_jobs
+
+
+class Command(BaseCommand):
+    help = "Exécute les tâches en arrière-plan de la file d'attente (analyses IA, etc.)."
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help="Vider la file puis s'arrêter au lieu d'attendre de nouvelles tâches"
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=settings.JOB_POLL_INTERVAL,
+            help="Secondes d'attente entre deux scrutations d'une file vide"
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help="Nombre maximal de tâches à traiter avant de s'arrêter"
+        )
+    
+    def handle(self, *args, **options):
+        worker = default_worker_name()
+        remaining = options['max_jobs']
+        total = 0
+        self.stdout.write(f"Worker {worker} démarré.")
+        
+        try:
+            while remaining is None or remaining > 0:
+                processed = run_pending_jobs(worker, limit=remaining)
+                total += processed
+                if remaining is not None:
+                    remaining -= processed
+                if options['once'] or (remaining is not None and remaining <= 0):
+                    break
+                if not processed:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        
+        self.stdout.write(self.style.SUCCESS(f"{total} tâche(s) traitée(s)."))
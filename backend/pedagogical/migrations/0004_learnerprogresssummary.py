@@ -0,0 +1,47 @@
+# Generated by Django 6.0 on 2026-10-18 03:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_summaries(apps, schema_editor):
+    """Backfill a summary for every learner that already has progress."""
+    Progress = apps.get_model('pedagogical', 'Progress')
+    LearnerProgressSummary = apps.get_model('pedagogical', 'LearnerProgressSummary')
+    
+    summaries = {}
+    for user_id, completed, score, max_score in Progress.objects.values_list(
+        'user_id', 'completed', 'score', 'max_score'
+    ).iterator():
+        summary = summaries.setdefault(
+            user_id, LearnerProgressSummary(learner_id=user_id)
+        )
+        summary.total_quizzes += 1
+        summary.completed_quizzes += int(completed)
+        summary.percentage_sum += (score / max_score * 100) if max_score > 0 else 0
+    LearnerProgressSummary.objects.bulk_create(summaries.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0003_evaluationsession_cognitiveprofile_questionresponse'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LearnerProgressSummary',
+            fields=[
+                ('learner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_quizzes', models.IntegerField(default=0)),
+                ('completed_quizzes', models.IntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0, help_text='Somme des pourcentages (non arrondis) de toutes les entrées')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Learner Progress Summaries',
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 03:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0004_learnerprogresssummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='questionresponse',
+            index=models.Index(fields=['session', 'created_at', 'id'], name='response_session_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionresponse',
+            index=models.Index(fields=['competence_type', 'created_at', 'id'], name='response_competence_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionresponse',
+            index=models.Index(fields=['is_correct', 'created_at', 'id'], name='response_correct_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionresponse',
+            index=models.Index(fields=['created_at', 'id'], name='response_created_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0005_questionresponse_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='evaluationsession',
+            index=models.Index(fields=['learner', 'started_at', 'id'], name='session_learner_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evaluationsession',
+            index=models.Index(fields=['started_at', 'id'], name='session_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['uploaded_by', 'uploaded_at', 'id'], name='file_owner_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='file',
+            index=models.Index(fields=['uploaded_at', 'id'], name='file_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='progress_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['updated_at', 'id'], name='progress_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='progress',
+            index=models.Index(fields=['user', 'quiz', 'updated_at'], name='progress_user_quiz_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='questionresponse',
+            index=models.Index(fields=['session', 'competence_type'], name='response_session_comp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizassignment',
+            index=models.Index(fields=['learner', 'quiz'], name='assignment_learner_quiz_idx'),
+        ),
+    ]
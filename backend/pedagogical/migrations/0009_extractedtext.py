@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 04:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0008_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedText',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('file_ext', models.CharField(max_length=10)),
+                ('pages', models.JSONField(default=list, help_text='Texte des pages déjà extraites')),
+                ('complete', models.BooleanField(default=False, help_text='Toutes les pages ont été extraites')),
+                ('size', models.PositiveIntegerField(default=0, help_text='Taille du texte stocké (octets)')),
+                ('source_size', models.PositiveIntegerField(default=0, help_text='Taille du document (octets)')),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('misses', models.PositiveIntegerField(default=0)),
+                ('bytes_saved', models.PositiveBigIntegerField(default=0, help_text='Octets de documents servis sans nouvelle extraction')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('content_hash', 'file_ext'), name='extractedtext_hash_ext_unique')],
+            },
+        ),
+    ]
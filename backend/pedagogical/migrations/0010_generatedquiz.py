@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 04:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0009_extractedtext'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeneratedQuiz',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('num_questions', models.IntegerField()),
+                ('model', models.CharField(max_length=100)),
+                ('prompt_version', models.IntegerField()),
+                ('quiz', models.JSONField()),
+                ('total_tokens', models.IntegerField(default=0, help_text='Tokens consommés par la génération')),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('tokens_saved', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Generated Quizzes',
+            },
+        ),
+    ]
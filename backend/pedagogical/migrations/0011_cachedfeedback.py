@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-18 04:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0010_generatedquiz'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedFeedback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(max_length=64, unique=True)),
+                ('question_hash', models.CharField(db_index=True, max_length=64)),
+                ('answer', models.TextField()),
+                ('is_correct', models.BooleanField()),
+                ('prompt_version', models.IntegerField()),
+                ('feedback', models.TextField()),
+                ('total_tokens', models.IntegerField(default=0, help_text='Tokens consommés par la génération')),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('tokens_saved', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'Cached Feedback',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0011_cachedfeedback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionresponse',
+            name='feedback',
+            field=models.TextField(blank=True, help_text='Dernier feedback IA généré'),
+        ),
+    ]
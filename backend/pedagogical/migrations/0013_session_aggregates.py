@@ -0,0 +1,101 @@
+# Generated by Django 6.0 on 2026-10-18 04:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_aggregates(apps, schema_editor):
+    """Backfill the running aggregates of the sessions that already have responses."""
+    EvaluationSession = apps.get_model('pedagogical', 'EvaluationSession')
+    QuestionResponse = apps.get_model('pedagogical', 'QuestionResponse')
+    SessionCompetenceStats = apps.get_model('pedagogical', 'SessionCompetenceStats')
+    
+    times = {}
+    sessions = {}
+    competences = {}
+    rows = QuestionResponse.objects.order_by('session_id', 'created_at', 'id').values_list(
+        'session_id', 'competence_type', 'is_correct', 'response_time_ms', 'attempts', 'help_used'
+    )
+    for session_id, competence, is_correct, time_ms, attempts, help_used in rows.iterator():
+        session = sessions.setdefault(session_id, EvaluationSession(pk=session_id))
+        stats = competences.setdefault(
+            (session_id, competence),
+            SessionCompetenceStats(session_id=session_id, competence_type=competence)
+        )
+        for aggregate in (session, stats):
+            aggregate.response_count += 1
+            aggregate.correct_count += int(is_correct)
+            aggregate.help_count += int(help_used)
+            aggregate.attempts_sum += attempts
+        stats.response_time_sum += time_ms
+        times.setdefault(session_id, []).append(time_ms)
+    
+    for session_id, session in sessions.items():
+        session.response_time_mean = sum(times[session_id]) / len(times[session_id])
+        session.response_time_m2 = sum((t - session.response_time_mean) ** 2 for t in times[session_id])
+    EvaluationSession.objects.bulk_update(
+        sessions.values(),
+        ['response_count', 'correct_count', 'help_count', 'attempts_sum',
+         'response_time_mean', 'response_time_m2'],
+        batch_size=500
+    )
+    SessionCompetenceStats.objects.bulk_create(competences.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0012_questionresponse_feedback'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluationsession',
+            name='attempts_sum',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluationsession',
+            name='correct_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluationsession',
+            name='help_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluationsession',
+            name='response_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='evaluationsession',
+            name='response_time_m2',
+            field=models.FloatField(default=0, help_text='Somme des carrés des écarts à la moyenne des temps de réponse (Welford)'),
+        ),
+        migrations.AddField(
+            model_name='evaluationsession',
+            name='response_time_mean',
+            field=models.FloatField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SessionCompetenceStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('competence_type', models.CharField(max_length=50)),
+                ('response_count', models.IntegerField(default=0)),
+                ('correct_count', models.IntegerField(default=0)),
+                ('help_count', models.IntegerField(default=0)),
+                ('response_time_sum', models.BigIntegerField(default=0)),
+                ('attempts_sum', models.IntegerField(default=0)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='competence_stats', to='pedagogical.evaluationsession')),
+            ],
+            options={
+                'verbose_name_plural': 'Session Competence Stats',
+                'ordering': ['id'],
+                'constraints': [models.UniqueConstraint(fields=('session', 'competence_type'), name='session_competence_unique')],
+            },
+        ),
+        migrations.RunPython(build_aggregates, migrations.RunPython.noop),
+    ]
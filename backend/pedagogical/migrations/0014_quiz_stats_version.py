@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0013_session_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='stats_version',
+            field=models.PositiveIntegerField(default=0, help_text='Incrémenté à chaque changement des assignations ou progressions du quiz'),
+        ),
+    ]
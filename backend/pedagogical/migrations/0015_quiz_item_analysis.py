@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18 05:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0014_quiz_stats_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_index', models.PositiveIntegerField(help_text='Position de la question dans le quiz')),
+                ('question_hash', models.CharField(help_text='Empreinte de la question au moment de la réponse', max_length=64)),
+                ('answer', models.CharField(help_text='Option choisie', max_length=255)),
+                ('is_correct', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('learner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_answers', to=settings.AUTH_USER_MODEL)),
+                ('progress', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='pedagogical.progress')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='pedagogical.quiz')),
+            ],
+            options={
+                'ordering': ['progress', 'question_index'],
+                'indexes': [models.Index(fields=['quiz', 'question_index'], name='quizanswer_quiz_question_idx')],
+                'constraints': [models.UniqueConstraint(fields=('progress', 'question_index'), name='quizanswer_progress_question_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizItemStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_index', models.PositiveIntegerField()),
+                ('question_hash', models.CharField(help_text='Empreinte de la question comptée ; les compteurs repartent de zéro si elle change', max_length=64)),
+                ('responses', models.IntegerField(default=0)),
+                ('correct', models.IntegerField(default=0)),
+                ('option_counts', models.JSONField(default=dict, help_text='Nombre de choix de chaque option')),
+                ('rest_score_sum', models.BigIntegerField(default=0)),
+                ('rest_score_sum_correct', models.BigIntegerField(default=0)),
+                ('rest_score_square_sum', models.BigIntegerField(default=0)),
+                ('difficulty', models.FloatField(blank=True, help_text='Indice de difficulté (p-value) : part de réponses correctes', null=True)),
+                ('discrimination', models.FloatField(blank=True, help_text='Corrélation point-bisériale avec le reste du quiz', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_stats', to='pedagogical.quiz')),
+            ],
+            options={
+                'verbose_name_plural': 'Quiz Item Stats',
+                'ordering': ['quiz', 'question_index'],
+                'constraints': [models.UniqueConstraint(fields=('quiz', 'question_index'), name='quizitemstats_quiz_question_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 6.0 on 2026-10-18 05:18
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def fill_question_fields(apps, schema_editor):
+    """Backfill the question count and hash of the existing quizzes."""
+    Quiz = apps.get_model('pedagogical', 'Quiz')
+    quizzes = []
+    for quiz in Quiz.objects.only('id', 'questions').iterator(chunk_size=500):
+        questions = quiz.questions
+        if isinstance(questions, dict) and isinstance(questions.get('questions'), list):
+            quiz.num_questions = len(questions['questions'])
+        quiz.questions_hash = hashlib.sha256(
+            json.dumps(questions, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+        quizzes.append(quiz)
+    Quiz.objects.bulk_update(quizzes, ['num_questions', 'questions_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0015_quiz_item_analysis'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='num_questions',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Nombre de questions, calculé à l'enregistrement"),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='questions_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Empreinte SHA-256 du contenu des questions', max_length=64),
+        ),
+        migrations.RunPython(fill_question_fields, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 05:35
+
+from django.db import migrations, models
+
+
+def start_heartbeats(apps, schema_editor):
+    """Running jobs get their start time as last heartbeat, so they can still be reclaimed."""
+    Job = apps.get_model('pedagogical', 'Job')
+    Job.objects.filter(status='running').update(heartbeat_at=models.F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0016_quiz_num_questions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='Dernier signe de vie du worker qui exécute la tâche', null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,9 @@
-from django.db import models
+import hashlib
+import json
+
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -41,6 +45,11 @@ class File(models.Model):
     
     class Meta:
         ordering = ['-uploaded_at']
+        indexes = [
+            # Keyset pagination of FileViewSet (per formateur and global)
+            models.Index(fields=['uploaded_by', 'uploaded_at', 'id'], name='file_owner_uploaded_idx'),
+            models.Index(fields=['uploaded_at', 'id'], name='file_uploaded_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.subject}"
@@ -63,6 +72,22 @@ class Quiz(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    stats_version = models.PositiveIntegerField(
+        default=0,
+        help_text="Incrémenté à chaque changement des assignations ou progressions du quiz"
+    )
+    # Derived from `questions` on save, so lists can defer the JSON
+    num_questions = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Nombre de questions, calculé à l'enregistrement"
+    )
+    questions_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="Empreinte SHA-256 du contenu des questions"
+    )
     
     class Meta:
         ordering = ['-created_at']
@@ -71,12 +96,47 @@ class Quiz(models.Model):
     def __str__(self):
         return f"{self.title} - {self.subject}"
     
-    @property
-    def num_questions(self):
-        """Get the number of questions in the quiz."""
-        if isinstance(self.questions, dict) and 'questions' in self.questions:
-            return len(self.questions['questions'])
+    def save(self, *args, **kwargs):
+        deferred = self.get_deferred_fields()
+        update_fields = kwargs.get('update_fields')
+        # stats_version is only written by invalidate_stats: saving a stale
+        # instance must not bring back an older version. Deferred fields are
+        # left alone, as Django does, instead of being loaded one by one
+        if not self._state.adding and update_fields is None:
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'stats_version'
+                and field.attname not in deferred
+            ]
+        if 'questions' not in deferred:
+            self.num_questions = self.count_questions(self.questions)
+            self.questions_hash = self.hash_questions(self.questions)
+            if update_fields is not None and 'questions' in update_fields:
+                update_fields = {*update_fields, 'num_questions', 'questions_hash'}
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
+    @staticmethod
+    def count_questions(questions):
+        """Number of questions in a `questions` JSON value."""
+        if isinstance(questions, dict) and isinstance(questions.get('questions'), list):
+            return len(questions['questions'])
         return 0
+    
+    @staticmethod
+    def hash_questions(questions):
+        """SHA-256 of a `questions` JSON value, independent of key order."""
+        return hashlib.sha256(
+            json.dumps(questions, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+    
+    @classmethod
+    def invalidate_stats(cls, *quiz_ids):
+        """Make the cached statistics of these quizzes stale (see QuizViewSet.overview)."""
+        quiz_ids = {quiz_id for quiz_id in quiz_ids if quiz_id is not None}
+        if quiz_ids:
+            cls.objects.filter(pk__in=quiz_ids).update(stats_version=models.F('stats_version') + 1)
 
 
 class QuizAssignment(models.Model):
@@ -100,6 +160,10 @@ class QuizAssignment(models.Model):
     class Meta:
         ordering = ['-assigned_at']
         unique_together = ['quiz', 'learner']
+        indexes = [
+            # Covering index for the "quizzes assigned to this learner" semi-join
+            models.Index(fields=['learner', 'quiz'], name='assignment_learner_quiz_idx'),
+        ]
     
     def __str__(self):
         return f"{self.quiz.title} -> {self.learner.username}"
@@ -135,10 +199,22 @@ class Progress(models.Model):
     class Meta:
         ordering = ['-updated_at']
         verbose_name_plural = 'Progress'
+        indexes = [
+            # Keyset pagination of ProgressViewSet (per learner and global)
+            models.Index(fields=['user', 'updated_at', 'id'], name='progress_user_updated_idx'),
+            models.Index(fields=['updated_at', 'id'], name='progress_updated_idx'),
+            # Latest progress of a learner on a quiz (QuizViewSet.stats)
+            models.Index(fields=['user', 'quiz', 'updated_at'], name='progress_user_quiz_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.quiz_title} ({self.score}/{self.max_score})"
     
+    def save(self, *args, **kwargs):
+        """Save and update the learner summary (via signals) in one transaction."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     @property
     def percentage(self):
         """Calculate the percentage score."""
@@ -147,6 +223,192 @@ class Progress(models.Model):
         return 0
 
 
+class LearnerProgressSummary(models.Model):
+    """
+    Running totals of a learner's progress entries.
+    Kept in sync by the Progress signals so statistics are a primary-key read.
+    """
+    learner = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='progress_summary'
+    )
+    total_quizzes = models.IntegerField(default=0)
+    completed_quizzes = models.IntegerField(default=0)
+    percentage_sum = models.FloatField(
+        default=0,
+        help_text="Somme des pourcentages (non arrondis) de toutes les entrées"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = 'Learner Progress Summaries'
+    
+    def __str__(self):
+        return f"Résumé - {self.learner_id} ({self.completed_quizzes}/{self.total_quizzes})"
+    
+    @staticmethod
+    def contribution(completed, score, max_score):
+        """Return the (total, completed, percentage) delta of one progress entry."""
+        percentage = (score / max_score * 100) if max_score > 0 else 0
+        return 1, int(bool(completed)), percentage
+    
+    @classmethod
+    def apply_delta(cls, learner_id, total, completed, percentage, create=True):
+        """Atomically add a delta to a learner's summary, creating it if needed."""
+        if not (total or completed or percentage):
+            return
+        if create:
+            cls.objects.get_or_create(learner_id=learner_id)
+        cls.objects.filter(pk=learner_id).update(
+            total_quizzes=models.F('total_quizzes') + total,
+            completed_quizzes=models.F('completed_quizzes') + completed,
+            percentage_sum=models.F('percentage_sum') + percentage
+        )
+    
+    @property
+    def average_score(self):
+        """Average percentage across all entries."""
+        if self.total_quizzes > 0:
+            return self.percentage_sum / self.total_quizzes
+        return 0
+    
+    @property
+    def completion_percentage(self):
+        """Share of entries that are completed."""
+        if self.total_quizzes > 0:
+            return self.completed_quizzes / self.total_quizzes * 100
+        return 0
+
+
+class QuizAnswer(models.Model):
+    """
+    Model for the answer given to one question of a quiz attempt.
+    An attempt is the Progress entry recorded when the learner submits the quiz.
+    """
+    progress = models.ForeignKey(
+        Progress,
+        on_delete=models.CASCADE,
+        related_name='answers'
+    )
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='answers'
+    )
+    learner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='quiz_answers'
+    )
+    question_index = models.PositiveIntegerField(help_text="Position de la question dans le quiz")
+    question_hash = models.CharField(
+        max_length=64,
+        help_text="Empreinte de la question au moment de la réponse"
+    )
+    answer = models.CharField(max_length=255, help_text="Option choisie")
+    is_correct = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['progress', 'question_index']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['progress', 'question_index'], name='quizanswer_progress_question_unique'
+            ),
+        ]
+        indexes = [
+            # Rebuild of the item statistics of a quiz
+            models.Index(fields=['quiz', 'question_index'], name='quizanswer_quiz_question_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.learner_id} - Quiz {self.quiz_id} Q{self.question_index}: {self.answer}"
+
+
+class QuizItemStats(models.Model):
+    """
+    Item analysis of one question of a quiz, updated at each submission.
+    
+    Point-biserial discrimination is computed against the rest score (the
+    attempt's number of correct answers without this question), from the
+    running sums below.
+    """
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='item_stats'
+    )
+    question_index = models.PositiveIntegerField()
+    question_hash = models.CharField(
+        max_length=64,
+        help_text="Empreinte de la question comptée ; les compteurs repartent de zéro si elle change"
+    )
+    responses = models.IntegerField(default=0)
+    correct = models.IntegerField(default=0)
+    option_counts = models.JSONField(default=dict, help_text="Nombre de choix de chaque option")
+    rest_score_sum = models.BigIntegerField(default=0)
+    rest_score_sum_correct = models.BigIntegerField(default=0)
+    rest_score_square_sum = models.BigIntegerField(default=0)
+    difficulty = models.FloatField(
+        null=True, blank=True, help_text="Indice de difficulté (p-value) : part de réponses correctes"
+    )
+    discrimination = models.FloatField(
+        null=True, blank=True, help_text="Corrélation point-bisériale avec le reste du quiz"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    COUNTER_FIELDS = (
+        'responses', 'correct', 'option_counts', 'rest_score_sum',
+        'rest_score_sum_correct', 'rest_score_square_sum'
+    )
+    
+    class Meta:
+        ordering = ['quiz', 'question_index']
+        verbose_name_plural = 'Quiz Item Stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['quiz', 'question_index'], name='quizitemstats_quiz_question_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Quiz {self.quiz_id} Q{self.question_index} (p={self.difficulty})"
+    
+    def reset(self, question_hash):
+        """Start counting again, for a new version of the question."""
+        self.question_hash = question_hash
+        self.responses = self.correct = 0
+        self.option_counts = {}
+        self.rest_score_sum = self.rest_score_sum_correct = self.rest_score_square_sum = 0
+    
+    def add_answer(self, answer, is_correct, rest_score):
+        """Count one answer, given the rest score of its attempt."""
+        self.responses += 1
+        self.correct += int(is_correct)
+        self.option_counts[answer] = self.option_counts.get(answer, 0) + 1
+        self.rest_score_sum += rest_score
+        self.rest_score_square_sum += rest_score * rest_score
+        if is_correct:
+            self.rest_score_sum_correct += rest_score
+        self.refresh_metrics()
+    
+    def refresh_metrics(self):
+        """Recompute difficulty and discrimination from the counters."""
+        n, n_correct = self.responses, self.correct
+        self.difficulty = n_correct / n if n else None
+        self.discrimination = None
+        if 0 < n_correct < n:
+            mean = self.rest_score_sum / n
+            variance = self.rest_score_square_sum / n - mean * mean
+            if variance > 0:
+                mean_correct = self.rest_score_sum_correct / n_correct
+                mean_wrong = (self.rest_score_sum - self.rest_score_sum_correct) / (n - n_correct)
+                p = self.difficulty
+                self.discrimination = (mean_correct - mean_wrong) / variance ** 0.5 * (p * (1 - p)) ** 0.5
+
+
 class EvaluationSession(models.Model):
     """
     Model for tracking diagnostic evaluation sessions.
@@ -174,11 +436,153 @@ class EvaluationSession(models.Model):
     completed_at = models.DateTimeField(null=True, blank=True)
     is_completed = models.BooleanField(default=False)
     
+    # Running aggregates of the responses, see apply_responses
+    response_count = models.IntegerField(default=0)
+    correct_count = models.IntegerField(default=0)
+    help_count = models.IntegerField(default=0)
+    attempts_sum = models.IntegerField(default=0)
+    response_time_mean = models.FloatField(default=0)
+    response_time_m2 = models.FloatField(
+        default=0,
+        help_text="Somme des carrés des écarts à la moyenne des temps de réponse (Welford)"
+    )
+    
+    AGGREGATE_FIELDS = (
+        'response_count', 'correct_count', 'help_count', 'attempts_sum',
+        'response_time_mean', 'response_time_m2'
+    )
+    
     class Meta:
         ordering = ['-started_at']
+        indexes = [
+            # Keyset pagination of EvaluationSessionViewSet (per learner and global)
+            models.Index(fields=['learner', 'started_at', 'id'], name='session_learner_started_idx'),
+            models.Index(fields=['started_at', 'id'], name='session_started_idx'),
+        ]
     
     def __str__(self):
         return f"Session {self.id} - {self.learner.username} - {self.session_type}"
+    
+    def save(self, *args, **kwargs):
+        # The aggregates are only written by apply_responses, with atomic updates:
+        # saving a stale instance must not overwrite them
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.AGGREGATE_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
+    @staticmethod
+    def response_totals(responses):
+        """
+        Aggregates of `responses`: the session fields, and the
+        SessionCompetenceStats fields per competence in order of first answer.
+        """
+        times = [response.response_time_ms for response in responses]
+        mean = sum(times) / len(times) if times else 0
+        totals = {
+            'response_count': len(times),
+            'correct_count': sum(1 for response in responses if response.is_correct),
+            'help_count': sum(1 for response in responses if response.help_used),
+            'attempts_sum': sum(response.attempts for response in responses),
+            'response_time_mean': mean,
+            'response_time_m2': sum((t - mean) ** 2 for t in times),
+        }
+        by_competence = {}
+        for response in responses:
+            competence = by_competence.setdefault(response.competence_type, {
+                'response_count': 0, 'correct_count': 0, 'help_count': 0,
+                'response_time_sum': 0, 'attempts_sum': 0,
+            })
+            competence['response_count'] += 1
+            competence['correct_count'] += int(response.is_correct)
+            competence['help_count'] += int(response.help_used)
+            competence['response_time_sum'] += response.response_time_ms
+            competence['attempts_sum'] += response.attempts
+        return totals, by_competence
+    
+    @classmethod
+    def apply_responses(cls, session_id, responses, sign=1):
+        """
+        Atomically add (`sign=1`) or remove (`sign=-1`) responses from a
+        session's running aggregates, in O(1) queries per competence.
+        
+        The response time mean and M2 are merged with the batch's own by the
+        parallel form of Welford's algorithm (a negative count removes a
+        batch), computed in a single UPDATE from the stored values so that
+        concurrent submissions cannot lose an update.
+        """
+        responses = list(responses)
+        if not responses:
+            return
+        totals, by_competence = cls.response_totals(responses)
+        count = sign * totals['response_count']
+        old_count = models.F('response_count')
+        old_mean = models.F('response_time_mean')
+        new_count = old_count + count
+        delta = models.Value(totals['response_time_mean']) - old_mean
+        emptied = models.Q(response_count=-count)
+        
+        with transaction.atomic():
+            cls.objects.filter(pk=session_id).update(
+                response_count=new_count,
+                correct_count=models.F('correct_count') + sign * totals['correct_count'],
+                help_count=models.F('help_count') + sign * totals['help_count'],
+                attempts_sum=models.F('attempts_sum') + sign * totals['attempts_sum'],
+                response_time_mean=models.Case(
+                    models.When(emptied, then=models.Value(0.0)),
+                    default=old_mean + delta * float(count) / new_count,
+                    output_field=models.FloatField()
+                ),
+                response_time_m2=models.Case(
+                    models.When(emptied, then=models.Value(0.0)),
+                    default=(
+                        models.F('response_time_m2') + sign * totals['response_time_m2']
+                        + delta * delta * old_count * float(count) / new_count
+                    ),
+                    output_field=models.FloatField()
+                )
+            )
+            missing = []
+            for competence, fields in by_competence.items():
+                if not cls._update_competence(session_id, competence, fields, sign) and sign > 0:
+                    missing.append(competence)
+            if missing:
+                # First answers of these competences: create the rows, then count
+                SessionCompetenceStats.objects.bulk_create(
+                    [
+                        SessionCompetenceStats(session_id=session_id, competence_type=competence)
+                        for competence in missing
+                    ],
+                    ignore_conflicts=True
+                )
+                for competence in missing:
+                    cls._update_competence(session_id, competence, by_competence[competence], sign)
+            if sign < 0:
+                SessionCompetenceStats.objects.filter(
+                    session_id=session_id, response_count__lte=0
+                ).delete()
+    
+    @staticmethod
+    def _update_competence(session_id, competence, fields, sign):
+        """Add the signed counters to a competence row; return whether it exists."""
+        return SessionCompetenceStats.objects.filter(
+            session_id=session_id, competence_type=competence
+        ).update(**{field: models.F(field) + sign * value for field, value in fields.items()})
+
+
+class QuestionResponseQuerySet(models.QuerySet):
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create skips signals: update the session aggregates here."""
+        created = super().bulk_create(objs, *args, **kwargs)
+        by_session = {}
+        for response in created:
+            by_session.setdefault(response.session_id, []).append(response)
+        for session_id, responses in by_session.items():
+            EvaluationSession.apply_responses(session_id, responses)
+        return created
 
 
 class QuestionResponse(models.Model):
@@ -220,15 +624,62 @@ class QuestionResponse(models.Model):
         blank=True,
         help_text="Type d'aide utilisée"
     )
+    feedback = models.TextField(blank=True, help_text="Dernier feedback IA généré")
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Fields counted in the session aggregates
+    AGGREGATED_FIELDS = (
+        'session', 'competence_type', 'is_correct', 'response_time_ms', 'attempts', 'help_used'
+    )
+    
+    objects = QuestionResponseQuerySet.as_manager()
+    
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Filters of QuestionResponseViewSet, ordered like the list endpoint
+            models.Index(fields=['session', 'created_at', 'id'], name='response_session_created_idx'),
+            models.Index(fields=['competence_type', 'created_at', 'id'], name='response_competence_idx'),
+            models.Index(fields=['is_correct', 'created_at', 'id'], name='response_correct_idx'),
+            models.Index(fields=['created_at', 'id'], name='response_created_idx'),
+            models.Index(fields=['session', 'competence_type'], name='response_session_comp_idx'),
+        ]
     
     def __str__(self):
         return f"Response {self.id} - Session {self.session.id} - Q{self.question_id}"
 
 
+class SessionCompetenceStats(models.Model):
+    """
+    Running counters of one competence in an evaluation session.
+    Kept in sync by EvaluationSession.apply_responses.
+    """
+    session = models.ForeignKey(
+        EvaluationSession,
+        on_delete=models.CASCADE,
+        related_name='competence_stats'
+    )
+    competence_type = models.CharField(max_length=50)
+    response_count = models.IntegerField(default=0)
+    correct_count = models.IntegerField(default=0)
+    help_count = models.IntegerField(default=0)
+    response_time_sum = models.BigIntegerField(default=0)
+    attempts_sum = models.IntegerField(default=0)
+    
+    class Meta:
+        # Creation order is the order competences were first answered
+        ordering = ['id']
+        verbose_name_plural = 'Session Competence Stats'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['session', 'competence_type'], name='session_competence_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Session {self.session_id} - {self.competence_type} ({self.response_count})"
+
+
 class CognitiveProfile(models.Model):
     """
     Model for storing learner cognitive strengths and weaknesses.
@@ -285,3 +736,145 @@ class CognitiveProfile(models.Model):
     
     def __str__(self):
         return f"Profil cognitif - {self.learner.username}"
+
+
+class Job(models.Model):
+    """
+    Model for background jobs processed by the run_jobs worker command.
+    The database is the queue, so no external broker is needed.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('running', 'En cours'),
+        ('succeeded', 'Terminé'),
+        ('failed', 'Échoué'),
+    ]
+    
+    kind = models.CharField(max_length=100, help_text="Type de tâche (voir pedagogical/jobs.py)")
+    payload = models.JSONField(default=dict, help_text="Paramètres de la tâche")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker = models.CharField(max_length=255, blank=True, help_text="Worker ayant pris la tâche")
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Dernier signe de vie du worker qui exécute la tâche"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Worker polling: next runnable job
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+            # Keyset pages of the job list (-created_at, -id), all jobs or a learner's
+            models.Index(fields=['created_at', 'id'], name='job_created_idx'),
+            models.Index(fields=['created_by', 'created_at', 'id'], name='job_creator_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Job {self.id} - {self.kind} ({self.status})"
+
+
+class ExtractedText(models.Model):
+    """
+    Cache of the text extracted from an uploaded document, keyed by the
+    SHA-256 of its bytes. Least recently used entries are evicted once the
+    cache exceeds EXTRACTION_CACHE_MAX_BYTES (see pedagogical/extraction.py).
+    """
+    content_hash = models.CharField(max_length=64)
+    file_ext = models.CharField(max_length=10)
+    pages = models.JSONField(default=list, help_text="Texte des pages déjà extraites")
+    complete = models.BooleanField(default=False, help_text="Toutes les pages ont été extraites")
+    size = models.PositiveIntegerField(default=0, help_text="Taille du texte stocké (octets)")
+    source_size = models.PositiveIntegerField(default=0, help_text="Taille du document (octets)")
+    hits = models.PositiveIntegerField(default=0)
+    misses = models.PositiveIntegerField(default=0)
+    bytes_saved = models.PositiveBigIntegerField(
+        default=0,
+        help_text="Octets de documents servis sans nouvelle extraction"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['content_hash', 'file_ext'], name='extractedtext_hash_ext_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_hash[:12]}{self.file_ext} ({len(self.pages)} pages)"
+    
+    @property
+    def text_length(self):
+        """Length of the stored pages once joined."""
+        return sum(len(page) for page in self.pages) + max(len(self.pages) - 1, 0)
+    
+    def covers(self, max_chars):
+        """Whether the stored pages are enough to answer a `max_chars` budget."""
+        return self.complete or (max_chars is not None and self.text_length > max_chars)
+
+
+class GeneratedQuiz(models.Model):
+    """
+    Cache of quizzes generated by OpenAI (see pedagogical/generation.py).
+    The key covers the normalized text, num_questions, model and prompt version.
+    """
+    cache_key = models.CharField(max_length=64, unique=True)
+    num_questions = models.IntegerField()
+    model = models.CharField(max_length=100)
+    prompt_version = models.IntegerField()
+    quiz = models.JSONField()
+    total_tokens = models.IntegerField(default=0, help_text="Tokens consommés par la génération")
+    hits = models.PositiveIntegerField(default=0)
+    tokens_saved = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name_plural = 'Generated Quizzes'
+    
+    def __str__(self):
+        return f"{self.cache_key[:12]} - {self.num_questions} questions ({self.model})"
+
+
+class CachedFeedback(models.Model):
+    """
+    Cache of AI feedback on question responses (see pedagogical/feedback.py).
+    The key covers the question, both answers, the result and the buckets of
+    response time, attempts and help the prompt is built from.
+    """
+    cache_key = models.CharField(max_length=64, unique=True)
+    question_hash = models.CharField(max_length=64, db_index=True)
+    answer = models.TextField()
+    is_correct = models.BooleanField()
+    prompt_version = models.IntegerField()
+    feedback = models.TextField()
+    total_tokens = models.IntegerField(default=0, help_text="Tokens consommés par la génération")
+    hits = models.PositiveIntegerField(default=0)
+    tokens_saved = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+    
+    class Meta:
+        verbose_name_plural = 'Cached Feedback'
+    
+    def __str__(self):
+        return f"{self.cache_key[:12]} - {self.answer[:30]} ({'correct' if self.is_correct else 'incorrect'})"
@@ -0,0 +1,124 @@
+"""
+Document parsing, run inside the extraction worker processes.
+
+This module must stay free of Django imports: worker processes are started
+with the "spawn" method and only import what the task needs. Pages are
+produced lazily so callers only parse what they actually use.
+
+A "page" is a PDF page, a block of DOCX paragraphs or a block of TXT lines.
+"""
+from contextlib import contextmanager
+import io
+import itertools
+import signal
+
+from PyPDF2 import PdfReader
+from docx import Document as DocxDocument
+
+DOCX_PARAGRAPHS_PER_PAGE = 50
+TXT_LINES_PER_PAGE = 100
+
+
+def _blocks(lines, size, start):
+    """Join consecutive lines into pages of `size` lines, skipping `start` pages."""
+    lines = itertools.islice(lines, start * size, None)
+    while True:
+        block = list(itertools.islice(lines, size))
+        if not block:
+            return
+        yield '\n'.join(block)
+
+
+def iter_pages(file, file_ext, start=0):
+    """
+    Yield the text of each page of `file`, beginning at page index `start`.
+
+    Skipped PDF pages are never parsed, which keeps deep pages of the
+    full-text endpoint cheap.
+    """
+    if file_ext == '.pdf':
+        reader = PdfReader(file)
+        for index in range(start, len(reader.pages)):
+            yield reader.pages[index].extract_text() or ''
+    elif file_ext == '.docx':
+        doc = DocxDocument(file)
+        yield from _blocks((p.text for p in doc.paragraphs), DOCX_PARAGRAPHS_PER_PAGE, start)
+    elif file_ext == '.txt':
+        file.seek(0)
+        lines = (line.decode('utf-8').rstrip('\r\n') for line in file)
+        yield from _blocks(lines, TXT_LINES_PER_PAGE, start)
+    else:
+        raise ValueError(f'Format non supporté: {file_ext}')
+
+
+def collect(pages, max_chars):
+    """
+    Join `pages` until `max_chars` is reached.
+
+    Returns the extraction result and the full text of every page consumed,
+    including the one cut by the budget.
+    """
+    parts = []
+    consumed = []
+    length = 0
+    truncated = False
+    for page in pages:
+        consumed.append(page)
+        chunk = '\n' + page if parts else page
+        if max_chars is not None and length + len(chunk) > max_chars:
+            parts.append(chunk[:max_chars - length])
+            truncated = True
+            break
+        parts.append(chunk)
+        length += len(chunk)
+    result = {
+        'text': ''.join(parts),
+        'truncated': truncated,
+        'pages_read': len(consumed),
+    }
+    return result, consumed
+
+
+class ExtractionTimeout(Exception):
+    """Raised when parsing a document exceeds its time budget."""
+
+
+@contextmanager
+def cpu_limit(seconds):
+    """
+    Interrupt the enclosed code once it has used `seconds` of CPU time.
+
+    Relies on SIGPROF, so it only applies in the main thread of a process on
+    platforms with `setitimer`; elsewhere the caller's wall-clock timeout is
+    the only bound.
+    """
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+    
+    def interrupt(signum, frame):
+        raise ExtractionTimeout(f'Limite de {seconds} s de calcul dépassée')
+    
+    previous = signal.signal(signal.SIGPROF, interrupt)
+    signal.setitimer(signal.ITIMER_PROF, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, previous)
+
+
+def extract_budget(data, file_ext, max_chars, cpu_seconds=None):
+    """
+    Worker task: extract `data` until `max_chars` is reached.
+
+    Returns the same `(result, pages)` pair as `collect`.
+    """
+    with cpu_limit(cpu_seconds):
+        return collect(iter_pages(io.BytesIO(data), file_ext), max_chars)
+
+
+def extract_slice(data, file_ext, start, count, cpu_seconds=None):
+    """Worker task: return the text of at most `count` pages from index `start`."""
+    with cpu_limit(cpu_seconds):
+        return list(itertools.islice(iter_pages(io.BytesIO(data), file_ext, start=start), count))
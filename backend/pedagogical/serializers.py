@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from .models import File, Progress, Quiz, QuizAssignment, EvaluationSession, QuestionResponse, CognitiveProfile
+from .analysis import session_indicators
+from .models import File, Progress, Quiz, QuizAssignment, EvaluationSession, QuestionResponse, CognitiveProfile, Job
 
 User = get_user_model()
 
@@ -74,13 +75,15 @@ class QuizSerializer(serializers.ModelSerializer):
     class Meta:
         model = Quiz
         fields = ['id', 'title', 'subject', 'description', 'questions', 'created_by', 
-                  'created_by_username', 'num_questions', 'assigned_learners', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+                  'created_by_username', 'num_questions', 'questions_hash', 'assigned_learners',
+                  'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_by', 'questions_hash', 'created_at', 'updated_at']
     
     def get_assigned_learners(self, obj):
         """Get list of learner IDs assigned to this quiz."""
-        assignments = obj.assignments.all()
-        return [assignment.learner.id for assignment in assignments]
+        if 'assignments' in getattr(obj, '_prefetched_objects_cache', {}):
+            return [assignment.learner_id for assignment in obj.assignments.all()]
+        return list(obj.assignments.values_list('learner_id', flat=True))
 
 
 class QuizAssignmentSerializer(serializers.ModelSerializer):
@@ -102,12 +105,14 @@ class QuizListSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Quiz
-        fields = ['id', 'title', 'subject', 'description', 'num_questions', 
+        fields = ['id', 'title', 'subject', 'description', 'num_questions', 'questions_hash',
                   'created_by_username', 'num_assigned_learners', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'created_by', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_by', 'questions_hash', 'created_at', 'updated_at']
     
     def get_num_assigned_learners(self, obj):
-        """Get count of learners assigned to this quiz."""
+        """Get count of learners assigned to this quiz (annotated by the viewset)."""
+        if hasattr(obj, 'num_assigned_learners'):
+            return obj.num_assigned_learners
         return obj.assignments.count()
 
 
@@ -119,28 +124,67 @@ class QuestionResponseSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'session', 'question_id', 'question_text', 'question_type',
             'competence_type', 'answer', 'correct_answer', 'is_correct',
-            'response_time_ms', 'attempts', 'help_used', 'help_type', 'created_at'
+            'response_time_ms', 'attempts', 'help_used', 'help_type', 'feedback',
+            'created_at'
         ]
-        read_only_fields = ['id', 'created_at']
+        read_only_fields = ['id', 'feedback', 'created_at']
+
+
+class QuestionResponseBulkSerializer(QuestionResponseSerializer):
+    """Serializer for batch submissions, where the session comes from the URL."""
+    
+    class Meta(QuestionResponseSerializer.Meta):
+        read_only_fields = ['id', 'session', 'feedback', 'created_at']
 
 
 class EvaluationSessionSerializer(serializers.ModelSerializer):
     """Serializer for EvaluationSession model."""
     learner_username = serializers.CharField(source='learner.username', read_only=True)
     responses = QuestionResponseSerializer(many=True, read_only=True)
-    num_responses = serializers.SerializerMethodField()
+    num_responses = serializers.IntegerField(source='response_count', read_only=True)
+    indicators = serializers.SerializerMethodField()
     
     class Meta:
         model = EvaluationSession
         fields = [
             'id', 'learner', 'learner_username', 'quiz', 'session_type',
-            'started_at', 'completed_at', 'is_completed', 'responses', 'num_responses'
+            'started_at', 'completed_at', 'is_completed', 'responses', 'num_responses',
+            'indicators'
         ]
         read_only_fields = ['id', 'learner', 'started_at']
     
-    def get_num_responses(self, obj):
-        """Get the number of responses in this session."""
-        return obj.responses.count()
+    def get_indicators(self, obj):
+        """Get the live indicators of the session, from its running aggregates."""
+        return session_indicators(obj)
+
+
+class EvaluationSessionListSerializer(serializers.ModelSerializer):
+    """Summary serializer for session lists (without nested responses)."""
+    learner_username = serializers.CharField(source='learner.username', read_only=True)
+    num_responses = serializers.IntegerField(read_only=True)
+    success_rate = serializers.SerializerMethodField()
+    duration_seconds = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = EvaluationSession
+        fields = [
+            'id', 'learner', 'learner_username', 'quiz', 'session_type',
+            'started_at', 'completed_at', 'is_completed', 'num_responses',
+            'success_rate', 'duration_seconds'
+        ]
+        read_only_fields = fields
+    
+    def get_success_rate(self, obj):
+        """Get the percentage of correct responses (annotated by the viewset)."""
+        if obj.num_responses > 0:
+            return round(obj.num_correct / obj.num_responses * 100, 2)
+        return 0
+    
+    def get_duration_seconds(self, obj):
+        """Get the session duration in seconds, or None while it is running."""
+        if obj.duration is None:
+            return None
+        return round(obj.duration.total_seconds(), 2)
 
 
 class CognitiveProfileSerializer(serializers.ModelSerializer):
@@ -161,3 +205,15 @@ class CognitiveProfileSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'learner', 'created_at', 'updated_at']
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Serializer for background Job status."""
+    
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'status', 'result', 'error', 'attempts', 'max_attempts',
+            'run_after', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,110 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import EvaluationSession, Progress, LearnerProgressSummary, QuestionResponse, Quiz
+
+
+@receiver(pre_save, sender=Progress)
+def remember_previous_progress(sender, instance, raw=False, **kwargs):
+    """
+    Snapshot the stored values so post_save can compute the summary delta.
+    The row stays locked until Progress.save commits, so concurrent updates
+    of the same entry each see the values the other one wrote.
+    """
+    instance._summary_previous = None
+    instance._previous_quiz_id = None
+    if raw or instance.pk is None:
+        return
+    previous = (
+        Progress.objects.select_for_update().filter(pk=instance.pk)
+        .values_list('user_id', 'completed', 'score', 'max_score', 'quiz_id')
+        .first()
+    )
+    if previous is not None:
+        instance._summary_previous = previous[:4]
+        instance._previous_quiz_id = previous[4]
+
+
+@receiver(post_save, sender=Progress)
+def update_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    """Apply the difference between the previous and new values of an entry; mark its quiz stats stale."""
+    if raw:
+        return
+    
+    Quiz.invalidate_stats(instance.quiz_id, getattr(instance, '_previous_quiz_id', None))
+    previous = getattr(instance, '_summary_previous', None)
+    new_delta = LearnerProgressSummary.contribution(
+        instance.completed, instance.score, instance.max_score
+    )
+    
+    if previous is None:
+        LearnerProgressSummary.apply_delta(instance.user_id, *new_delta)
+        return
+    
+    previous_user_id, *previous_values = previous
+    old_delta = LearnerProgressSummary.contribution(*previous_values)
+    if previous_user_id == instance.user_id:
+        LearnerProgressSummary.apply_delta(
+            instance.user_id,
+            *(new - old for new, old in zip(new_delta, old_delta))
+        )
+    else:
+        LearnerProgressSummary.apply_delta(
+            previous_user_id, *(-value for value in old_delta), create=False
+        )
+        LearnerProgressSummary.apply_delta(instance.user_id, *new_delta)
+
+
+@receiver(post_delete, sender=Progress)
+def update_summary_on_delete(sender, instance, **kwargs):
+    """Remove a deleted entry from its learner's summary and quiz stats."""
+    Quiz.invalidate_stats(instance.quiz_id)
+    delta = LearnerProgressSummary.contribution(
+        instance.completed, instance.score, instance.max_score
+    )
+    # Never recreate a summary here: the learner may be deleted in the same cascade
+    LearnerProgressSummary.apply_delta(
+        instance.user_id, *(-value for value in delta), create=False
+    )
+
+
+@receiver(pre_save, sender=QuestionResponse)
+def remember_previous_response(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Snapshot the stored response when a save may change the session aggregates."""
+    instance._aggregate_previous = None
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(QuestionResponse.AGGREGATED_FIELDS):
+        return
+    instance._aggregate_previous = (
+        QuestionResponse.objects.filter(pk=instance.pk)
+        .only(*QuestionResponse.AGGREGATED_FIELDS)
+        .first()
+    )
+
+
+@receiver(post_save, sender=QuestionResponse)
+def update_session_aggregates_on_save(sender, instance, created, raw=False, **kwargs):
+    """Count a new response, or replace the previous values of an edited one."""
+    if raw:
+        return
+    if created:
+        EvaluationSession.apply_responses(instance.session_id, [instance])
+        return
+    
+    previous = getattr(instance, '_aggregate_previous', None)
+    if previous is None:
+        return
+    attnames = [
+        QuestionResponse._meta.get_field(field).attname
+        for field in QuestionResponse.AGGREGATED_FIELDS
+    ]
+    if all(getattr(previous, attname) == getattr(instance, attname) for attname in attnames):
+        return
+    EvaluationSession.apply_responses(previous.session_id, [previous], sign=-1)
+    EvaluationSession.apply_responses(instance.session_id, [instance])
+
+
+@receiver(post_delete, sender=QuestionResponse)
+def update_session_aggregates_on_delete(sender, instance, **kwargs):
+    """Remove a deleted response from its session aggregates."""
+    EvaluationSession.apply_responses(instance.session_id, [instance], sign=-1)
@@ -0,0 +1,50 @@
+"""
+Server-sent events helpers.
+
+Under ASGI, Django serves a StreamingHttpResponse chunk by chunk only when
+its content is an async iterator; a sync one is consumed whole first. The
+generators of this app are sync (ORM, OpenAI client), so `as_async` steps
+them one item at a time in the request's sync thread.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+def format_event(event, data):
+    """One SSE message with a JSON payload."""
+    return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+async def as_async(iterator):
+    """Async iterator over a sync iterator, closing it when the client leaves."""
+    done = object()
+    step = sync_to_async(next)
+    try:
+        while True:
+            item = await step(iterator, done)
+            if item is done:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def event_stream_response(request, events):
+    """
+    StreamingHttpResponse sending `events`, an iterator of SSE messages.
+
+    The iterator is wrapped with `as_async` when served by ASGI, so each
+    message leaves as soon as it is produced.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        events = as_async(events)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Keep nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
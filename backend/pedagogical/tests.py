@@ -1,11 +1,41 @@
 from django.test import TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
-from .models import User
+from .models import (
+    User, Quiz, QuizAssignment, Progress, LearnerProgressSummary,
+    EvaluationSession, QuestionResponse, CognitiveProfile, Job, ExtractedText,
+    GeneratedQuiz, CachedFeedback, QuizAnswer, QuizItemStats
+)
+from .extraction import (
+    ExtractionBusy, ExtractionError, open_document, prune_documents, stored_documents
+)
+from . import cohort, feedback, llm
+from .analysis import session_indicators
+from .fake_llm import FakeLLMServer
+from .generation import QuestionStreamParser, split_sections
+from .jobs import claim_next_job, run_job, run_pending_jobs, touch_job
+from .parsing import ExtractionTimeout, cpu_limit
+from .sse import as_async
+from asgiref.sync import async_to_sync
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+import numpy
+import openai
 import os
 import io
+import json
+import re
+import tempfile
+import time
 
 
 class DocumentUploadViewTests(APITestCase):
@@ -32,6 +62,13 @@ class DocumentUploadViewTests(APITestCase):
         )
         
         self.upload_url = '/api/documents/upload/'
+        
+        # Keep stored documents out of the real media directory
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
     
     def test_upload_txt_file_as_formateur(self):
         """Test uploading a TXT file as a formateur."""
@@ -99,6 +136,304 @@ class DocumentUploadViewTests(APITestCase):
         response = self.client.post(self.upload_url, {'file': empty_file}, format='multipart')
         
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_upload_stops_at_character_budget(self):
+        """Only the requested number of characters is extracted and returned."""
+        self.client.force_authenticate(user=self.formateur)
+        lines = [f'Ligne {i} du cours.' for i in range(500)]
+        txt_file = SimpleUploadedFile('long.txt', '\n'.join(lines).encode('utf-8'))
+        
+        response = self.client.post(
+            self.upload_url, {'file': txt_file, 'max_chars': 50}, format='multipart'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['text']), 50)
+        self.assertTrue(response.data['truncated'])
+        self.assertEqual(response.data['pages_read'], 1)
+        self.assertEqual(len(response.data['document_id']), 64)
+    
+    def test_upload_short_document_is_not_truncated(self):
+        """A document within the budget is returned whole."""
+        self.client.force_authenticate(user=self.formateur)
+        txt_file = SimpleUploadedFile('short.txt', b'Premier paragraphe.\nSecond paragraphe.')
+        
+        response = self.client.post(self.upload_url, {'file': txt_file}, format='multipart')
+        
+        self.assertEqual(response.data['text'], 'Premier paragraphe.\nSecond paragraphe.')
+        self.assertFalse(response.data['truncated'])
+    
+    def test_upload_with_invalid_budget(self):
+        """A non positive max_chars is rejected."""
+        self.client.force_authenticate(user=self.formateur)
+        txt_file = SimpleUploadedFile('test.txt', b'Test content')
+        
+        response = self.client.post(
+            self.upload_url, {'file': txt_file, 'max_chars': 0}, format='multipart'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    @override_settings(QUIZ_LONG_DOCUMENT_MAX_CHARS=100)
+    def test_upload_budget_is_capped(self):
+        """max_chars cannot ask for more text than generation accepts."""
+        self.client.force_authenticate(user=self.formateur)
+        txt_file = SimpleUploadedFile('long.txt', b'abcdefghij' * 50)
+        
+        response = self.client.post(
+            self.upload_url, {'file': txt_file, 'max_chars': 10 ** 9}, format='multipart'
+        )
+        
+        self.assertEqual(len(response.data['text']), 100)
+        self.assertTrue(response.data['truncated'])
+    
+    def test_full_text_is_paginated(self):
+        """The full text of an uploaded document is served page by page."""
+        self.client.force_authenticate(user=self.formateur)
+        lines = [f'Ligne {i}' for i in range(250)]
+        txt_file = SimpleUploadedFile('long.txt', '\n'.join(lines).encode('utf-8'))
+        document_id = self.client.post(
+            self.upload_url, {'file': txt_file, 'max_chars': 10}, format='multipart'
+        ).data['document_id']
+        url = f'/api/documents/{document_id}/text/'
+        
+        first = self.client.get(url, {'page_size': 2})
+        last = self.client.get(url, {'page': 2, 'page_size': 2})
+        
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['number'] for p in first.data['pages']], [1, 2])
+        self.assertTrue(first.data['pages'][0]['text'].startswith('Ligne 0\n'))
+        self.assertEqual(first.data['next_page'], 2)
+        self.assertEqual([p['number'] for p in last.data['pages']], [3])
+        self.assertTrue(last.data['pages'][0]['text'].endswith('Ligne 249'))
+        self.assertIsNone(last.data['next_page'])
+    
+    def test_full_text_of_another_formateur_is_not_found(self):
+        """Documents are only visible to the formateur who uploaded them."""
+        self.client.force_authenticate(user=self.formateur)
+        txt_file = SimpleUploadedFile('test.txt', b'Contenu confidentiel')
+        document_id = self.client.post(
+            self.upload_url, {'file': txt_file}, format='multipart'
+        ).data['document_id']
+        other = User.objects.create_user(
+            username='autre_formateur', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=other)
+        
+        response = self.client.get(f'/api/documents/{document_id}/text/')
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_document_id_cannot_reach_another_formateur(self):
+        """A relative path in document_id does not lead to another user's document."""
+        self.client.force_authenticate(user=self.formateur)
+        txt_file = SimpleUploadedFile('test.txt', b'Contenu confidentiel')
+        document_id = self.client.post(
+            self.upload_url, {'file': txt_file}, format='multipart'
+        ).data['document_id']
+        other = User.objects.create_user(
+            username='autre_formateur', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=other)
+        
+        with mock.patch('pedagogical.views.extract_text_cached') as extract:
+            response = self.client.post('/api/quiz/generate/', {
+                'document_id': f'../{self.formateur.pk}/{document_id}',
+                'long_document': True,
+                'num_questions': 1,
+            })
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        extract.assert_not_called()
+        self.assertIsNone(open_document(f'../{self.formateur.pk}/{document_id}', other))
+
+
+class ExtractionCacheTests(APITestCase):
+    """Tests for the content-hash cache of extracted document text."""
+    
+    def setUp(self):
+        self.formateur = User.objects.create_user(
+            username='formateur_cache', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=self.formateur)
+        self.upload_url = '/api/documents/upload/'
+        self.content = '\n'.join(f'Ligne {i} du cours.' for i in range(300)).encode('utf-8')
+        
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+    
+    def upload(self, max_chars=100, content=None, name='cours.txt'):
+        return self.client.post(
+            self.upload_url,
+            {'file': SimpleUploadedFile(name, content or self.content), 'max_chars': max_chars},
+            format='multipart'
+        )
+    
+    def test_repeat_upload_is_served_without_parsing(self):
+        """A second upload of the same bytes does not run the parser."""
+        first = self.upload()
+        with mock.patch('pedagogical.extraction.run_in_pool') as run_in_pool:
+            second = self.upload()
+        
+        run_in_pool.assert_not_called()
+        self.assertEqual(first.data['cache'], 'miss')
+        self.assertEqual(second.data['cache'], 'hit')
+        self.assertEqual(second.data['text'], first.data['text'])
+        self.assertEqual(second.data['truncated'], first.data['truncated'])
+        entry = ExtractedText.objects.get()
+        self.assertEqual((entry.hits, entry.misses), (1, 1))
+        self.assertEqual(entry.bytes_saved, len(self.content))
+    
+    def test_larger_budget_extends_cached_pages(self):
+        """A budget beyond the cached pages re-extracts and refreshes the entry."""
+        self.upload(max_chars=100)
+        response = self.upload(max_chars=100000)
+        
+        self.assertEqual(response.data['cache'], 'miss')
+        self.assertFalse(response.data['truncated'])
+        self.assertTrue(ExtractedText.objects.get().complete)
+        self.assertEqual(self.upload(max_chars=10).data['cache'], 'hit')
+    
+    @override_settings(EXTRACTION_CACHE_MAX_BYTES=5000)
+    def test_least_recently_used_entries_are_evicted(self):
+        """The cache stays under its size bound by dropping the oldest entries."""
+        for i in range(3):
+            content = f'Document {i}\n'.encode('utf-8') * 300
+            self.upload(max_chars=100000, content=content, name=f'doc{i}.txt')
+        
+        self.assertLessEqual(
+            sum(ExtractedText.objects.values_list('size', flat=True)), 5000
+        )
+        self.assertFalse(
+            ExtractedText.objects.filter(pages__0__startswith='Document 0').exists()
+        )
+    
+    def test_stats_command_reports_counters(self):
+        """The extraction_cache command prints hits, misses and bytes saved."""
+        self.upload()
+        self.upload()
+        out = io.StringIO()
+        
+        call_command('extraction_cache', stdout=out)
+        
+        self.assertIn('Succès: 1, échecs: 1', out.getvalue())
+        self.assertIn(f'Octets non ré-extraits: {len(self.content)}', out.getvalue())
+    
+    def test_evict_prunes_least_recently_used_documents(self):
+        """Stored documents beyond DOCUMENTS_MAX_BYTES are deleted, oldest first."""
+        ids = [
+            self.upload(content=f'Document {i}\n'.encode('utf-8') * 50, name=f'doc{i}.txt')
+            .data['document_id']
+            for i in range(3)
+        ]
+        out = io.StringIO()
+        
+        with override_settings(DOCUMENTS_MAX_BYTES=len('Document 0\n') * 50 * 2):
+            call_command('extraction_cache', '--evict', stdout=out)
+        
+        self.assertIn('1 document(s) supprimé(s)', out.getvalue())
+        self.assertIn('Documents conservés: 2', out.getvalue())
+        statuses = [self.client.get(f'/api/documents/{i}/text/').status_code for i in ids]
+        self.assertEqual(statuses, [404, 200, 200])
+    
+    @override_settings(DOCUMENT_RETENTION_DAYS=7)
+    def test_evict_prunes_documents_past_retention(self):
+        """Documents unused for DOCUMENT_RETENTION_DAYS are deleted."""
+        self.upload()
+        self.assertEqual(prune_documents(), (0, 0))
+        
+        later = timezone.now() + timedelta(days=8)
+        with mock.patch('pedagogical.extraction.timezone.now', return_value=later):
+            deleted, freed = prune_documents()
+        
+        self.assertEqual((deleted, freed), (1, len(self.content)))
+        self.assertEqual(stored_documents(), [])
+
+
+class ExtractionPoolTests(APITestCase):
+    """Tests for the limits of the document extraction worker pool."""
+    
+    def setUp(self):
+        self.formateur = User.objects.create_user(
+            username='formateur_pool', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=self.formateur)
+        self.upload_url = '/api/documents/upload/'
+        
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        media_override = override_settings(MEDIA_ROOT=media_root.name)
+        media_override.enable()
+        self.addCleanup(media_override.disable)
+    
+    def upload(self, content=b'Contenu du cours.'):
+        return self.client.post(
+            self.upload_url,
+            {'file': SimpleUploadedFile('cours.txt', content)},
+            format='multipart'
+        )
+    
+    def test_extraction_runs_in_worker_process(self):
+        """A cache miss is parsed by the pool and returns the text."""
+        response = self.upload('Texte accentué, éàü.'.encode('utf-8'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['text'], 'Texte accentué, éàü.')
+    
+    @override_settings(MAX_UPLOAD_SIZE=10)
+    def test_oversized_upload_returns_413(self):
+        """Files above MAX_UPLOAD_SIZE are rejected before any parsing."""
+        response = self.upload()
+        
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    
+    def test_extraction_timeout_returns_504(self):
+        """A document exceeding its time budget gives a 504 and is not cached."""
+        with mock.patch(
+            'pedagogical.extraction.run_in_pool', side_effect=ExtractionTimeout('20 s')
+        ):
+            response = self.upload()
+        
+        self.assertEqual(response.status_code, status.HTTP_504_GATEWAY_TIMEOUT)
+        self.assertFalse(ExtractedText.objects.exists())
+    
+    def test_full_queue_returns_503(self):
+        """Uploads are refused while the extraction queue is full."""
+        with mock.patch(
+            'pedagogical.extraction.run_in_pool', side_effect=ExtractionBusy('occupé')
+        ):
+            response = self.upload()
+        
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    def test_crashed_worker_returns_503_everywhere(self):
+        """A worker dying during extraction gives a 503 on every extraction path."""
+        document_id = self.upload().data['document_id']
+        ExtractedText.objects.all().delete()
+        crash = ExtractionError('Le processus d\'extraction s\'est arrêté brutalement')
+        
+        with mock.patch('pedagogical.extraction.run_in_pool', side_effect=crash):
+            responses = [
+                self.upload(b'Autre contenu.'),
+                self.client.get(f'/api/documents/{document_id}/text/'),
+                self.client.post('/api/quiz/generate/', {
+                    'document_id': document_id, 'long_document': True, 'num_questions': 1
+                }),
+            ]
+        
+        for response in responses:
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response.data['error'], str(crash))
+    
+    def test_cpu_limit_interrupts_parsing(self):
+        """The CPU limit stops runaway parsing code."""
+        with self.assertRaises(ExtractionTimeout):
+            with cpu_limit(0.05):
+                while True:
+                    pass
 
 
 class QuizGenerationViewTests(APITestCase):
@@ -197,3 +532,2241 @@ class QuizGenerationViewTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
         self.assertIn('error', response.data)
 
+
+
+@override_settings(OPENAI_API_KEY='sk-test')
+class QuizGenerationCacheTests(APITestCase):
+    """Tests for the cache of generated quizzes."""
+    
+    QUIZ = {'questions': [{
+        'question': 'Qui a créé Python ?',
+        'options': {'A': 'Guido van Rossum', 'B': 'Linus Torvalds', 'C': 'Ada Lovelace', 'D': 'Alan Turing'},
+        'correct_answer': 'A',
+        'explanation': 'Python a été créé par Guido van Rossum.'
+    }]}
+    
+    def setUp(self):
+        self.formateur = User.objects.create_user(
+            username='formateur_gen', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=self.formateur)
+        self.text = 'Python est un langage de programmation créé par Guido van Rossum.'
+        patcher = mock.patch(
+            'pedagogical.generation.generate_quiz', return_value=(json.dumps(self.QUIZ), 420)
+        )
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def post(self, text=None, num_questions=1, **extra):
+        return self.client.post('/api/quiz/generate/', {
+            'text': text or self.text, 'num_questions': num_questions, **extra
+        })
+    
+    def test_same_text_is_generated_once(self):
+        """A repeat request, even reformatted, is served from the cache."""
+        first = self.post()
+        second = self.post(text='  Python est un langage de programmation\n créé par Guido van Rossum. ')
+        
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertEqual(first.data['cache'], 'miss')
+        self.assertEqual(first.data['tokens_used'], 420)
+        self.assertEqual(second.data['cache'], 'hit')
+        self.assertEqual(second.data['quiz'], self.QUIZ)
+        self.assertEqual(second.data['tokens_saved'], 420)
+        self.assertEqual(GeneratedQuiz.objects.get().tokens_saved, 420)
+    
+    def test_key_includes_num_questions_and_prompt_version(self):
+        """Different question counts or prompt versions are generated separately."""
+        self.post(num_questions=1)
+        self.post(num_questions=2)
+        with mock.patch('pedagogical.generation.PROMPT_VERSION', 2):
+            self.post(num_questions=1)
+        
+        self.assertEqual(self.generate.call_count, 3)
+    
+    def test_force_refresh_bypasses_cache(self):
+        """force_refresh regenerates and replaces the cached quiz."""
+        self.post()
+        response = self.post(force_refresh=True)
+        
+        self.assertEqual(self.generate.call_count, 2)
+        self.assertEqual(response.data['cache'], 'refresh')
+        self.assertEqual(GeneratedQuiz.objects.count(), 1)
+    
+    def test_expired_entries_are_regenerated(self):
+        """Entries older than QUIZ_CACHE_TTL are not served."""
+        self.post()
+        GeneratedQuiz.objects.update(expires_at=timezone.now())
+        
+        self.assertEqual(self.post().data['cache'], 'miss')
+    
+    @override_settings(QUIZ_CACHE_MAX_ENTRIES=2)
+    def test_least_recently_used_quizzes_are_evicted(self):
+        """The cache keeps at most QUIZ_CACHE_MAX_ENTRIES quizzes."""
+        for i in range(3):
+            self.post(text=f'Chapitre {i}')
+        
+        self.assertEqual(GeneratedQuiz.objects.count(), 2)
+        self.assertEqual(self.post(text='Chapitre 0').data['cache'], 'miss')
+    
+    def test_plain_text_answers_are_not_cached(self):
+        """An answer that is not valid JSON is returned but not stored."""
+        self.generate.return_value = ('Question 1 : ...', 100)
+        
+        response = self.post()
+        
+        self.assertIn('quiz_text', response.data)
+        self.assertFalse(GeneratedQuiz.objects.exists())
+
+
+@override_settings(OPENAI_API_KEY='sk-test', MAX_TEXT_LENGTH_FOR_QUIZ=200, QUIZ_MAX_SECTIONS=3)
+class LongDocumentGenerationTests(APITestCase):
+    """Tests for the map-reduce generation of quizzes from long documents."""
+    
+    def setUp(self):
+        self.formateur = User.objects.create_user(
+            username='formateur_long', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=self.formateur)
+        self.chapters = [
+            f'Chapitre {i}. ' + ' '.join(f'notion{i}_{j}' for j in range(15)) for i in range(6)
+        ]
+        self.text = '\n\n'.join(self.chapters)
+        patcher = mock.patch('pedagogical.generation.generate_quiz', side_effect=self.fake_generate)
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    @staticmethod
+    def fake_generate(text, num_questions):
+        notions = text.split()[2:]
+        questions = [
+            {'question': f'Que signifie {notions[i]} ?', 'options': {}, 'correct_answer': 'A'}
+            for i in range(num_questions)
+        ]
+        # Every section also proposes the same generic question first
+        questions.insert(0, {'question': 'De quoi parle ce texte ?', 'options': {}, 'correct_answer': 'A'})
+        return json.dumps({'questions': questions}), 100
+    
+    def post(self, **data):
+        return self.client.post('/api/quiz/generate/', {
+            'text': self.text, 'num_questions': 4, 'long_document': True, **data
+        })
+    
+    def test_questions_cover_the_whole_document(self):
+        """Sections are sampled across the document and merged in turns."""
+        response = self.post()
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['sections'], 3)
+        self.assertEqual(self.generate.call_count, 3)
+        questions = [q['question'] for q in response.data['quiz']['questions']]
+        self.assertEqual(questions, [
+            'De quoi parle ce texte ?',
+            'Que signifie notion0_0 ?', 'Que signifie notion2_0 ?', 'Que signifie notion5_0 ?'
+        ])
+        self.assertEqual(response.data['tokens_used'], 300)
+    
+    def test_duplicate_questions_are_merged(self):
+        """A question proposed by several sections is kept once."""
+        response = self.post(num_questions=20)
+        
+        questions = [q['question'] for q in response.data['quiz']['questions']]
+        self.assertEqual(questions.count('De quoi parle ce texte ?'), 1)
+    
+    def test_sections_are_cached(self):
+        """A second request reuses every section from the cache."""
+        self.post()
+        response = self.post()
+        
+        self.assertEqual(self.generate.call_count, 3)
+        self.assertEqual(response.data['cache'], 'hit')
+        self.assertEqual(response.data['tokens_saved'], 300)
+    
+    def test_failed_section_is_skipped(self):
+        """Questions from the other sections are returned if one section fails."""
+        def flaky(text, num_questions):
+            if text.startswith('Chapitre 2'):
+                raise RuntimeError('timeout')
+            return self.fake_generate(text, num_questions)
+        self.generate.side_effect = flaky
+        
+        with self.assertLogs('pedagogical.generation', level='WARNING'):
+            response = self.post()
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('notion2_' in q['question'] for q in response.data['quiz']['questions']))
+    
+    def test_split_sections_respects_length(self):
+        """Sections never exceed the section length and keep every word."""
+        sections = split_sections(self.text, 200)
+        
+        self.assertTrue(all(len(section) <= 200 for section in sections))
+        self.assertEqual(' '.join(' '.join(sections).split()), ' '.join(self.text.split()))
+
+
+class QuizGenerationStreamTests(APITestCase):
+    """Tests for the server-sent events variant of quiz generation."""
+    
+    QUIZ = {'questions': [
+        {
+            'question': f'Que vaut {{x}} dans l\'exemple "{i}" ?',
+            'options': {'A': '{', 'B': '}', 'C': '[]', 'D': '\\'},
+            'correct_answer': 'A',
+            'explanation': 'Les accolades {} apparaissent dans les chaînes.'
+        }
+        for i in range(3)
+    ]}
+    
+    def setUp(self):
+        self.formateur = User.objects.create_user(
+            username='formateur_stream', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=self.formateur)
+        self.server = FakeLLMServer(json.dumps(self.QUIZ, indent=2, ensure_ascii=False)).start()
+        self.addCleanup(self.server.stop)
+        llm_settings = override_settings(
+            OPENAI_API_KEY='sk-test', LLM_BASE_URL=self.server.url, LLM_RETRY_BASE_DELAY=0
+        )
+        llm_settings.enable()
+        self.addCleanup(llm_settings.disable)
+        self.addCleanup(llm.reset)
+    
+    def post(self, **extra):
+        return self.client.post('/api/quiz/generate/stream/', {
+            'text': 'Les accolades en Python.', 'num_questions': 3, **extra
+        })
+    
+    def events(self, response):
+        body = b''.join(response.streaming_content).decode('utf-8')
+        events = []
+        for message in body.split('\n\n'):
+            if message:
+                event, data = message.split('\n')
+                events.append((event.removeprefix('event: '), json.loads(data.removeprefix('data: '))))
+        return events
+    
+    def test_parser_yields_each_question_once_complete(self):
+        """Questions come out one by one, braces inside strings are ignored."""
+        parser = QuestionStreamParser()
+        text = json.dumps(self.QUIZ, ensure_ascii=False)
+        
+        parsed = []
+        for position, char in enumerate(text):
+            questions = parser.feed(char)
+            parsed.extend(questions)
+            if questions:
+                self.assertEqual(text[position], '}')
+        
+        self.assertEqual(parsed, self.QUIZ['questions'])
+    
+    def test_questions_are_streamed_then_done(self):
+        """Each question is a `question` event, followed by a `done` event."""
+        response = self.post()
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = self.events(response)
+        self.assertEqual([event for event, _ in events], ['question'] * 3 + ['done'])
+        self.assertEqual([data['question'] for _, data in events[:3]], self.QUIZ['questions'])
+        self.assertEqual([data['index'] for _, data in events[:3]], [0, 1, 2])
+        done = events[-1][1]
+        self.assertEqual(done['count'], 3)
+        self.assertEqual(done['cache'], 'miss')
+        self.assertGreater(done['tokens_used'], 0)
+        self.assertTrue(self.server.requests[0]['stream'])
+    
+    def test_first_question_is_sent_before_completion_ends(self):
+        """The first event leaves while most of the completion is still to come."""
+        text = json.dumps(self.QUIZ)
+        pieces = [text[i:i + 10] for i in range(0, len(text), 10)]
+        read = []
+        
+        class Stream:
+            total_tokens = 0
+            
+            def __iter__(self):
+                for piece in pieces:
+                    read.append(piece)
+                    yield piece
+            
+            def close(self):
+                pass
+        
+        with mock.patch('pedagogical.generation.llm.ChatStream', return_value=Stream()):
+            response = self.post()
+            first = next(iter(response.streaming_content))
+            response.close()
+        
+        self.assertTrue(first.startswith(b'event: question'))
+        self.assertLess(len(read), len(pieces) / 2)
+    
+    def test_cached_quiz_is_streamed_without_calling_the_api(self):
+        """A quiz generated before is replayed from the cache."""
+        self.events(self.post())
+        
+        events = self.events(self.post())
+        
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(events), 4)
+        self.assertEqual(events[-1][1]['cache'], 'hit')
+        self.assertGreater(events[-1][1]['tokens_saved'], 0)
+    
+    def test_api_errors_become_error_events(self):
+        """A failure after the response started is reported as an `error` event."""
+        self.server.fail(401)
+        
+        events = self.events(self.post())
+        
+        self.assertEqual(events[0][0], 'error')
+        self.assertEqual(events[0][1]['status'], status.HTTP_401_UNAUTHORIZED)
+    
+    def test_invalid_requests_are_rejected_before_streaming(self):
+        """Validation errors and the long-document mode are plain JSON errors."""
+        self.assertEqual(self.post(num_questions=50).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.post(long_document=True).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.server.requests, [])
+    
+    def test_async_iteration_closes_the_generator(self):
+        """Under ASGI, leaving the stream early closes the sync generator."""
+        closed = []
+        
+        def numbers():
+            try:
+                yield from range(10)
+            finally:
+                closed.append(True)
+        
+        async def first_two():
+            items = []
+            stream = as_async(numbers())
+            async for item in stream:
+                items.append(item)
+                if len(items) == 2:
+                    break
+            await stream.aclose()
+            return items
+        
+        self.assertEqual(async_to_sync(first_two)(), [0, 1])
+        self.assertEqual(closed, [True])
+
+
+class QuizAssignmentTests(APITestCase):
+    """Tests for bulk quiz assignment."""
+    
+    def setUp(self):
+        """Set up a formateur, a quiz and a cohort of learners."""
+        self.client = APIClient()
+        
+        self.formateur = User.objects.create_user(
+            username='formateur_test',
+            password='testpass123',
+            user_type='formateur'
+        )
+        self.learners = [
+            User.objects.create_user(
+                username=f'apprenant_{i}',
+                password='testpass123',
+                user_type='apprenant'
+            )
+            for i in range(5)
+        ]
+        self.quiz = Quiz.objects.create(
+            title='Quiz test',
+            subject='Python',
+            questions={'questions': []},
+            created_by=self.formateur
+        )
+        self.client.force_authenticate(user=self.formateur)
+    
+    def test_create_quiz_with_learner_ids(self):
+        """Test that create assigns valid learners and reports unknown ids."""
+        learner_ids = [learner.id for learner in self.learners] + [self.formateur.id, 999999]
+        
+        response = self.client.post('/api/quizzes/', {
+            'title': 'Nouveau quiz',
+            'subject': 'Python',
+            'questions': {'questions': []},
+            'learner_ids': learner_ids,
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['assigned_learners']), 5)
+        self.assertIn('warning', response.data)
+    
+    def test_update_keeps_existing_assignments(self):
+        """Test that update only inserts and deletes the assignment diff."""
+        kept = QuizAssignment.objects.create(quiz=self.quiz, learner=self.learners[0])
+        QuizAssignment.objects.create(quiz=self.quiz, learner=self.learners[1])
+        
+        response = self.client.patch(f'/api/quizzes/{self.quiz.id}/', {
+            'learner_ids': [self.learners[0].id, self.learners[2].id],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            set(self.quiz.assignments.values_list('learner_id', flat=True)),
+            {self.learners[0].id, self.learners[2].id}
+        )
+        self.assertTrue(QuizAssignment.objects.filter(pk=kept.pk).exists())
+    
+    def test_assign_and_unassign_actions(self):
+        """Test the bulk assign and unassign actions."""
+        learner_ids = [learner.id for learner in self.learners]
+        
+        # Including the invalidation of the quiz statistics
+        with self.assertNumQueries(7):
+            response = self.client.post(
+                f'/api/quizzes/{self.quiz.id}/assign/',
+                {'learner_ids': learner_ids + ['abc']},
+                format='json'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['assigned'], 5)
+        self.assertEqual(response.data['failed_learner_ids'], ['abc'])
+        
+        response = self.client.post(
+            f'/api/quizzes/{self.quiz.id}/unassign/',
+            {'learner_ids': learner_ids[:3]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['unassigned'], 3)
+        self.assertEqual(response.data['total_assigned'], 2)
+    
+    def test_only_integer_ids_are_accepted(self):
+        """Test that booleans and floats are reported instead of cast to an id."""
+        response = self.client.post(
+            f'/api/quizzes/{self.quiz.id}/assign/',
+            {'learner_ids': [self.learners[0].id, str(self.learners[1].id), True, 2.9, '3.0']},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['assigned'], 2)
+        self.assertEqual(response.data['failed_learner_ids'], [True, 2.9, '3.0'])
+        self.assertEqual(
+            set(self.quiz.assignments.values_list('learner_id', flat=True)),
+            {self.learners[0].id, self.learners[1].id}
+        )
+
+
+class QuizStatsTests(APITestCase):
+    """Tests for the aggregated quiz statistics endpoint."""
+    
+    def setUp(self):
+        """Set up a quiz assigned to learners with mixed progress."""
+        self.client = APIClient()
+        
+        self.formateur = User.objects.create_user(
+            username='formateur_test',
+            password='testpass123',
+            user_type='formateur'
+        )
+        self.quiz = Quiz.objects.create(
+            title='Quiz test',
+            subject='Python',
+            questions={'questions': [{'question': 'Q1'}, {'question': 'Q2'}]},
+            created_by=self.formateur
+        )
+        self.learners = []
+        for i in range(4):
+            learner = User.objects.create_user(
+                username=f'apprenant_{i}',
+                password='testpass123',
+                user_type='apprenant'
+            )
+            QuizAssignment.objects.create(quiz=self.quiz, learner=learner)
+            self.learners.append(learner)
+        
+        Progress.objects.create(
+            user=self.learners[0], quiz=self.quiz, quiz_title='Quiz test',
+            quiz_subject='Python', score=20, max_score=20, completed=True
+        )
+        Progress.objects.create(
+            user=self.learners[1], quiz=self.quiz, quiz_title='Quiz test',
+            quiz_subject='Python', score=10, max_score=20, completed=True
+        )
+        self.stats_url = f'/api/quizzes/{self.quiz.id}/stats/'
+        self.client.force_authenticate(user=self.formateur)
+    
+    def test_stats_summary(self):
+        """Test completion rate, average and default rows for learners without progress."""
+        response = self.client.get(self.stats_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_assigned'], 4)
+        self.assertEqual(response.data['total_completed'], 2)
+        self.assertEqual(response.data['completion_rate'], 50.0)
+        self.assertEqual(response.data['average_score'], 75.0)
+        
+        pending = [row for row in response.data['learner_stats'] if not row['completed']]
+        self.assertEqual(len(pending), 2)
+        self.assertEqual(pending[0]['max_score'], 20)
+        self.assertEqual(pending[0]['percentage'], 0)
+    
+    def test_stats_query_count_is_constant(self):
+        """Test that adding learners does not add queries."""
+        with self.assertNumQueries(3):
+            self.client.get(self.stats_url)
+        
+        for i in range(4, 10):
+            learner = User.objects.create_user(
+                username=f'apprenant_{i}',
+                password='testpass123',
+                user_type='apprenant'
+            )
+            QuizAssignment.objects.create(quiz=self.quiz, learner=learner)
+        
+        with self.assertNumQueries(3):
+            self.client.get(self.stats_url)
+    
+    def test_stats_sorting_and_pagination(self):
+        """Test sorting learner rows by percentage and paginating them."""
+        response = self.client.get(self.stats_url, {
+            'ordering': '-percentage', 'page': 1, 'page_size': 1
+        })
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['learner_stats']), 1)
+        self.assertEqual(response.data['learner_stats'][0]['learner_id'], self.learners[0].id)
+        self.assertEqual(response.data['pagination']['total_pages'], 4)
+        
+        response = self.client.get(self.stats_url, {'ordering': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class QuizOverviewTests(APITestCase):
+    """Tests for the cached overview of all of a formateur's quizzes."""
+    
+    def setUp(self):
+        """Set up two quizzes of a formateur, one of another formateur."""
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.formateur = User.objects.create_user(
+            username='formateur_overview', password='testpass123', user_type='formateur'
+        )
+        other = User.objects.create_user(
+            username='formateur_autre', password='testpass123', user_type='formateur'
+        )
+        self.quiz = self.make_quiz('Fractions', self.formateur)
+        self.empty_quiz = self.make_quiz('Vide', self.formateur)
+        self.other_quiz = self.make_quiz('Autre', other)
+        self.learners = [
+            User.objects.create_user(
+                username=f'apprenant_overview_{i}', password='testpass123', user_type='apprenant'
+            )
+            for i in range(3)
+        ]
+        for learner in self.learners:
+            QuizAssignment.objects.create(quiz=self.quiz, learner=learner)
+            QuizAssignment.objects.create(quiz=self.other_quiz, learner=learner)
+        self.progress(self.learners[0], 18)
+        self.progress(self.learners[1], 6)
+        self.client.force_authenticate(user=self.formateur)
+    
+    def make_quiz(self, title, formateur):
+        return Quiz.objects.create(
+            title=title, subject='Maths', questions={'questions': [{'question': 'Q1'}]},
+            created_by=formateur
+        )
+    
+    def progress(self, learner, score, quiz=None):
+        return Progress.objects.create(
+            user=learner, quiz=quiz or self.quiz, quiz_title='Fractions', quiz_subject='Maths',
+            score=score, max_score=20, completed=True
+        )
+    
+    def overview(self):
+        response = self.client.get('/api/quizzes/overview/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_overview_of_every_quiz(self):
+        data = self.overview()
+        
+        self.assertEqual(data['cache'], 'miss')
+        by_id = {quiz['quiz_id']: quiz for quiz in data['quizzes']}
+        self.assertEqual(set(by_id), {self.quiz.id, self.empty_quiz.id})
+        stats = by_id[self.quiz.id]
+        self.assertEqual((stats['total_assigned'], stats['total_completed']), (3, 2))
+        self.assertEqual(stats['completion_rate'], 66.67)
+        self.assertEqual(stats['average_score'], 60.0)
+        self.assertEqual(
+            [learner['learner_id'] for learner in stats['at_risk_learners']], [self.learners[1].id]
+        )
+        self.assertEqual(stats['at_risk_learners'][0]['percentage'], 30.0)
+        self.assertEqual(by_id[self.empty_quiz.id]['total_assigned'], 0)
+        self.assertEqual(by_id[self.empty_quiz.id]['completion_rate'], 0)
+    
+    def test_overview_matches_stats(self):
+        stats = self.client.get(f'/api/quizzes/{self.quiz.id}/stats/').data
+        overview = next(quiz for quiz in self.overview()['quizzes'] if quiz['quiz_id'] == self.quiz.id)
+        
+        for key in ('num_questions', 'total_assigned', 'total_completed', 'completion_rate', 'average_score'):
+            self.assertEqual(overview[key], stats[key])
+    
+    def test_cached_until_progress_changes(self):
+        self.overview()
+        # Only the quiz versions are read on a hit
+        with self.assertNumQueries(1):
+            self.assertEqual(self.overview()['cache'], 'hit')
+        
+        progress = self.progress(self.learners[2], 4)
+        data = self.overview()
+        self.assertEqual(data['cache'], 'miss')
+        stats = next(quiz for quiz in data['quizzes'] if quiz['quiz_id'] == self.quiz.id)
+        self.assertEqual(len(stats['at_risk_learners']), 2)
+        
+        progress.score = 20
+        progress.save()
+        self.assertEqual(self.overview()['cache'], 'miss')
+        progress.delete()
+        data = self.overview()
+        self.assertEqual(data['cache'], 'miss')
+        stats = next(quiz for quiz in data['quizzes'] if quiz['quiz_id'] == self.quiz.id)
+        self.assertEqual(stats['total_completed'], 2)
+    
+    def test_invalidated_by_bulk_assignment_changes(self):
+        self.overview()
+        newcomer = User.objects.create_user(
+            username='apprenant_nouveau', password='testpass123', user_type='apprenant'
+        )
+        self.client.post(
+            f'/api/quizzes/{self.empty_quiz.id}/assign/', {'learner_ids': [newcomer.id]}, format='json'
+        )
+        data = self.overview()
+        self.assertEqual(data['cache'], 'miss')
+        stats = next(quiz for quiz in data['quizzes'] if quiz['quiz_id'] == self.empty_quiz.id)
+        self.assertEqual(stats['total_assigned'], 1)
+        
+        self.client.post(
+            f'/api/quizzes/{self.empty_quiz.id}/unassign/', {'learner_ids': [newcomer.id]}, format='json'
+        )
+        self.assertEqual(self.overview()['cache'], 'miss')
+        self.assertEqual(self.overview()['cache'], 'hit')
+        
+        # Another formateur's changes leave this overview cached
+        self.progress(self.learners[2], 2, quiz=self.other_quiz)
+        self.assertEqual(self.overview()['cache'], 'hit')
+    
+    def test_stale_quiz_save_keeps_stats_version(self):
+        stale = Quiz.objects.get(pk=self.quiz.pk)
+        self.progress(self.learners[2], 10)
+        version = Quiz.objects.get(pk=self.quiz.pk).stats_version
+        
+        stale.title = 'Fractions 2'
+        stale.save()
+        self.assertEqual(Quiz.objects.get(pk=self.quiz.pk).stats_version, version)
+    
+    def test_overview_requires_formateur(self):
+        self.client.force_authenticate(user=self.learners[0])
+        response = self.client.get('/api/quizzes/overview/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class QuizItemAnalysisTests(APITestCase):
+    """Tests for per-question answers and the item statistics of quizzes."""
+    
+    # Answers of each learner to the three questions (correct answers: A, B, C)
+    ATTEMPTS = [
+        ['A', 'B', 'C'],
+        ['A', 'B', 'D'],
+        ['A', 'C', 'C'],
+        ['B', 'B', 'D'],
+        ['A', 'D', 'A'],
+        ['C', 'B', 'C'],
+    ]
+    
+    def setUp(self):
+        self.formateur = User.objects.create_user(
+            username='formateur_items', password='testpass123', user_type='formateur'
+        )
+        self.quiz = Quiz.objects.create(
+            title='Items', subject='Maths', created_by=self.formateur,
+            questions={'questions': [
+                {
+                    'question': f'Question {index}',
+                    'options': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'},
+                    'correct_answer': correct,
+                }
+                for index, correct in enumerate('ABC')
+            ]}
+        )
+        self.learners = []
+        for index in range(len(self.ATTEMPTS)):
+            learner = User.objects.create_user(
+                username=f'apprenant_items_{index}', password='testpass123', user_type='apprenant'
+            )
+            QuizAssignment.objects.create(quiz=self.quiz, learner=learner)
+            self.learners.append(learner)
+        self.submit_url = f'/api/quizzes/{self.quiz.id}/submit/'
+        self.items_url = f'/api/quizzes/{self.quiz.id}/items/'
+    
+    def submit(self, learner, answers):
+        self.client.force_authenticate(user=learner)
+        return self.client.post(
+            self.submit_url,
+            {'answers': [
+                {'question_index': index, 'answer': answer} for index, answer in enumerate(answers)
+            ]},
+            format='json'
+        )
+    
+    def submit_all(self):
+        for learner, answers in zip(self.learners, self.ATTEMPTS):
+            self.assertEqual(self.submit(learner, answers).status_code, status.HTTP_201_CREATED)
+    
+    def stored_stats(self):
+        return [
+            (row.question_index, row.responses, row.correct, row.option_counts,
+             row.difficulty, row.discrimination)
+            for row in QuizItemStats.objects.filter(quiz=self.quiz)
+        ]
+    
+    def test_submit_grades_answers_and_records_progress(self):
+        response = self.submit(self.learners[1], self.ATTEMPTS[1])
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [answer['is_correct'] for answer in response.data['answers']], [True, True, False]
+        )
+        self.assertEqual(response.data['progress']['score'], 20)
+        self.assertEqual(response.data['progress']['max_score'], 30)
+        self.assertTrue(response.data['progress']['completed'])
+        self.assertEqual(QuizAnswer.objects.filter(learner=self.learners[1]).count(), 3)
+    
+    def test_invalid_submissions_write_nothing(self):
+        self.client.force_authenticate(user=self.learners[0])
+        for answers in (
+            [],
+            [{'question_index': 3, 'answer': 'A'}],
+            [{'question_index': 0, 'answer': 'E'}],
+            [{'question_index': 0, 'answer': 'A'}, {'question_index': 0, 'answer': 'B'}],
+        ):
+            response = self.client.post(self.submit_url, {'answers': answers}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Progress.objects.exists())
+        self.assertFalse(QuizItemStats.objects.exists())
+        
+        outsider = User.objects.create_user(
+            username='apprenant_non_assigne', password='testpass123', user_type='apprenant'
+        )
+        self.assertEqual(self.submit(outsider, ['A', 'B', 'C']).status_code, status.HTTP_404_NOT_FOUND)
+        self.client.force_authenticate(user=self.formateur)
+        response = self.client.post(self.submit_url, {'answers': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_incremental_stats_match_item_analysis(self):
+        self.submit_all()
+        
+        scores = numpy.array([
+            [answer == correct for answer, correct in zip(answers, 'ABC')]
+            for answers in self.ATTEMPTS
+        ], dtype=float)
+        for row in QuizItemStats.objects.filter(quiz=self.quiz):
+            item = scores[:, row.question_index]
+            rest = scores.sum(axis=1) - item
+            self.assertEqual(row.responses, len(self.ATTEMPTS))
+            self.assertAlmostEqual(row.difficulty, item.mean())
+            self.assertAlmostEqual(row.discrimination, numpy.corrcoef(item, rest)[0, 1])
+            self.assertEqual(
+                row.option_counts,
+                {
+                    option: count for option, count in
+                    zip(*numpy.unique([a[row.question_index] for a in self.ATTEMPTS], return_counts=True))
+                }
+            )
+    
+    def test_item_report(self):
+        self.submit_all()
+        self.client.force_authenticate(user=self.formateur)
+        response = self.client.get(self.items_url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = response.data['items'][0]
+        self.assertEqual(first['responses'], 6)
+        self.assertAlmostEqual(first['difficulty'], 4 / 6, places=4)
+        self.assertEqual(first['options']['D'], {'count': 0, 'share': 0, 'correct': False})
+        self.assertTrue(first['options']['A']['correct'])
+        self.assertIn('distracteur_inutile', first['flags'])
+        
+        other = User.objects.create_user(
+            username='formateur_items_autre', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(self.items_url).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_edited_question_restarts_and_rebuild_matches(self):
+        self.submit_all()
+        incremental = self.stored_stats()
+        call_command('rebuild_item_stats', stdout=io.StringIO())
+        self.assertEqual(self.stored_stats(), incremental)
+        
+        questions = self.quiz.questions
+        questions['questions'][2]['question'] = 'Question 2 reformulée'
+        self.quiz.questions = questions
+        self.quiz.save()
+        self.client.force_authenticate(user=self.formateur)
+        report = self.client.get(self.items_url).data['items']
+        self.assertEqual(report[2]['responses'], 0)
+        self.assertEqual(report[0]['responses'], 6)
+        
+        self.submit(self.learners[0], ['A', 'B', 'C'])
+        row = QuizItemStats.objects.get(quiz=self.quiz, question_index=2)
+        self.assertEqual((row.responses, row.correct), (1, 1))
+        incremental = self.stored_stats()
+        out = io.StringIO()
+        call_command('rebuild_item_stats', '--quiz', str(self.quiz.id), stdout=out)
+        self.assertIn('1 quiz, 7 tentative(s)', out.getvalue())
+        self.assertEqual(self.stored_stats(), incremental)
+
+class LearnerProgressSummaryTests(APITestCase):
+    """Tests for the incrementally maintained progress summary."""
+    
+    def setUp(self):
+        """Set up a learner with two progress entries."""
+        self.client = APIClient()
+        
+        self.apprenant = User.objects.create_user(
+            username='apprenant_test',
+            password='testpass123',
+            user_type='apprenant'
+        )
+        self.first = Progress.objects.create(
+            user=self.apprenant, quiz_title='Quiz 1', quiz_subject='Python',
+            score=50, max_score=100
+        )
+        self.second = Progress.objects.create(
+            user=self.apprenant, quiz_title='Quiz 2', quiz_subject='Python',
+            score=3, max_score=4, completed=True
+        )
+        self.client.force_authenticate(user=self.apprenant)
+    
+    def test_summary_follows_create_update_delete(self):
+        """Test that saves and deletes keep the summary totals exact."""
+        summary = LearnerProgressSummary.objects.get(pk=self.apprenant.pk)
+        self.assertEqual(summary.total_quizzes, 2)
+        self.assertEqual(summary.completed_quizzes, 1)
+        self.assertAlmostEqual(summary.percentage_sum, 125.0)
+        
+        self.first.score = 100
+        self.first.completed = True
+        self.first.save()
+        self.second.delete()
+        
+        summary.refresh_from_db()
+        self.assertEqual(summary.total_quizzes, 1)
+        self.assertEqual(summary.completed_quizzes, 1)
+        self.assertAlmostEqual(summary.percentage_sum, 100.0)
+    
+    def test_stats_reads_summary(self):
+        """Test that the stats endpoint is a single summary lookup."""
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/progress/stats/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_quizzes'], 2)
+        self.assertEqual(response.data['completed_quizzes'], 1)
+        self.assertEqual(response.data['average_score'], 62.5)
+        self.assertEqual(response.data['completion_percentage'], 50.0)
+    
+    def test_rebuild_command_repairs_summaries(self):
+        """Test that the rebuild command restores drifted summaries."""
+        LearnerProgressSummary.objects.filter(pk=self.apprenant.pk).update(total_quizzes=42)
+        
+        call_command('rebuild_progress_summaries', stdout=io.StringIO())
+        
+        summary = LearnerProgressSummary.objects.get(pk=self.apprenant.pk)
+        self.assertEqual(summary.total_quizzes, 2)
+        call_command('rebuild_progress_summaries', '--check', stdout=io.StringIO())
+
+
+class QuizListQueryCountTests(APITestCase):
+    """Tests that quiz serialization does not issue per-row queries."""
+    
+    def setUp(self):
+        """Set up a formateur, learners and a few assigned quizzes."""
+        self.client = APIClient()
+        
+        self.formateur = User.objects.create_user(
+            username='formateur_test',
+            password='testpass123',
+            user_type='formateur'
+        )
+        self.learners = [
+            User.objects.create_user(
+                username=f'apprenant_{i}',
+                password='testpass123',
+                user_type='apprenant'
+            )
+            for i in range(3)
+        ]
+        self.create_quizzes(2)
+    
+    def create_quizzes(self, count):
+        """Create quizzes assigned to every learner."""
+        for i in range(count):
+            quiz = Quiz.objects.create(
+                title=f'Quiz {i}',
+                subject='Python',
+                questions={'questions': []},
+                created_by=self.formateur
+            )
+            for learner in self.learners:
+                QuizAssignment.objects.create(quiz=quiz, learner=learner)
+    
+    def test_list_query_count_is_constant(self):
+        """Test that the quiz list costs the same number of queries at any size."""
+        self.client.force_authenticate(user=self.formateur)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/quizzes/')
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]['num_assigned_learners'], 3)
+        self.assertEqual(response.data[0]['created_by_username'], 'formateur_test')
+        
+        self.create_quizzes(8)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/quizzes/')
+        self.assertEqual(len(response.data), 10)
+    
+    def test_learner_list_counts_all_assignments(self):
+        """Test that a learner sees the full assignment count of their quizzes."""
+        self.client.force_authenticate(user=self.learners[0])
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/quizzes/')
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(response.data[0]['num_assigned_learners'], 3)
+    
+    def test_retrieve_uses_prefetched_assignments(self):
+        """Test that the detail view reads learner ids from one prefetch."""
+        self.client.force_authenticate(user=self.formateur)
+        quiz = Quiz.objects.first()
+        
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/quizzes/{quiz.id}/')
+        self.assertEqual(
+            sorted(response.data['assigned_learners']),
+            [learner.id for learner in self.learners]
+        )
+
+
+class QuizQuestionFieldsTests(APITestCase):
+    """Tests for the stored question count and hash of quizzes."""
+    
+    QUESTIONS = {'questions': [{'question': 'Q1'}, {'question': 'Q2'}]}
+    
+    def setUp(self):
+        """Set up a formateur and a quiz with two questions."""
+        self.formateur = User.objects.create_user(
+            username='formateur_questions', password='testpass123', user_type='formateur'
+        )
+        self.quiz = Quiz.objects.create(
+            title='Quiz', subject='Python', questions=self.QUESTIONS, created_by=self.formateur
+        )
+        self.client.force_authenticate(user=self.formateur)
+    
+    def test_fields_set_on_create(self):
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.num_questions, 2)
+        self.assertEqual(self.quiz.questions_hash, Quiz.hash_questions(self.QUESTIONS))
+        self.assertEqual(Quiz.count_questions({'autre': []}), 0)
+    
+    def test_fields_follow_question_edits(self):
+        response = self.client.patch(
+            f'/api/quizzes/{self.quiz.id}/', {'questions': {'questions': [{'question': 'Q1'}]}},
+            format='json'
+        )
+        self.assertEqual(response.data['num_questions'], 1)
+        
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.num_questions, 1)
+        self.assertEqual(response.data['questions_hash'], self.quiz.questions_hash)
+        self.assertNotEqual(self.quiz.questions_hash, Quiz.hash_questions(self.QUESTIONS))
+        
+        # Restricted saves that include the questions update them too
+        self.quiz.questions = self.QUESTIONS
+        self.quiz.save(update_fields=['questions'])
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.num_questions, 2)
+    
+    def test_save_of_deferred_instance_keeps_fields(self):
+        quiz = Quiz.objects.defer('questions').get(pk=self.quiz.pk)
+        quiz.title = 'Renommé'
+        # The questions are neither loaded nor written back
+        with self.assertNumQueries(1):
+            quiz.save()
+        
+        self.quiz.refresh_from_db()
+        self.assertEqual(self.quiz.title, 'Renommé')
+        self.assertEqual(self.quiz.num_questions, 2)
+        self.assertEqual(self.quiz.questions, self.QUESTIONS)
+    
+    def test_list_does_not_load_questions(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/quizzes/')
+        
+        self.assertEqual(response.data[0]['num_questions'], 2)
+        self.assertEqual(response.data[0]['questions_hash'], self.quiz.questions_hash)
+        self.assertNotIn('"questions"', queries[0]['sql'])
+
+
+class EvaluationSessionListTests(APITestCase):
+    """Tests for the evaluation session list and detail serializers."""
+    
+    def setUp(self):
+        """Set up sessions with responses for several learners."""
+        self.client = APIClient()
+        
+        self.formateur = User.objects.create_user(
+            username='formateur_test',
+            password='testpass123',
+            user_type='formateur'
+        )
+        for i in range(3):
+            self.create_session(f'apprenant_{i}')
+    
+    def create_session(self, username):
+        """Create a learner with a session holding one correct and one wrong answer."""
+        learner = User.objects.create_user(
+            username=username,
+            password='testpass123',
+            user_type='apprenant'
+        )
+        session = EvaluationSession.objects.create(learner=learner)
+        for is_correct in (True, False):
+            QuestionResponse.objects.create(
+                session=session, question_id='q1', question_text='Question',
+                answer='A', correct_answer='A', is_correct=is_correct,
+                response_time_ms=1000
+            )
+        return session
+    
+    def test_list_is_summary_with_constant_queries(self):
+        """Test that the list omits responses and runs a single query."""
+        self.client.force_authenticate(user=self.formateur)
+        
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/evaluation-sessions/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        session_data = response.data['results'][0]
+        self.assertNotIn('responses', session_data)
+        self.assertEqual(session_data['num_responses'], 2)
+        self.assertEqual(session_data['success_rate'], 50.0)
+        self.assertIsNone(session_data['duration_seconds'])
+    
+    def test_retrieve_keeps_full_detail(self):
+        """Test that the detail view still nests responses via one prefetch."""
+        self.client.force_authenticate(user=self.formateur)
+        session = EvaluationSession.objects.first()
+        
+        # Session, responses and competence aggregates (for the indicators)
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/evaluation-sessions/{session.id}/')
+        
+        self.assertEqual(len(response.data['responses']), 2)
+        self.assertEqual(response.data['num_responses'], 2)
+
+
+class QuestionResponseFilterTests(APITestCase):
+    """Tests for server-side filtering of question responses."""
+    
+    def setUp(self):
+        """Set up two sessions with responses of different competences."""
+        self.client = APIClient()
+        
+        self.formateur = User.objects.create_user(
+            username='formateur_test',
+            password='testpass123',
+            user_type='formateur'
+        )
+        self.sessions = []
+        for i in range(2):
+            learner = User.objects.create_user(
+                username=f'apprenant_{i}',
+                password='testpass123',
+                user_type='apprenant'
+            )
+            session = EvaluationSession.objects.create(learner=learner)
+            for competence_type, is_correct in [('calcul', True), ('lecture', False)]:
+                QuestionResponse.objects.create(
+                    session=session, question_id='q1', question_text='Question',
+                    competence_type=competence_type, answer='A', correct_answer='A',
+                    is_correct=is_correct, response_time_ms=1000
+                )
+            self.sessions.append(session)
+        self.client.force_authenticate(user=self.formateur)
+    
+    def test_filter_by_session(self):
+        """Test that ?session= only returns that session's responses."""
+        response = self.client.get('/api/question-responses/', {'session': self.sessions[0].id})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+        self.assertTrue(all(item['session'] == self.sessions[0].id for item in response.data))
+    
+    def test_combined_filters(self):
+        """Test filtering by learner, competence and correctness together."""
+        response = self.client.get('/api/question-responses/', {
+            'learner': self.sessions[1].learner_id,
+            'competence_type': 'calcul',
+            'is_correct': 'true',
+            'created_after': '2000-01-01',
+        })
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['session'], self.sessions[1].id)
+    
+    def test_invalid_filter_values(self):
+        """Test that malformed filter values are rejected."""
+        response = self.client.get('/api/question-responses/', {
+            'competence_type': 'chimie',
+            'created_before': 'hier',
+        })
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('competence_type', response.data)
+        self.assertIn('created_before', response.data)
+    
+    def test_unfiltered_dump_requires_pagination(self):
+        """Test that formateurs must filter or paginate the full table."""
+        response = self.client.get('/api/question-responses/')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        
+        response = self.client.get('/api/question-responses/', {'page_size': 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNotNone(response.data['next'])
+    
+    @override_settings(PAGINATION_PAGE_SIZE=1)
+    def test_unscoped_filter_is_paginated(self):
+        """Test that filters other than session or learner get the default page size."""
+        response = self.client.get('/api/question-responses/', {'is_correct': 'true'})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNotNone(response.data['next'])
+
+
+class KeysetPaginationTests(APITestCase):
+    """Tests for cursor pagination of the model viewsets."""
+    
+    def setUp(self):
+        """Set up a learner with several progress entries."""
+        self.client = APIClient()
+        
+        self.apprenant = User.objects.create_user(
+            username='apprenant_test',
+            password='testpass123',
+            user_type='apprenant'
+        )
+        for i in range(5):
+            Progress.objects.create(
+                user=self.apprenant, quiz_title=f'Quiz {i}', quiz_subject='Python',
+                score=i, max_score=10
+            )
+        self.client.force_authenticate(user=self.apprenant)
+    
+    def test_cursor_walks_every_row_once(self):
+        """Test that following next links returns each row exactly once, newest first."""
+        seen = []
+        response = self.client.get('/api/progress/', {'page_size': 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(item['quiz_title'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        
+        self.assertEqual(seen, [f'Quiz {i}' for i in reversed(range(5))])
+    
+    @override_settings(PAGINATION_MAX_PAGE_SIZE=3)
+    def test_page_size_is_capped(self):
+        """Test that page_size cannot exceed the configured maximum."""
+        response = self.client.get('/api/progress/', {'page_size': 1000})
+        
+        self.assertEqual(len(response.data['results']), 3)
+
+
+class HotPathIndexTests(TestCase):
+    """Tests that the hot API queries are served by indexes."""
+    
+    def test_hot_paths_avoid_full_scans(self):
+        """Test that EXPLAIN reports no full table scan on any hot path."""
+        out = io.StringIO()
+        call_command('explain_hot_paths', '--fail-on-scan', stdout=out)
+        self.assertNotIn('SCAN ', out.getvalue())
+
+
+class BulkResponseSubmissionTests(APITestCase):
+    """Tests for the batch question response endpoint."""
+    
+    def setUp(self):
+        """Set up a learner with an open diagnostic session."""
+        self.client = APIClient()
+        
+        self.apprenant = User.objects.create_user(
+            username='apprenant_test',
+            password='testpass123',
+            user_type='apprenant'
+        )
+        self.session = EvaluationSession.objects.create(learner=self.apprenant)
+        self.bulk_url = f'/api/evaluation-sessions/{self.session.id}/responses/bulk/'
+        self.client.force_authenticate(user=self.apprenant)
+    
+    def make_responses(self, count):
+        """Build response payloads alternating correct and wrong answers."""
+        return [
+            {
+                'question_id': f'q{i}',
+                'question_text': f'Question {i}',
+                'competence_type': 'calcul',
+                'answer': 'A',
+                'correct_answer': 'A' if i % 2 == 0 else 'B',
+                'is_correct': i % 2 == 0,
+                'response_time_ms': 1000 + i,
+            }
+            for i in range(count)
+        ]
+    
+    def test_bulk_create_in_constant_queries(self):
+        """Test that a batch is validated and inserted without per-row queries."""
+        # Session lookup and lock, insert, then the session and competence aggregate updates
+        with self.assertNumQueries(11):
+            response = self.client.post(
+                self.bulk_url, {'responses': self.make_responses(20)}, format='json'
+            )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 20)
+        self.assertEqual(self.session.responses.count(), 20)
+    
+    @override_settings(OPENAI_API_KEY='')
+    def test_bulk_create_and_complete(self):
+        """Test that the same call can complete the session and build the profile."""
+        response = self.client.post(
+            self.bulk_url,
+            {'responses': self.make_responses(4), 'complete': True},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['session']['is_completed'])
+        self.assertEqual(len(response.data['session']['responses']), 4)
+        self.assertIn('profile', response.data)
+    
+    @override_settings(OPENAI_API_KEY='')
+    def test_failed_completion_saves_nothing(self):
+        """Test that the batch is rolled back with the completion, so a retry cannot duplicate it."""
+        with mock.patch('pedagogical.views.save_profile', side_effect=RuntimeError('analyse')):
+            response = self.client.post(
+                self.bulk_url,
+                {'responses': self.make_responses(4), 'complete': True},
+                format='json'
+            )
+        
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.session.refresh_from_db()
+        self.assertFalse(self.session.is_completed)
+        self.assertEqual(self.session.responses.count(), 0)
+        self.assertEqual(self.session.response_count, 0)
+        
+        response = self.client.post(
+            self.bulk_url,
+            {'responses': self.make_responses(4), 'complete': True},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.response_count, 4)
+    
+    def test_completed_session_is_checked_under_lock(self):
+        """Test that a session completed after it was loaded refuses the batch."""
+        def complete_meanwhile(instance):
+            EvaluationSession.objects.filter(pk=instance.pk).update(is_completed=True)
+            return EvaluationSession.objects.select_for_update().get(pk=instance.pk)
+        
+        with mock.patch(
+            'pedagogical.views.EvaluationSessionViewSet._lock_session',
+            autospec=True, side_effect=lambda view, instance: complete_meanwhile(instance)
+        ):
+            response = self.client.post(
+                self.bulk_url, {'responses': self.make_responses(2)}, format='json'
+            )
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.session.responses.count(), 0)
+    
+    def test_complete_given_as_string(self):
+        """Test that "false" does not complete the session, as sent by form clients."""
+        response = self.client.post(
+            self.bulk_url,
+            {'responses': self.make_responses(2), 'complete': 'false'},
+            format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.session.refresh_from_db()
+        self.assertFalse(self.session.is_completed)
+    
+    def test_invalid_item_rejects_whole_batch(self):
+        """Test that one invalid response rejects the batch without inserting."""
+        payload = self.make_responses(3)
+        del payload[1]['response_time_ms']
+        
+        response = self.client.post(self.bulk_url, {'responses': payload}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.session.responses.count(), 0)
+    
+    def test_only_session_owner_can_submit(self):
+        """Test that another user cannot submit responses to the session."""
+        formateur = User.objects.create_user(
+            username='formateur_test',
+            password='testpass123',
+            user_type='formateur'
+        )
+        self.client.force_authenticate(user=formateur)
+        
+        response = self.client.post(
+            self.bulk_url, {'responses': self.make_responses(1)}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(OPENAI_API_KEY='sk-test')
+class FeedbackCacheTests(APITestCase):
+    """Tests for the cache of AI feedback on question responses."""
+    
+    def setUp(self):
+        self.learners = [
+            User.objects.create_user(
+                username=f'apprenant_fb{i}', password='testpass123', user_type='apprenant'
+            )
+            for i in range(3)
+        ]
+        patcher = mock.patch(
+            'pedagogical.feedback.generate_ai_feedback',
+            return_value=('Relis bien l\'énoncé.', 80)
+        )
+        self.generate = patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def respond(self, learner, question='7 × 8 ?', answer='54', correct=False, time_ms=3000, attempts=1):
+        session = EvaluationSession.objects.create(learner=learner)
+        return QuestionResponse.objects.create(
+            session=session, question_id='q1', question_text=question,
+            competence_type='calcul', answer=answer, correct_answer='56',
+            is_correct=correct, response_time_ms=time_ms, attempts=attempts
+        )
+    
+    def feedback(self, response_obj, **data):
+        self.client.force_authenticate(user=response_obj.session.learner)
+        return self.client.post(
+            f'/api/question-responses/{response_obj.id}/generate_feedback/', data
+        )
+    
+    def test_same_answer_in_same_bucket_is_generated_once(self):
+        """Two learners with the same wrong answer and similar timing share the feedback."""
+        first = self.feedback(self.respond(self.learners[0], time_ms=3000))
+        second = self.feedback(self.respond(self.learners[1], answer=' 54', time_ms=4500))
+        
+        self.assertEqual(self.generate.call_count, 1)
+        self.assertEqual(first.data['cache'], 'miss')
+        self.assertEqual(second.data['cache'], 'hit')
+        self.assertEqual(second.data['feedback'], first.data['feedback'])
+        self.assertEqual(second.data['tokens_saved'], 80)
+        self.assertEqual(CachedFeedback.objects.get().hits, 1)
+    
+    def test_key_includes_buckets(self):
+        """Another time or attempts bucket gets its own feedback."""
+        self.feedback(self.respond(self.learners[0], time_ms=3000))
+        self.feedback(self.respond(self.learners[1], time_ms=40000))
+        self.feedback(self.respond(self.learners[2], attempts=2))
+        
+        self.assertEqual(self.generate.call_count, 3)
+    
+    def test_force_refresh_regenerates(self):
+        """force_refresh bypasses and replaces the cached feedback."""
+        response_obj = self.respond(self.learners[0])
+        self.feedback(response_obj)
+        
+        response = self.feedback(response_obj, force_refresh=True)
+        
+        self.assertEqual(self.generate.call_count, 2)
+        self.assertEqual(response.data['cache'], 'refresh')
+        self.assertEqual(CachedFeedback.objects.count(), 1)
+    
+    def test_sql_buckets_match_python_buckets(self):
+        """The buckets the precompute command groups by are the ones requests use."""
+        for time_ms, attempts in [(0, 1), (4999, 2), (5000, 3), (29999, 7), (30000, 0)]:
+            self.respond(self.learners[0], time_ms=time_ms, attempts=attempts)
+        
+        for row in QuestionResponse.objects.annotate(**feedback.bucket_annotations()):
+            self.assertEqual(row.time_bucket, feedback.time_bucket(row.response_time_ms))
+            self.assertEqual(row.attempts_bucket, feedback.attempts_bucket(row.attempts))
+    
+    def test_precompute_warms_most_common_wrong_answers(self):
+        """The command caches the frequent wrong answers, so requests skip the API."""
+        for learner in self.learners:
+            self.respond(learner, answer='54')
+        for learner in self.learners[:2]:
+            self.respond(learner, answer='48')
+        self.respond(self.learners[0], answer='63')  # Too rare
+        self.respond(self.learners[0], answer='56', correct=True)
+        self.respond(self.learners[1], question='9 × 6 ?', answer='56')
+        self.respond(self.learners[2], question='9 × 6 ?', answer='56')
+        out = io.StringIO()
+        
+        call_command('precompute_feedback', per_question=1, stdout=out)
+        
+        self.assertIn('Feedback préchauffé: 2, déjà en cache: 0, échecs: 0', out.getvalue())
+        answers = sorted(self.generate.call_args_list, key=lambda call: call.args[0]['question'])
+        self.assertEqual(
+            [(call.args[0]['question'], call.args[0]['student_answer']) for call in answers],
+            [('7 × 8 ?', '54'), ('9 × 6 ?', '56')]
+        )
+        response = self.feedback(self.respond(self.learners[1], answer='54'))
+        self.assertEqual(response.data['cache'], 'hit')
+        self.assertEqual(self.generate.call_count, 2)
+        
+        call_command('precompute_feedback', per_question=1, stdout=out)
+        self.assertIn('Feedback préchauffé: 0, déjà en cache: 2', out.getvalue())
+
+
+class SessionFeedbackTests(APITestCase):
+    """Tests for the batched feedback on a whole evaluation session."""
+    
+    def setUp(self):
+        self.apprenant = User.objects.create_user(
+            username='apprenant_session_fb', password='testpass123', user_type='apprenant'
+        )
+        self.session = EvaluationSession.objects.create(learner=self.apprenant)
+        self.url = f'/api/evaluation-sessions/{self.session.id}/feedback/'
+        self.client.force_authenticate(user=self.apprenant)
+        self.skipped = set()  # Response numbers the fake model leaves out
+        self.server = FakeLLMServer(self.answer).start()
+        self.addCleanup(self.server.stop)
+        llm_settings = override_settings(
+            OPENAI_API_KEY='sk-test', LLM_BASE_URL=self.server.url, LLM_RETRY_BASE_DELAY=0,
+            LLM_MAX_RETRIES=0, FEEDBACK_BATCH_SIZE=10
+        )
+        llm_settings.enable()
+        self.addCleanup(llm_settings.disable)
+        self.addCleanup(llm.reset)
+    
+    def answer(self, body):
+        prompt = body['messages'][-1]['content']
+        numbers = [int(n) for n in re.findall(r'^Réponse (\d+) :', prompt, re.MULTILINE)]
+        return json.dumps({'feedbacks': [
+            {'id': n, 'feedback': f'Feedback {n}'} for n in numbers if n not in self.skipped
+        ]})
+    
+    def respond(self, count, answer=lambda i: str(i)):
+        for i in range(count):
+            QuestionResponse.objects.create(
+                session=self.session, question_id=f'q{i}', question_text=f'Question {i} ?',
+                answer=answer(i), correct_answer='0', is_correct=False, response_time_ms=3000
+            )
+    
+    def test_whole_session_in_few_completions(self):
+        """20 responses take two completions and the feedback is stored on each."""
+        self.respond(20)
+        
+        response = self.client.post(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(response.data['completions'], 2)
+        self.assertEqual(len(response.data['responses']), 20)
+        self.assertEqual({item['cache'] for item in response.data['responses']}, {'miss'})
+        self.assertEqual(
+            [item['question_id'] for item in response.data['responses']],
+            [f'q{i}' for i in range(20)]
+        )
+        self.assertFalse(QuestionResponse.objects.filter(feedback='').exists())
+        self.assertEqual(CachedFeedback.objects.count(), 20)
+    
+    def test_identical_responses_are_asked_once(self):
+        """Responses with the same feedback key share one item of the batch."""
+        for _ in range(3):
+            QuestionResponse.objects.create(
+                session=self.session, question_id='q1', question_text='2 + 2 ?',
+                answer='5', correct_answer='4', is_correct=False, response_time_ms=3000
+            )
+        
+        response = self.client.post(self.url)
+        
+        prompt = self.server.requests[0]['messages'][-1]['content']
+        self.assertEqual(prompt.count('Réponse de l\'élève'), 1)
+        self.assertEqual(len({item['feedback'] for item in response.data['responses']}), 1)
+    
+    def test_stored_and_cached_feedback_is_reused(self):
+        """A second request, or another learner's cached feedback, needs no completion."""
+        self.respond(3)
+        self.client.post(self.url)
+        
+        again = self.client.post(self.url)
+        other = EvaluationSession.objects.create(learner=self.apprenant)
+        QuestionResponse.objects.create(
+            session=other, question_id='q0', question_text='Question 0 ?',
+            answer='0', correct_answer='0', is_correct=False, response_time_ms=3000
+        )
+        cached = self.client.post(f'/api/evaluation-sessions/{other.id}/feedback/')
+        
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual({item['cache'] for item in again.data['responses']}, {'stored'})
+        self.assertEqual(cached.data['responses'][0]['cache'], 'hit')
+        self.assertEqual(cached.data['completions'], 0)
+    
+    def test_force_refresh_regenerates(self):
+        """force_refresh ignores stored and cached feedback."""
+        self.respond(2)
+        self.client.post(self.url)
+        
+        response = self.client.post(self.url, {'force_refresh': True})
+        
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual({item['cache'] for item in response.data['responses']}, {'refresh'})
+    
+    def test_uncovered_responses_get_rule_based_feedback(self):
+        """Items missing from the answer, or a failed batch, fall back to rules."""
+        self.respond(2)
+        self.skipped = {2}
+        
+        response = self.client.post(self.url)
+        
+        self.assertEqual(
+            [item['cache'] for item in response.data['responses']], ['miss', 'fallback']
+        )
+        self.assertEqual(QuestionResponse.objects.filter(feedback='').count(), 1)
+        
+        self.server.fail(503)
+        with self.assertLogs('pedagogical', level='WARNING'):
+            response = self.client.post(self.url)
+        self.assertEqual(
+            [item['cache'] for item in response.data['responses']], ['stored', 'fallback']
+        )
+    
+    def test_api_error_in_one_batch_falls_back(self):
+        """A batch refused by the API (e.g. 401) gets rule-based feedback, not a 500."""
+        self.respond(20)
+        self.server.fail(401)
+        
+        with self.assertLogs('pedagogical.feedback', level='WARNING'):
+            response = self.client.post(self.url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        caches = [item['cache'] for item in response.data['responses']]
+        self.assertEqual((caches.count('miss'), caches.count('fallback')), (10, 10))
+    
+    @override_settings(LLM_MAX_CONCURRENCY=2)
+    def test_batches_share_the_llm_concurrency(self):
+        """Large sessions do not start one thread per batch."""
+        self.respond(50)
+        
+        with mock.patch('pedagogical.feedback.ThreadPoolExecutor', wraps=ThreadPoolExecutor) as pool:
+            response = self.client.post(self.url)
+        
+        self.assertEqual(response.data['completions'], 5)
+        self.assertEqual(pool.call_args.kwargs['max_workers'], 2)
+    
+    def test_other_learners_sessions_are_not_found(self):
+        """Learners only get feedback on their own sessions."""
+        self.respond(1)
+        other = User.objects.create_user(
+            username='apprenant_other_fb', password='testpass123', user_type='apprenant'
+        )
+        self.client.force_authenticate(user=other)
+        
+        self.assertEqual(self.client.post(self.url).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_empty_session_is_rejected(self):
+        """A session without responses has nothing to comment on."""
+        self.assertEqual(self.client.post(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(OPENAI_API_KEY='test-key', JOB_RETRY_DELAY=0)
+class SessionAnalysisJobTests(APITestCase):
+    """Tests for the queued AI analysis of completed sessions."""
+    
+    AI_ANALYSIS = {
+        'strengths': ['calcul', 'logique'],
+        'weaknesses': [],
+        'learning_style': 'logique',
+        'confidence_level': 'élevé',
+        'recommendations': ['Continuer'],
+    }
+    
+    def setUp(self):
+        """Set up a learner with a session ready to be completed."""
+        self.client = APIClient()
+        
+        self.apprenant = User.objects.create_user(
+            username='apprenant_test',
+            password='testpass123',
+            user_type='apprenant'
+        )
+        self.session = EvaluationSession.objects.create(learner=self.apprenant)
+        QuestionResponse.objects.create(
+            session=self.session, question_id='q1', question_text='Question',
+            competence_type='calcul', answer='A', correct_answer='A',
+            is_correct=True, response_time_ms=1000
+        )
+        self.client.force_authenticate(user=self.apprenant)
+    
+    def complete_session(self):
+        """Complete the session through the API."""
+        return self.client.post(f'/api/evaluation-sessions/{self.session.id}/complete/')
+    
+    def test_complete_returns_fallback_profile_and_job(self):
+        """Test that complete answers 202 with the rule-based profile and a queued job."""
+        with mock.patch('pedagogical.analysis.get_ai_analysis') as ai:
+            response = self.complete_session()
+            ai.assert_not_called()
+        
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['profile']['learning_style'], 'autonome et rapide')
+        self.assertEqual(response.data['job']['status'], 'pending')
+        
+        job_response = self.client.get(f"/api/jobs/{response.data['job']['id']}/")
+        self.assertEqual(job_response.status_code, status.HTTP_200_OK)
+    
+    def test_worker_replaces_profile_with_ai_analysis(self):
+        """Test that the worker runs the queued analysis and updates the profile."""
+        self.complete_session()
+        
+        with mock.patch('pedagogical.analysis.get_ai_analysis', return_value=self.AI_ANALYSIS):
+            self.assertEqual(run_pending_jobs(), 1)
+        
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'succeeded')
+        profile = CognitiveProfile.objects.get(learner=self.apprenant)
+        self.assertEqual(profile.learning_style, 'logique')
+    
+    def test_failing_job_is_retried_then_failed(self):
+        """Test that a failing analysis is retried and keeps the fallback profile."""
+        self.complete_session()
+        
+        with mock.patch('pedagogical.analysis.get_ai_analysis', side_effect=RuntimeError('timeout')):
+            with self.assertLogs('pedagogical.jobs', level='ERROR'):
+                run_pending_jobs()
+        
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, job.max_attempts)
+        self.assertIn('timeout', job.error)
+        profile = CognitiveProfile.objects.get(learner=self.apprenant)
+        self.assertEqual(profile.learning_style, 'autonome et rapide')
+    
+    def test_job_with_heartbeat_is_not_reclaimed(self):
+        """A slow job keeps its worker as long as heartbeats arrive."""
+        self.complete_session()
+        job = claim_next_job('worker-1')
+        self.assertEqual(job.attempts, 1)
+        
+        # Past the lock timeout, but with a recent heartbeat
+        Job.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        self.assertTrue(touch_job(job.pk, 'worker-1'))
+        self.assertIsNone(claim_next_job('worker-2'))
+        
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        reclaimed = claim_next_job('worker-2')
+        self.assertEqual((reclaimed.pk, reclaimed.worker, reclaimed.attempts), (job.pk, 'worker-2', 2))
+        self.assertFalse(touch_job(job.pk, 'worker-1'))
+    
+    def test_job_crashing_its_worker_ends_failed(self):
+        """A job abandoned on its last attempt is failed, not reclaimed again."""
+        self.complete_session()
+        for attempt in range(settings.JOB_MAX_ATTEMPTS):
+            job = claim_next_job(f'worker-{attempt}')
+            self.assertEqual(job.attempts, attempt + 1)
+            # The worker dies without recording anything
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        
+        self.assertIsNone(claim_next_job('worker-last'))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertIsNotNone(job.finished_at)
+    
+    @override_settings(JOB_HEARTBEAT_INTERVAL=0.01)
+    def test_heartbeats_are_sent_while_handler_runs(self):
+        """The worker sends heartbeats during a long handler."""
+        self.complete_session()
+        
+        def slow_analysis(indicators):
+            time.sleep(0.2)
+            return self.AI_ANALYSIS
+        
+        with mock.patch('pedagogical.analysis.get_ai_analysis', side_effect=slow_analysis), \
+                mock.patch('pedagogical.jobs.touch_job') as touch:
+            run_pending_jobs()
+        
+        self.assertGreater(touch.call_count, 1)
+        self.assertEqual(Job.objects.get().status, 'succeeded')
+    
+    def test_reclaimed_job_outcome_is_not_overwritten(self):
+        """A worker whose job was taken over does not record its outcome."""
+        self.complete_session()
+        job = claim_next_job('worker-1')
+        
+        def reclaim(indicators):
+            # worker-1 stalls past the lock timeout and worker-2 takes over
+            Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+            claim_next_job('worker-2')
+            return self.AI_ANALYSIS
+        
+        with mock.patch('pedagogical.analysis.get_ai_analysis', side_effect=reclaim):
+            with self.assertLogs('pedagogical.jobs', level='WARNING'):
+                self.assertIsNone(run_job(job))
+        
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker, job.attempts), ('running', 'worker-2', 2))
+        self.assertIsNone(job.finished_at)
+
+
+class SharedLLMClientTests(APITestCase):
+    """Tests for the shared LLM client, against the local fake OpenAI server."""
+    
+    QUIZ = {'questions': [{'question': 'Q ?', 'options': {'A': 'a'}, 'correct_answer': 'A'}]}
+    
+    def setUp(self):
+        self.server = FakeLLMServer(json.dumps(self.QUIZ)).start()
+        self.addCleanup(self.server.stop)
+        llm_settings = override_settings(
+            OPENAI_API_KEY='sk-test',
+            LLM_BASE_URL=self.server.url,
+            LLM_RETRY_BASE_DELAY=0,
+            LLM_MAX_RETRIES=2,
+            LLM_CIRCUIT_FAILURE_THRESHOLD=2
+        )
+        llm_settings.enable()
+        self.addCleanup(llm_settings.disable)
+        self.addCleanup(llm.reset)
+    
+    def ask(self):
+        return llm.chat_text([{'role': 'user', 'content': 'Bonjour'}])
+    
+    def test_connection_is_reused_across_calls(self):
+        """Consecutive calls share one keep-alive connection."""
+        for _ in range(3):
+            self.assertEqual(json.loads(self.ask()), self.QUIZ)
+        
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(len(self.server.connections), 1)
+    
+    def test_rate_limits_and_server_errors_are_retried(self):
+        """429 and 5xx answers are retried until the call succeeds."""
+        self.server.fail(429, 502)
+        
+        with self.assertLogs('pedagogical.llm', level='WARNING'):
+            self.ask()
+        
+        self.assertEqual(len(self.server.requests), 3)
+    
+    def test_client_errors_are_not_retried(self):
+        """A 400 answer is raised at once."""
+        self.server.fail(400)
+        
+        with self.assertRaises(openai.BadRequestError):
+            self.ask()
+        self.assertEqual(len(self.server.requests), 1)
+    
+    @override_settings(LLM_TIMEOUT=0.2, LLM_MAX_RETRIES=0)
+    def test_slow_answers_time_out(self):
+        """A call slower than LLM_TIMEOUT raises a timeout."""
+        self.server.delay = 1
+        
+        with self.assertRaises(openai.APITimeoutError):
+            self.ask()
+    
+    def test_circuit_opens_after_repeated_failures(self):
+        """Once open, the circuit fails fast without calling the API."""
+        self.server.fail(*[500] * 6)
+        with self.assertLogs('pedagogical.llm', level='WARNING'):
+            for _ in range(2):
+                with self.assertRaises(openai.InternalServerError):
+                    self.ask()
+        
+        with self.assertRaises(llm.LLMUnavailable):
+            self.ask()
+        self.assertEqual(llm.circuit_state(), 'open')
+        self.assertEqual(len(self.server.requests), 6)
+    
+    def test_half_open_circuit_lets_one_trial_through(self):
+        """After the reset timeout a single trial call decides the state."""
+        now = [0]
+        breaker = llm.CircuitBreaker(threshold=1, reset_timeout=30, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        
+        now[0] = 31
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, 'closed')
+    
+    @override_settings(LLM_CIRCUIT_FAILURE_THRESHOLD=1, LLM_CIRCUIT_RESET_TIMEOUT=0)
+    def test_unexpected_error_in_trial_does_not_block_circuit(self):
+        """A trial call failing with a non-API error still ends the trial."""
+        self.server.fail(*[500] * 3)
+        with self.assertLogs('pedagogical.llm', level='WARNING'):
+            with self.assertRaises(openai.InternalServerError):
+                self.ask()
+        self.assertEqual(llm.circuit_state(), 'half-open')
+        
+        backend = llm._state()[0]
+        with mock.patch.object(backend, 'complete', side_effect=KeyError('fixture')):
+            with self.assertRaises(KeyError):
+                self.ask()
+        
+        self.assertEqual(json.loads(self.ask()), self.QUIZ)
+        self.assertEqual(llm.circuit_state(), 'closed')
+    
+    def test_open_circuit_falls_back_to_rule_based_feedback(self):
+        """Feedback requests get the rule-based feedback while the API is down."""
+        learner = User.objects.create_user(
+            username='apprenant_llm', password='testpass123', user_type='apprenant'
+        )
+        session = EvaluationSession.objects.create(learner=learner)
+        response_obj = QuestionResponse.objects.create(
+            session=session, question_id='q1', question_text='2 + 2 ?',
+            competence_type='calcul', answer='5', correct_answer='4', is_correct=False,
+            response_time_ms=3000
+        )
+        self.client.force_authenticate(user=learner)
+        self.server.fail(*[503] * 6)
+        with self.assertLogs('pedagogical.llm', level='WARNING'):
+            for _ in range(2):
+                with self.assertRaises(openai.InternalServerError):
+                    self.ask()
+        
+        response = self.client.post(f'/api/question-responses/{response_obj.id}/generate_feedback/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['fallback'])
+        self.assertIn('4', response.data['feedback'])
+    
+    def test_quiz_generation_goes_through_shared_client(self):
+        """The quiz endpoint gets its questions from the configured server."""
+        formateur = User.objects.create_user(
+            username='formateur_llm', password='testpass123', user_type='formateur'
+        )
+        self.client.force_authenticate(user=formateur)
+        
+        response = self.client.post('/api/quiz/generate/', {'text': 'Un texte.', 'num_questions': 1})
+        
+        self.assertEqual(response.data['quiz'], self.QUIZ)
+        self.assertGreater(response.data['tokens_used'], 0)
+        self.assertEqual(self.server.requests[0]['model'], settings.LLM_MODEL)
+
+
+class LocalLLMBackendTests(APITestCase):
+    """Tests for the backend selection and the deterministic local backend."""
+    
+    TEXT = 'La photosynthèse transforme la lumière en énergie chimique dans les chloroplastes.'
+    
+    def setUp(self):
+        self.formateur = User.objects.create_user(
+            username='formateur_local', password='testpass123', user_type='formateur'
+        )
+        self.apprenant = User.objects.create_user(
+            username='apprenant_local', password='testpass123', user_type='apprenant'
+        )
+        self.use_backend()
+        self.addCleanup(llm.reset)
+        llm.clear_calls()
+        self.addCleanup(llm.clear_calls)
+    
+    def use_backend(self, **extra):
+        backend_settings = override_settings(
+            LLM_BACKEND='pedagogical.llm_backends.LocalBackend', OPENAI_API_KEY='',
+            JOB_RETRY_DELAY=0, **extra
+        )
+        backend_settings.enable()
+        self.addCleanup(backend_settings.disable)
+    
+    def generate(self, **extra):
+        self.client.force_authenticate(user=self.formateur)
+        return self.client.post('/api/quiz/generate/', {
+            'text': self.TEXT, 'num_questions': 3, **extra
+        })
+    
+    def test_quiz_generation_runs_offline_and_deterministically(self):
+        """Without an API key, the local backend answers valid, repeatable quizzes."""
+        first = self.generate()
+        second = self.generate(force_refresh=True)
+        
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first.data['quiz']['questions']), 3)
+        self.assertEqual(first.data['quiz'], second.data['quiz'])
+        self.assertIn('photosynthèse', first.data['quiz']['questions'][0]['question'])
+        self.assertTrue(GeneratedQuiz.objects.get().model.startswith('local:'))
+    
+    def test_every_call_records_tokens_and_latency(self):
+        """Calls are recorded per purpose, with the configured latency."""
+        self.use_backend(LLM_LOCAL_LATENCY=0.05)
+        
+        self.generate()
+        
+        call = llm.recent_calls()[-1]
+        self.assertEqual((call['backend'], call['purpose'], call['error']), ('local', 'quiz', None))
+        self.assertGreater(call['prompt_tokens'], 0)
+        self.assertGreater(call['completion_tokens'], 0)
+        self.assertGreaterEqual(call['latency_ms'], 50)
+        stats = llm.call_stats()['quiz']
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(stats['total_tokens'], call['total_tokens'])
+    
+    def test_streams_record_time_to_first_token(self):
+        """Streamed answers come word by word and record the first token latency."""
+        self.use_backend(LLM_LOCAL_TOKEN_LATENCY=0.001)
+        self.client.force_authenticate(user=self.formateur)
+        
+        response = self.client.post('/api/quiz/generate/stream/', {'text': self.TEXT, 'num_questions': 2})
+        body = b''.join(response.streaming_content).decode('utf-8')
+        
+        self.assertEqual(body.count('event: question'), 2)
+        call = llm.recent_calls()[-1]
+        self.assertLess(call['first_token_ms'], call['latency_ms'])
+        self.assertGreater(call['total_tokens'], 0)
+    
+    def test_fixtures_override_answers(self):
+        """LLM_LOCAL_FIXTURES maps a purpose to a fixed answer."""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump({'feedback': 'Feedback de démonstration.'}, f)
+        self.addCleanup(os.remove, f.name)
+        self.use_backend(LLM_LOCAL_FIXTURES=f.name)
+        session = EvaluationSession.objects.create(learner=self.apprenant)
+        response_obj = QuestionResponse.objects.create(
+            session=session, question_id='q1', question_text='2 + 2 ?',
+            answer='5', correct_answer='4', is_correct=False, response_time_ms=3000
+        )
+        self.client.force_authenticate(user=self.apprenant)
+        
+        response = self.client.post(f'/api/question-responses/{response_obj.id}/generate_feedback/')
+        
+        self.assertEqual(response.data['feedback'], 'Feedback de démonstration.')
+    
+    def test_session_pipeline_runs_offline(self):
+        """Batched feedback and the queued analysis both complete with the local backend."""
+        session = EvaluationSession.objects.create(learner=self.apprenant)
+        for i, is_correct in enumerate([True, False, True]):
+            QuestionResponse.objects.create(
+                session=session, question_id=f'q{i}', question_text=f'Question {i} ?',
+                competence_type='logique', answer='A', correct_answer='A' if is_correct else 'B',
+                is_correct=is_correct, response_time_ms=4000
+            )
+        self.client.force_authenticate(user=self.apprenant)
+        
+        feedback_response = self.client.post(f'/api/evaluation-sessions/{session.id}/feedback/')
+        complete_response = self.client.post(f'/api/evaluation-sessions/{session.id}/complete/')
+        
+        self.assertEqual(feedback_response.data['completions'], 1)
+        self.assertEqual({item['cache'] for item in feedback_response.data['responses']}, {'miss'})
+        self.assertEqual(complete_response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(run_pending_jobs(), 1)
+        profile = CognitiveProfile.objects.get(learner=self.apprenant)
+        self.assertEqual(profile.recommendations[0], 'Varier les types d\'exercices')
+        self.assertEqual(set(llm.call_stats()), {'feedback_batch', 'analysis'})
+    
+    def test_cached_answers_are_not_shared_across_backends(self):
+        """A quiz generated by the local backend is not served to the OpenAI backend."""
+        self.generate()
+        
+        with override_settings(LLM_BACKEND='pedagogical.llm_backends.OpenAIBackend', OPENAI_API_KEY='sk-test'):
+            with mock.patch(
+                'pedagogical.generation.generate_quiz', return_value=(json.dumps({'questions': []}), 10)
+            ) as generate:
+                response = self.generate()
+        
+        generate.assert_called_once()
+        self.assertEqual(response.data['cache'], 'miss')
+
+
+class CohortIndicatorsTests(APITestCase):
+    """Tests for the vectorized indicators and the recompute_profiles command."""
+    
+    COMPETENCES = ['logique', 'lecture', 'calcul', 'attention']
+    
+    def setUp(self):
+        self.learners = [
+            User.objects.create_user(
+                username=f'apprenant_cohorte_{index}', password='testpass123', user_type='apprenant'
+            )
+            for index in range(3)
+        ]
+        self.sessions = []
+        for index, learner in enumerate(self.learners):
+            session = EvaluationSession.objects.create(
+                learner=learner, is_completed=True, completed_at=timezone.now()
+            )
+            QuestionResponse.objects.bulk_create([
+                QuestionResponse(
+                    session=session,
+                    question_id=str(question),
+                    question_text=f'Question {question}',
+                    competence_type=self.COMPETENCES[(question * (index + 1)) % 4],
+                    answer='A',
+                    correct_answer='A' if (question + index) % 3 else 'B',
+                    is_correct=bool((question + index) % 3),
+                    response_time_ms=1000 + 1733 * question * (index + 1),
+                    attempts=1 + (question + index) % 2,
+                    help_used=question % 4 == index
+                )
+                for question in range(12)
+            ])
+            self.sessions.append(session)
+    
+    def python_indicators(self, responses):
+        """Per-session computation the vectorized one must reproduce."""
+        total = len(responses)
+        times = [r.response_time_ms for r in responses]
+        avg_time = sum(times) / total
+        by_competence = {}
+        for r in responses:
+            by_competence.setdefault(r.competence_type, []).append(r)
+        return {
+            'total_responses': total,
+            'overall_success_rate': sum(1 for r in responses if r.is_correct) / total * 100,
+            'average_response_time': avg_time,
+            'help_usage_rate': sum(1 for r in responses if r.help_used) / total * 100,
+            'by_competence': {
+                comp: {
+                    'count': len(items),
+                    'success_rate': sum(1 for r in items if r.is_correct) / len(items) * 100,
+                    'avg_time': sum(r.response_time_ms for r in items) / len(items),
+                    'help_rate': sum(1 for r in items if r.help_used) / len(items) * 100,
+                    'avg_attempts': sum(r.attempts for r in items) / len(items),
+                }
+                for comp, items in by_competence.items()
+            },
+            'response_time_variability': (
+                sum((t - avg_time) ** 2 for t in times) / total
+            ) ** 0.5,
+        }
+    
+    def assertIndicatorsEqual(self, actual, expected):
+        self.assertEqual(list(actual['by_competence']), list(expected['by_competence']))
+        for key in ('total_responses', 'overall_success_rate', 'average_response_time',
+                    'help_usage_rate', 'response_time_variability'):
+            self.assertAlmostEqual(actual[key], expected[key])
+        for comp, data in expected['by_competence'].items():
+            for key, value in data.items():
+                self.assertAlmostEqual(actual['by_competence'][comp][key], value)
+    
+    def test_vectorized_indicators_match_per_session_computation(self):
+        indicators = cohort.indicators_by_session(cohort.load_columns())
+        
+        self.assertEqual(set(indicators), {session.id for session in self.sessions})
+        for session in self.sessions:
+            expected = self.python_indicators(list(session.responses.order_by('created_at', 'id')))
+            self.assertIndicatorsEqual(indicators[session.id], expected)
+            # The running aggregates give the same indicators
+            self.assertIndicatorsEqual(
+                session_indicators(EvaluationSession.objects.get(pk=session.pk)), expected
+            )
+            # Plain Python numbers, so the indicators can be stored as JSON
+            json.dumps(indicators[session.id])
+    
+    def test_empty_columns(self):
+        self.assertEqual(cohort.indicators_by_session(cohort.load_columns([])), {})
+        empty = EvaluationSession.objects.create(learner=self.learners[0])
+        self.assertEqual(session_indicators(empty), {})
+    
+    def test_recompute_profiles_uses_latest_completed_session(self):
+        learner = self.learners[0]
+        older = self.sessions[0]
+        EvaluationSession.objects.filter(pk=older.pk).update(
+            completed_at=timezone.now() - timedelta(days=1)
+        )
+        # Not completed: ignored
+        EvaluationSession.objects.create(learner=learner)
+        latest = EvaluationSession.objects.create(
+            learner=learner, is_completed=True, completed_at=timezone.now()
+        )
+        QuestionResponse.objects.create(
+            session=latest, question_id='1', question_text='Q', competence_type='calcul',
+            answer='A', correct_answer='A', is_correct=True, response_time_ms=2000
+        )
+        out = io.StringIO()
+        call_command('recompute_profiles', stdout=out)
+        
+        self.assertIn('Profils recalculés: 3 (créés: 3, mis à jour: 0)', out.getvalue())
+        profile = CognitiveProfile.objects.get(learner=learner)
+        self.assertEqual(profile.last_evaluation_session, latest)
+        self.assertEqual(profile.strengths, ['calcul'])
+        self.assertEqual(profile.confidence_level, 'élevé')
+        self.assertEqual(profile.learning_style, 'autonome et rapide')
+        self.assertEqual(profile.analysis_data['total_responses'], 1)
+    
+    def test_recompute_profiles_updates_existing_profiles(self):
+        session = self.sessions[1]
+        profile = CognitiveProfile.objects.create(
+            learner=self.learners[1], strengths=['analyse IA'], learning_style='visuel'
+        )
+        before = profile.updated_at
+        
+        call_command('recompute_profiles', '--indicators-only', '--learner', str(self.learners[1].id),
+                     stdout=io.StringIO())
+        profile.refresh_from_db()
+        self.assertEqual(profile.strengths, ['analyse IA'])
+        self.assertEqual(profile.last_evaluation_session, session)
+        self.assertEqual(profile.analysis_data['total_responses'], 12)
+        self.assertGreater(profile.updated_at, before)
+        
+        # New thresholds apply to every recomputed profile
+        with mock.patch('pedagogical.analysis.STRENGTH_SUCCESS_RATE', 0):
+            call_command('recompute_profiles', '--batch-size', '2', stdout=io.StringIO())
+        profile.refresh_from_db()
+        expected = [
+            comp for comp, data in profile.analysis_data['by_competence'].items()
+            if data['success_rate'] > 0
+        ]
+        self.assertEqual(profile.strengths, expected[:2])
+        self.assertEqual(CognitiveProfile.objects.count(), 3)
+    
+    def test_dry_run_writes_nothing(self):
+        out = io.StringIO()
+        call_command('recompute_profiles', '--dry-run', stdout=out)
+        
+        self.assertIn('[simulation] Profils recalculés: 3', out.getvalue())
+        self.assertFalse(CognitiveProfile.objects.exists())
+
+
+class SessionAggregateTests(APITestCase):
+    """Tests for the running aggregates of evaluation sessions."""
+    
+    def setUp(self):
+        self.apprenant = User.objects.create_user(
+            username='apprenant_agregats', password='testpass123', user_type='apprenant'
+        )
+        self.formateur = User.objects.create_user(
+            username='formateur_agregats', password='testpass123', user_type='formateur'
+        )
+        self.session = EvaluationSession.objects.create(learner=self.apprenant)
+        self.client.force_authenticate(user=self.apprenant)
+    
+    def payload(self, index, competence='calcul'):
+        return {
+            'question_id': f'q{index}',
+            'question_text': f'Question {index}',
+            'competence_type': competence,
+            'answer': 'A',
+            'correct_answer': 'A' if index % 3 else 'B',
+            'is_correct': bool(index % 3),
+            'response_time_ms': 800 + 997 * index,
+            'attempts': 1 + index % 2,
+            'help_used': index % 4 == 0,
+        }
+    
+    def assertAggregatesMatchResponses(self):
+        self.session.refresh_from_db()
+        expected = cohort.indicators_by_session(cohort.load_columns([self.session.id])).get(
+            self.session.id, {}
+        )
+        actual = session_indicators(self.session)
+        self.assertEqual(list(actual.get('by_competence', {})), list(expected.get('by_competence', {})))
+        for key in ('total_responses', 'overall_success_rate', 'average_response_time',
+                    'help_usage_rate', 'response_time_variability'):
+            self.assertAlmostEqual(actual.get(key, 0), expected.get(key, 0), places=6)
+        for comp, data in expected.get('by_competence', {}).items():
+            for key, value in data.items():
+                self.assertAlmostEqual(actual['by_competence'][comp][key], value)
+    
+    def test_single_and_bulk_submissions_update_aggregates(self):
+        for index, competence in enumerate(['logique', 'calcul', 'logique']):
+            response = self.client.post(
+                '/api/question-responses/',
+                {'session': self.session.id, **self.payload(index, competence)},
+                format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertAggregatesMatchResponses()
+        
+        response = self.client.post(
+            f'/api/evaluation-sessions/{self.session.id}/responses/bulk/',
+            {'responses': [
+                self.payload(index, ['lecture', 'calcul'][index % 2]) for index in range(3, 9)
+            ]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertAggregatesMatchResponses()
+        self.assertEqual(
+            list(self.session.competence_stats.values_list('competence_type', flat=True)),
+            ['logique', 'calcul', 'lecture']
+        )
+    
+    def test_edit_and_delete_update_aggregates(self):
+        QuestionResponse.objects.bulk_create([
+            QuestionResponse(session=self.session, **self.payload(index, competence))
+            for index, competence in enumerate(['logique', 'calcul', 'attention', 'calcul'])
+        ])
+        edited = self.session.responses.get(question_id='q1')
+        edited.response_time_ms = 12000
+        edited.is_correct = True
+        edited.save()
+        self.assertAggregatesMatchResponses()
+        
+        self.session.responses.get(question_id='q2').delete()
+        self.assertAggregatesMatchResponses()
+        self.assertFalse(self.session.competence_stats.filter(competence_type='attention').exists())
+        
+        self.session.responses.all().delete()
+        self.session.refresh_from_db()
+        self.assertEqual(session_indicators(self.session), {})
+        self.assertEqual(self.session.response_time_m2, 0)
+        self.assertFalse(self.session.competence_stats.exists())
+    
+    def test_feedback_save_does_not_touch_aggregates(self):
+        QuestionResponse.objects.create(session=self.session, **self.payload(1))
+        response = self.session.responses.get()
+        
+        with mock.patch.object(EvaluationSession, 'apply_responses') as apply_responses:
+            response.feedback = 'Bravo'
+            response.save(update_fields=['feedback'])
+            response.help_type = 'indice'
+            response.save()
+        apply_responses.assert_not_called()
+    
+    def test_stale_session_save_keeps_aggregates(self):
+        stale = EvaluationSession.objects.get(pk=self.session.pk)
+        QuestionResponse.objects.create(session=self.session, **self.payload(1))
+        
+        stale.session_type = 'formative'
+        stale.save()
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.session_type, 'formative')
+        self.assertEqual(self.session.response_count, 1)
+    
+    def test_live_indicators_and_profile_from_aggregates(self):
+        QuestionResponse.objects.bulk_create([
+            QuestionResponse(session=self.session, **self.payload(index, 'logique'))
+            for index in range(1, 6)
+        ])
+        self.client.force_authenticate(user=self.formateur)
+        response = self.client.get(f'/api/evaluation-sessions/{self.session.id}/')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['num_responses'], 5)
+        self.assertEqual(response.data['indicators']['total_responses'], 5)
+        self.assertAlmostEqual(response.data['indicators']['overall_success_rate'], 80)
+        
+        listed = self.client.get('/api/evaluation-sessions/').data['results'][0]
+        self.assertEqual((listed['num_responses'], listed['success_rate']), (5, 80))
+        
+        self.client.force_authenticate(user=self.apprenant)
+        with override_settings(OPENAI_API_KEY=''):
+            with mock.patch(
+                'pedagogical.cohort.indicators_by_session', side_effect=AssertionError
+            ):
+                response = self.client.post(f'/api/evaluation-sessions/{self.session.id}/complete/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        profile = CognitiveProfile.objects.get(learner=self.apprenant)
+        self.assertEqual(profile.analysis_data['total_responses'], 5)
+        self.assertEqual(profile.strengths, ['logique'])
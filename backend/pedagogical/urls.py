@@ -3,8 +3,8 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterView, LoginView, UserViewSet, FileViewSet, ProgressViewSet,
-    DocumentUploadView, QuizGenerationView, QuizViewSet,
-    EvaluationSessionViewSet, QuestionResponseViewSet, CognitiveProfileViewSet
+    DocumentUploadView, DocumentTextView, QuizGenerationView, QuizGenerationStreamView,
+    QuizViewSet, EvaluationSessionViewSet, QuestionResponseViewSet, CognitiveProfileViewSet, JobViewSet
 )
 
 router = DefaultRouter()
@@ -15,12 +15,15 @@ router.register(r'quizzes', QuizViewSet)
 router.register(r'evaluation-sessions', EvaluationSessionViewSet)
 router.register(r'question-responses', QuestionResponseViewSet)
 router.register(r'cognitive-profiles', CognitiveProfileViewSet)
+router.register(r'jobs', JobViewSet)
 
 urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='register'),
     path('auth/login/', LoginView.as_view(), name='login'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('documents/upload/', DocumentUploadView.as_view(), name='document_upload'),
+    path('documents/<str:document_id>/text/', DocumentTextView.as_view(), name='document_text'),
     path('quiz/generate/', QuizGenerationView.as_view(), name='quiz_generate'),
+    path('quiz/generate/stream/', QuizGenerationStreamView.as_view(), name='quiz_generate_stream'),
     path('', include(router.urls)),
 ]
@@ -1,25 +1,47 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
+from django.db import transaction
+from django.db.models import (
+    Avg, Case, Count, DurationField, ExpressionWrapper, F, FloatField, OuterRef, Prefetch, Q,
+    Subquery, Value, When
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.conf import settings
+from django.core.cache import cache
 from .models import (
-    User, File, Progress, Quiz, QuizAssignment,
-    EvaluationSession, QuestionResponse, CognitiveProfile
+    User, File, Progress, LearnerProgressSummary, Quiz, QuizAssignment,
+    EvaluationSession, QuestionResponse, CognitiveProfile, Job
 )
 from .serializers import (
     UserSerializer, FileSerializer, ProgressSerializer, ProgressStatsSerializer,
     QuizSerializer, QuizAssignmentSerializer, QuizListSerializer,
-    EvaluationSessionSerializer, QuestionResponseSerializer, CognitiveProfileSerializer
+    EvaluationSessionSerializer, EvaluationSessionListSerializer, QuestionResponseSerializer,
+    QuestionResponseBulkSerializer, CognitiveProfileSerializer, JobSerializer
 )
-import os
+from .extraction import (
+    ExtractionBusy, ExtractionError, ExtractionTimeout, content_hash, extract_text_cached,
+    open_document, read_pages, store_document
+)
+from .feedback import fallback_feedback, feedback_context, get_feedback, session_feedback
+from .generation import generate_long_quiz, generate_quiz_cached, stream_quiz
+from .llm import LLMUnavailable, RETRYABLE_ERRORS, is_configured
+from .analysis import fallback_analysis, save_profile, session_indicators
+from .items import InvalidAnswers, item_report, record_attempt
+from .jobs import enqueue
+from .pagination import OptionalCursorPagination
+from .sse import event_stream_response, format_event
+from datetime import datetime, time
+import hashlib
 import json
-from PyPDF2 import PdfReader
-from docx import Document as DocxDocument
+import os
 import openai
 
 
@@ -189,32 +211,41 @@ class ProgressViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        progress_items = Progress.objects.filter(user=request.user)
-        
-        total_quizzes = progress_items.count()
-        completed_quizzes = progress_items.filter(completed=True).count()
-        
-        # Calculate average score as percentage
-        avg_score = 0
-        if total_quizzes > 0:
-            scores = progress_items.values_list('score', 'max_score')
-            percentages = [(score / max_score * 100) if max_score > 0 else 0 
-                          for score, max_score in scores]
-            avg_score = sum(percentages) / len(percentages) if percentages else 0
-        
-        completion_percentage = (completed_quizzes / total_quizzes * 100) if total_quizzes > 0 else 0
+        # Single primary-key read of the incrementally maintained summary
+        summary = LearnerProgressSummary.objects.filter(pk=request.user.pk).first()
+        if summary is None:
+            summary = LearnerProgressSummary(learner=request.user)
         
         stats_data = {
-            'total_quizzes': total_quizzes,
-            'completed_quizzes': completed_quizzes,
-            'average_score': round(avg_score, 2),
-            'completion_percentage': round(completion_percentage, 2),
+            'total_quizzes': summary.total_quizzes,
+            'completed_quizzes': summary.completed_quizzes,
+            'average_score': round(summary.average_score, 2),
+            'completion_percentage': round(summary.completion_percentage, 2),
         }
         
         serializer = ProgressStatsSerializer(stats_data)
         return Response(serializer.data)
 
 
+def extraction_error_response(error):
+    """Error response for a failed document extraction, the same on every endpoint."""
+    if isinstance(error, ExtractionTimeout):
+        return Response(
+            {'error': f'Extraction trop longue, document trop complexe: {str(error)}'},
+            status=status.HTTP_504_GATEWAY_TIMEOUT
+        )
+    if isinstance(error, (ExtractionBusy, ExtractionError)):
+        # Queue full or worker crashed: the pool is usable again on retry
+        return Response(
+            {'error': str(error)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return Response(
+        {'error': f'Erreur lors de l\'extraction du texte: {str(error)}'},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+
+
 class DocumentUploadView(APIView):
     """
     API endpoint for document upload and text extraction.
@@ -245,7 +276,7 @@ class DocumentUploadView(APIView):
         if file.size > settings.MAX_UPLOAD_SIZE:
             return Response(
                 {'error': f'Fichier trop volumineux. Taille maximale: {settings.MAX_UPLOAD_SIZE / (1024 * 1024)} MB'},
-                status=status.HTTP_400_BAD_REQUEST
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
             )
         
         # Check file extension
@@ -256,21 +287,25 @@ class DocumentUploadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Extract text based on file type
+        max_chars = request.data.get('max_chars', settings.MAX_TEXT_LENGTH_FOR_QUIZ)
         try:
-            if file_ext == '.pdf':
-                reader = PdfReader(file)
-                text = ''.join([page.extract_text() or '' for page in reader.pages])
-            elif file_ext == '.docx':
-                doc = DocxDocument(file)
-                text = '\n'.join([p.text for p in doc.paragraphs])
-            elif file_ext == '.txt':
-                text = file.read().decode('utf-8')
-            else:
-                return Response(
-                    {'error': 'Format non supporté'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            max_chars = int(max_chars)
+            if max_chars < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'max_chars doit être un entier positif'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Never more inline text than the generation endpoint accepts
+        max_chars = min(max_chars, settings.QUIZ_LONG_DOCUMENT_MAX_CHARS)
+        
+        # Extract text page by page, stopping once the budget is reached;
+        # a document uploaded before is served from the extraction cache
+        try:
+            document_id = content_hash(file)
+            extracted = extract_text_cached(file, file_ext, document_id, max_chars=max_chars)
+            text = extracted['text']
             
             # Check if text was extracted
             if not text or len(text.strip()) == 0:
@@ -279,18 +314,79 @@ class DocumentUploadView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            # Keep the document so the full text can be paged on request
+            store_document(file, file_ext, request.user, document_id)
+            
             return Response({
                 'text': text,
+                'truncated': extracted['truncated'],
+                'pages_read': extracted['pages_read'],
+                'document_id': document_id,
+                'cache': extracted['cache'],
                 'filename': file.name,
                 'size': file.size,
                 'message': 'Texte extrait avec succès'
             })
         
         except Exception as e:
+            return extraction_error_response(e)
+
+
+class DocumentTextView(APIView):
+    """
+    Paginated full text of a previously uploaded document.
+    Only the pages of the requested slice are extracted.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, document_id, format=None):
+        """Return `page_size` pages of text starting at `page` (1-based)."""
+        if request.user.user_type != 'formateur':
             return Response(
-                {'error': f'Erreur lors de l\'extraction du texte: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                {'error': 'Seuls les formateurs peuvent consulter les documents'},
+                status=status.HTTP_403_FORBIDDEN
             )
+        
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = int(request.query_params.get('page_size', settings.DOCUMENT_TEXT_PAGE_SIZE))
+            if page < 1 or page_size < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'page et page_size doivent être des entiers positifs'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        page_size = min(page_size, settings.DOCUMENT_TEXT_MAX_PAGE_SIZE)
+        
+        document = open_document(document_id, request.user)
+        if document is None:
+            return Response(
+                {'error': 'Document introuvable'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        file, file_ext = document
+        start = (page - 1) * page_size
+        try:
+            with file:
+                # One extra page tells whether a next page exists
+                pages = read_pages(file, file_ext, start, page_size + 1)
+        except Exception as e:
+            return extraction_error_response(e)
+        
+        has_next = len(pages) > page_size
+        pages = pages[:page_size]
+        return Response({
+            'document_id': document_id,
+            'page': page,
+            'page_size': page_size,
+            'next_page': page + 1 if has_next else None,
+            'pages': [
+                {'number': start + index + 1, 'text': text}
+                for index, text in enumerate(pages)
+            ],
+        })
 
 
 class QuizGenerationView(APIView):
@@ -299,11 +395,16 @@ class QuizGenerationView(APIView):
     """
     permission_classes = [permissions.IsAuthenticated]
     
-    def post(self, request, format=None):
-        """Generate quiz questions from provided text using OpenAI."""
+    def generation_input(self, request):
+        """
+        Validate a generation request.
+
+        Returns `(params, None)` with the text (truncated), num_questions,
+        long_document and force_refresh values, or `(None, error_response)`.
+        """
         # Check if user is a formateur
         if request.user.user_type != 'formateur':
-            return Response(
+            return None, Response(
                 {'error': 'Seuls les formateurs peuvent générer des quiz'},
                 status=status.HTTP_403_FORBIDDEN
             )
@@ -311,10 +412,30 @@ class QuizGenerationView(APIView):
         # Get text and number of questions from request
         text = request.data.get('text', '')
         num_questions = request.data.get('num_questions', 5)
+        long_document = str(request.data.get('long_document', '')).lower() in ('true', '1')
+        document_id = request.data.get('document_id')
+        
+        # In long-document mode the full text of an uploaded document can be used
+        if long_document and document_id and not text:
+            document = open_document(str(document_id), request.user)
+            if document is None:
+                return None, Response(
+                    {'error': 'Document introuvable'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            file, file_ext = document
+            try:
+                with file:
+                    text = extract_text_cached(
+                        file, file_ext, str(document_id),
+                        max_chars=settings.QUIZ_LONG_DOCUMENT_MAX_CHARS
+                    )['text']
+            except Exception as e:
+                return None, extraction_error_response(e)
         
         # Validate inputs
         if not text or len(text.strip()) == 0:
-            return Response(
+            return None, Response(
                 {'error': 'Aucun texte fourni'},
                 status=status.HTTP_400_BAD_REQUEST
             )
@@ -322,85 +443,75 @@ class QuizGenerationView(APIView):
         try:
             num_questions = int(num_questions)
             if num_questions < 1 or num_questions > 20:
-                return Response(
+                return None, Response(
                     {'error': 'Le nombre de questions doit être entre 1 et 20'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
         except (ValueError, TypeError):
-            return Response(
+            return None, Response(
                 {'error': 'Nombre de questions invalide'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if OpenAI API key is configured
-        if not settings.OPENAI_API_KEY:
-            return Response(
+        # Check that the LLM backend can be called (OpenAI API key set)
+        if not is_configured():
+            return None, Response(
                 {'error': 'Clé API OpenAI non configurée'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
-        # Limit text length to avoid excessive API costs
-        if len(text) > settings.MAX_TEXT_LENGTH_FOR_QUIZ:
-            text = text[:settings.MAX_TEXT_LENGTH_FOR_QUIZ]
+        # Limit text length to avoid excessive API costs; long documents are
+        # split into sections generated separately instead
+        max_length = (
+            settings.QUIZ_LONG_DOCUMENT_MAX_CHARS if long_document
+            else settings.MAX_TEXT_LENGTH_FOR_QUIZ
+        )
+        if len(text) > max_length:
+            text = text[:max_length]
         
-        # Generate quiz using OpenAI
+        force_refresh = str(request.data.get('force_refresh', '')).lower() in ('true', '1')
+        return {
+            'text': text,
+            'num_questions': num_questions,
+            'long_document': long_document,
+            'force_refresh': force_refresh,
+        }, None
+    
+    def post(self, request, format=None):
+        """Generate quiz questions from provided text using OpenAI."""
+        params, error = self.generation_input(request)
+        if error is not None:
+            return error
+        text = params['text']
+        num_questions = params['num_questions']
+        long_document = params['long_document']
+        force_refresh = params['force_refresh']
+        
+        # Generate quiz using OpenAI, or reuse a quiz generated from the same text
         try:
-            client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-            
-            prompt = f"""À partir du texte suivant, génère {num_questions} questions pédagogiques à choix multiples.
-
-Texte :
-\"\"\"{text}\"\"\"
-
-Pour chaque question, fournis :
-1. La question
-2. Quatre options de réponse (A, B, C, D)
-3. La bonne réponse (indiquer la lettre)
-4. Une brève explication
-
-Format de réponse en JSON :
-{{
-  "questions": [
-    {{
-      "question": "Texte de la question",
-      "options": {{
-        "A": "Option A",
-        "B": "Option B",
-        "C": "Option C",
-        "D": "Option D"
-      }},
-      "correct_answer": "A",
-      "explanation": "Explication de la bonne réponse"
-    }}
-  ]
-}}"""
-
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Tu es un assistant pédagogique qui génère des questions de quiz de haute qualité."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=2000
-            )
-            
-            # Extract the generated text
-            generated_text = response.choices[0].message.content
-            
-            # Try to parse as JSON
-            try:
-                quiz_data = json.loads(generated_text)
-                return Response({
-                    'quiz': quiz_data,
-                    'message': 'Quiz généré avec succès'
-                })
-            except json.JSONDecodeError:
-                # If not valid JSON, return as plain text
+            if long_document:
+                result = generate_long_quiz(text, num_questions, force_refresh=force_refresh)
+            else:
+                result = generate_quiz_cached(text, num_questions, force_refresh=force_refresh)
+            usage = {
+                'cache': result['cache'],
+                'tokens_used': result['tokens_used'],
+                'tokens_saved': result['tokens_saved'],
+            }
+            if long_document:
+                usage['sections'] = result['sections']
+            if 'quiz' in result:
                 return Response({
-                    'quiz_text': generated_text,
-                    'message': 'Quiz généré avec succès (format texte)'
+                    'quiz': result['quiz'],
+                    'message': 'Quiz généré avec succès',
+                    **usage
                 })
+            # If not valid JSON, return as plain text
+            return Response({
+                'quiz_text': result['quiz_text'],
+                'message': 'Quiz généré avec succès (format texte)',
+                **usage
+            })
         
         except openai.AuthenticationError:
             return Response(
@@ -412,6 +523,11 @@ Format de réponse en JSON :
                 {'error': 'Limite de taux dépassée pour l\'API OpenAI. Réessayez plus tard.'},
                 status=status.HTTP_429_TOO_MANY_REQUESTS
             )
+        except LLMUnavailable as e:
+            return Response(
+                {'error': f'{str(e)}. Réessayez dans quelques instants.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du quiz: {str(e)}'},
@@ -419,11 +535,84 @@ Format de réponse en JSON :
             )
 
 
+class QuizGenerationStreamView(QuizGenerationView):
+    """
+    Streaming variant of QuizGenerationView, as server-sent events.
+
+    Each question is sent in a `question` event as soon as it has been parsed
+    from the OpenAI token stream, followed by a `done` event with the cache
+    and token usage, or an `error` event. Served by ASGI, the first question
+    reaches the client long before the completion ends.
+    """
+    
+    def post(self, request, format=None):
+        """Stream quiz questions generated from provided text."""
+        if str(request.data.get('long_document', '')).lower() in ('true', '1'):
+            return Response(
+                {'error': 'Le mode document long n\'est pas disponible en streaming'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        params, error = self.generation_input(request)
+        if error is not None:
+            return error
+        return event_stream_response(request, self.events(params))
+    
+    def events(self, params):
+        """SSE messages for one generation; errors become an `error` event."""
+        count = 0
+        try:
+            for event, data in stream_quiz(
+                params['text'], params['num_questions'], force_refresh=params['force_refresh']
+            ):
+                if event == 'question':
+                    yield format_event('question', {'index': count, 'question': data})
+                    count += 1
+                else:
+                    yield format_event('done', {
+                        'count': count,
+                        'message': 'Quiz généré avec succès',
+                        **data
+                    })
+        except openai.AuthenticationError:
+            yield format_event('error', {
+                'error': 'Erreur d\'authentification avec l\'API OpenAI. Vérifiez votre clé API.',
+                'status': status.HTTP_401_UNAUTHORIZED
+            })
+        except openai.RateLimitError:
+            yield format_event('error', {
+                'error': 'Limite de taux dépassée pour l\'API OpenAI. Réessayez plus tard.',
+                'status': status.HTTP_429_TOO_MANY_REQUESTS
+            })
+        except LLMUnavailable as e:
+            yield format_event('error', {
+                'error': f'{str(e)}. Réessayez dans quelques instants.',
+                'status': status.HTTP_503_SERVICE_UNAVAILABLE
+            })
+        except Exception as e:
+            yield format_event('error', {
+                'error': f'Erreur lors de la génération du quiz: {str(e)}',
+                'status': status.HTTP_500_INTERNAL_SERVER_ERROR
+            })
+
+
 class QuizViewSet(viewsets.ModelViewSet):
     """ViewSet for Quiz model."""
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # The list is already scoped to the caller's own or assigned quizzes
+    # and the dashboards consume it whole
+    pagination_class = None
+    
+    # Sort keys accepted by the stats action, mapped to annotated columns
+    STATS_ORDERING_FIELDS = {
+        'assigned_at': 'assigned_at',
+        'learner_username': 'learner__username',
+        'completed_at': 'progress_completed_at',
+        'score': 'progress_score',
+        'percentage': 'progress_percentage',
+    }
+    STATS_MAX_PAGE_SIZE = 200
     
     def get_serializer_class(self):
         """Use simplified serializer for list view."""
@@ -436,20 +625,40 @@ class QuizViewSet(viewsets.ModelViewSet):
         Use IsFormateur permission for create, update, and delete.
         Use IsAuthenticated for list and retrieve.
         """
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'assign', 'unassign']:
             return [IsFormateur()]
         return [permissions.IsAuthenticated()]
     
     def get_queryset(self):
-        """Filter quizzes based on user type."""
-        queryset = Quiz.objects.all()
+        """Filter quizzes based on user type and preload what serializers read."""
+        queryset = Quiz.objects.select_related('created_by')
         
         # If user is formateur, show only their quizzes
         if self.request.user.user_type == 'formateur':
             queryset = queryset.filter(created_by=self.request.user)
         # If user is apprenant, show only assigned quizzes
         elif self.request.user.user_type == 'apprenant':
-            queryset = queryset.filter(assignments__learner=self.request.user)
+            # Semi-join so the assignment count annotation below is not skewed
+            queryset = queryset.filter(
+                id__in=QuizAssignment.objects.filter(
+                    learner=self.request.user
+                ).values('quiz_id')
+            )
+        
+        if self.action == 'list':
+            # The stored num_questions replaces the questions JSON in lists
+            queryset = queryset.defer('questions').annotate(
+                num_assigned_learners=Count('assignments')
+            )
+        elif self.action == 'stats':
+            queryset = queryset.defer('questions')
+        elif self.action in ['retrieve', 'update', 'partial_update']:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'assignments',
+                    queryset=QuizAssignment.objects.only('id', 'quiz_id', 'learner_id')
+                )
+            )
         
         return queryset
     
@@ -461,21 +670,21 @@ class QuizViewSet(viewsets.ModelViewSet):
         """Create a quiz and optionally assign it to learners."""
         # Extract learner_ids if provided
         learner_ids = request.data.get('learner_ids', [])
+        if not isinstance(learner_ids, list):
+            return Response(
+                {'error': 'learner_ids doit être une liste d\'identifiants'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Create the quiz
+        # Create the quiz and its assignments atomically
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        quiz = serializer.save(created_by=request.user)
-        
-        # Assign quiz to learners if provided
-        failed_assignments = []
-        if learner_ids:
-            for learner_id in learner_ids:
-                try:
-                    learner = User.objects.get(id=learner_id, user_type='apprenant')
-                    QuizAssignment.objects.create(quiz=quiz, learner=learner)
-                except User.DoesNotExist:
-                    failed_assignments.append(learner_id)
+        with transaction.atomic():
+            quiz = serializer.save(created_by=request.user)
+            failed_assignments = []
+            if learner_ids:
+                result = self._sync_assignments(quiz, learner_ids)
+                failed_assignments = result['failed_learner_ids']
         
         response_data = serializer.data
         if failed_assignments:
@@ -491,25 +700,23 @@ class QuizViewSet(viewsets.ModelViewSet):
         
         # Extract learner_ids if provided
         learner_ids = request.data.get('learner_ids', None)
+        if learner_ids is not None and not isinstance(learner_ids, list):
+            return Response(
+                {'error': 'learner_ids doit être une liste d\'identifiants'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Update the quiz
+        # Update the quiz and replace its assignments atomically
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        self.perform_update(serializer)
-        
-        # Update assignments if learner_ids is provided
-        failed_assignments = []
-        if learner_ids is not None:
-            # Remove existing assignments
-            instance.assignments.all().delete()
-            
-            # Create new assignments
-            for learner_id in learner_ids:
-                try:
-                    learner = User.objects.get(id=learner_id, user_type='apprenant')
-                    QuizAssignment.objects.create(quiz=instance, learner=learner)
-                except User.DoesNotExist:
-                    failed_assignments.append(learner_id)
+        with transaction.atomic():
+            self.perform_update(serializer)
+            failed_assignments = []
+            if learner_ids is not None:
+                result = self._sync_assignments(instance, learner_ids, replace=True)
+                failed_assignments = result['failed_learner_ids']
+                # Drop the assignments prefetched by get_queryset, now stale
+                instance._prefetched_objects_cache = {}
         
         response_data = serializer.data
         if failed_assignments:
@@ -517,6 +724,107 @@ class QuizViewSet(viewsets.ModelViewSet):
         
         return Response(response_data)
     
+    @action(detail=True, methods=['post'])
+    def assign(self, request, pk=None):
+        """Assign the quiz to a (possibly large) list of learners."""
+        quiz = self.get_object()
+        learner_ids = request.data.get('learner_ids')
+        if not isinstance(learner_ids, list):
+            return Response(
+                {'error': 'learner_ids doit être une liste d\'identifiants'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        with transaction.atomic():
+            result = self._sync_assignments(quiz, learner_ids)
+        return Response(result)
+    
+    @action(detail=True, methods=['post'])
+    def unassign(self, request, pk=None):
+        """Remove the quiz from a (possibly large) list of learners."""
+        quiz = self.get_object()
+        learner_ids = request.data.get('learner_ids')
+        if not isinstance(learner_ids, list):
+            return Response(
+                {'error': 'learner_ids doit être une liste d\'identifiants'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        ids, invalid = self._normalize_learner_ids(learner_ids)
+        with transaction.atomic():
+            removed = 0
+            if ids:
+                removed, _ = quiz.assignments.filter(learner_id__in=ids).delete()
+            if removed:
+                Quiz.invalidate_stats(quiz.id)
+            total_assigned = quiz.assignments.count()
+        
+        return Response({
+            'quiz_id': quiz.id,
+            'assigned': 0,
+            'unassigned': removed,
+            'total_assigned': total_assigned,
+            'failed_learner_ids': invalid,
+        })
+    
+    def _normalize_learner_ids(self, learner_ids):
+        """
+        Split raw learner ids into a set of integers and the invalid values.
+        Only integers and strings of digits are ids: int() would also turn
+        True into 1 and 2.9 into 2.
+        """
+        ids = set()
+        invalid = []
+        for learner_id in learner_ids:
+            if isinstance(learner_id, int) and not isinstance(learner_id, bool):
+                ids.add(learner_id)
+            elif isinstance(learner_id, str) and learner_id.isascii() and learner_id.isdigit():
+                ids.add(int(learner_id))
+            else:
+                invalid.append(learner_id)
+        return ids, invalid
+    
+    def _sync_assignments(self, quiz, learner_ids, replace=False):
+        """
+        Assign a quiz to learners with a constant number of queries.
+        
+        Resolves every learner in one ``id__in`` lookup, diffs the result
+        against the existing assignments and only inserts the missing rows.
+        With ``replace=True`` the assignments of learners absent from
+        ``learner_ids`` are removed in a single delete, so kept learners
+        retain their original ``assigned_at``. Must run inside a transaction.
+        """
+        ids, invalid = self._normalize_learner_ids(learner_ids)
+        valid_ids = set(
+            User.objects.filter(id__in=ids, user_type='apprenant').values_list('id', flat=True)
+        ) if ids else set()
+        failed = invalid + sorted(ids - valid_ids)
+        
+        existing_ids = set(quiz.assignments.order_by().values_list('learner_id', flat=True))
+        new_ids = valid_ids - existing_ids
+        QuizAssignment.objects.bulk_create(
+            [QuizAssignment(quiz=quiz, learner_id=learner_id) for learner_id in sorted(new_ids)],
+            ignore_conflicts=True
+        )
+        
+        removed = 0
+        if replace:
+            stale_ids = existing_ids - valid_ids
+            if stale_ids:
+                removed, _ = quiz.assignments.filter(learner_id__in=stale_ids).delete()
+        
+        # Bulk operations send no signals
+        if new_ids or removed:
+            Quiz.invalidate_stats(quiz.id)
+        
+        return {
+            'quiz_id': quiz.id,
+            'assigned': len(new_ids),
+            'unassigned': removed,
+            'total_assigned': len(existing_ids) + len(new_ids) - removed,
+            'failed_learner_ids': failed,
+        }
+    
     @action(detail=False, methods=['get'])
     def learners(self, request):
         """Get list of all learners (apprenants) for assignment."""
@@ -542,7 +850,7 @@ class QuizViewSet(viewsets.ModelViewSet):
         quiz = self.get_object()
         
         # Check if the quiz belongs to this formateur
-        if quiz.created_by != request.user:
+        if quiz.created_by_id != request.user.id:
             return Response(
                 {'error': 'Vous ne pouvez voir que les statistiques de vos propres quiz'},
                 status=status.HTTP_403_FORBIDDEN
@@ -550,53 +858,265 @@ class QuizViewSet(viewsets.ModelViewSet):
         
         # Default points per question for scoring
         DEFAULT_POINTS_PER_QUESTION = 10
+        num_questions = quiz.num_questions
+        default_max_score = num_questions * DEFAULT_POINTS_PER_QUESTION
         
-        # Get all learners assigned to this quiz
-        assignments = quiz.assignments.all()
-        learner_stats = []
+        ordering = request.query_params.get('ordering', '-assigned_at')
+        if ordering.lstrip('-') not in self.STATS_ORDERING_FIELDS:
+            return Response(
+                {'error': f'Tri invalide. Valeurs acceptées: {", ".join(self.STATS_ORDERING_FIELDS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        for assignment in assignments:
-            learner = assignment.learner
-            
-            # Get progress for this learner on this quiz
-            progress = Progress.objects.filter(
-                user=learner,
-                quiz=quiz
-            ).first()
-            
-            learner_data = {
-                'learner_id': learner.id,
-                'learner_username': learner.username,
-                'learner_name': f"{learner.first_name} {learner.last_name}".strip() or learner.username,
-                'assigned_at': assignment.assigned_at,
-                'completed': progress.completed if progress else False,
-                'completed_at': progress.completed_at if progress else None,
-                'score': progress.score if progress else 0,
-                'max_score': progress.max_score if progress else quiz.num_questions * DEFAULT_POINTS_PER_QUESTION,
-                'percentage': progress.percentage if progress else 0,
-            }
-            learner_stats.append(learner_data)
+        # One query: assignments LEFT JOIN the latest progress of each learner
+        rows = self._annotate_learner_stats(quiz.assignments.all(), default_max_score)
         
-        # Calculate overall statistics
-        total_assigned = len(learner_stats)
-        total_completed = sum(1 for stat in learner_stats if stat['completed'])
+        summary = rows.aggregate(
+            total_assigned=Count('id'),
+            total_completed=Count('id', filter=Q(progress_completed=True)),
+            average_score=Avg('progress_percentage', filter=Q(progress_completed=True)),
+        )
+        total_assigned = summary['total_assigned']
+        total_completed = summary['total_completed']
         completion_rate = (total_completed / total_assigned * 100) if total_assigned > 0 else 0
+        average_score = summary['average_score'] or 0
+        
+        field = ordering.lstrip('-')
+        descending = ordering.startswith('-')
+        order_expression = F(self.STATS_ORDERING_FIELDS[field])
+        order_expression = (
+            order_expression.desc(nulls_last=True) if descending
+            else order_expression.asc(nulls_last=True)
+        )
+        rows = rows.order_by(order_expression, 'id')
         
-        # Calculate average score for completed quizzes
-        completed_scores = [stat['percentage'] for stat in learner_stats if stat['completed']]
-        average_score = sum(completed_scores) / len(completed_scores) if completed_scores else 0
-        
-        return Response({
+        response_data = {
             'quiz_id': quiz.id,
             'quiz_title': quiz.title,
             'quiz_subject': quiz.subject,
-            'num_questions': quiz.num_questions,
+            'num_questions': num_questions,
             'total_assigned': total_assigned,
             'total_completed': total_completed,
             'completion_rate': round(completion_rate, 2),
             'average_score': round(average_score, 2),
-            'learner_stats': learner_stats
+        }
+        
+        # Optional pagination of the per-learner rows
+        page_size = request.query_params.get('page_size')
+        if page_size is not None:
+            try:
+                page = max(int(request.query_params.get('page', 1)), 1)
+                page_size = min(max(int(page_size), 1), self.STATS_MAX_PAGE_SIZE)
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': 'Paramètres de pagination invalides'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            offset = (page - 1) * page_size
+            rows = rows[offset:offset + page_size]
+            response_data['pagination'] = {
+                'page': page,
+                'page_size': page_size,
+                'total_pages': (total_assigned + page_size - 1) // page_size,
+                'count': total_assigned,
+            }
+        
+        response_data['learner_stats'] = [
+            {
+                'learner_id': row['learner_id'],
+                'learner_username': row['learner__username'],
+                'learner_name': f"{row['learner__first_name']} {row['learner__last_name']}".strip() or row['learner__username'],
+                'assigned_at': row['assigned_at'],
+                'completed': bool(row['progress_completed']),
+                'completed_at': row['progress_completed_at'],
+                'score': row['progress_score'],
+                'max_score': row['progress_max_score'],
+                'percentage': round(row['progress_percentage'], 2),
+            }
+            for row in rows.values(
+                'learner_id', 'learner__username', 'learner__first_name', 'learner__last_name',
+                'assigned_at', 'progress_completed', 'progress_completed_at',
+                'progress_score', 'progress_max_score', 'progress_percentage'
+            )
+        ]
+        
+        return Response(response_data)
+    
+    @action(detail=True, methods=['post'])
+    def submit(self, request, pk=None):
+        """Record a learner's answers to every question, with their progress entry."""
+        if request.user.user_type != 'apprenant':
+            return Response(
+                {'error': 'Seuls les apprenants peuvent répondre aux quiz'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        # Only assigned quizzes are found for learners
+        quiz = self.get_object()
+        answers = request.data if isinstance(request.data, list) else request.data.get('answers')
+        try:
+            progress = record_attempt(quiz, request.user, answers)
+        except InvalidAnswers as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'progress': ProgressSerializer(progress).data,
+            'answers': [
+                {
+                    'question_index': answer.question_index,
+                    'answer': answer.answer,
+                    'is_correct': answer.is_correct,
+                }
+                for answer in progress.answers.all()
+            ],
+        }, status=status.HTTP_201_CREATED)
+    
+    @action(detail=True, methods=['get'])
+    def items(self, request, pk=None):
+        """Get the item analysis of each question of a quiz (for formateurs)."""
+        if request.user.user_type != 'formateur':
+            return Response(
+                {'error': 'Seuls les formateurs peuvent accéder à cette ressource'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        quiz = self.get_object()
+        if quiz.created_by_id != request.user.id:
+            return Response(
+                {'error': 'Vous ne pouvez voir que les statistiques de vos propres quiz'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response({
+            'quiz_id': quiz.id,
+            'quiz_title': quiz.title,
+            'items': item_report(quiz),
         })
+    
+    @action(detail=False, methods=['get'])
+    def overview(self, request):
+        """Get completion, average score and at-risk learners of all the formateur's quizzes."""
+        if request.user.user_type != 'formateur':
+            return Response(
+                {'error': 'Seuls les formateurs peuvent accéder à cette ressource'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        quizzes = list(
+            Quiz.objects.filter(created_by=request.user)
+            .values('id', 'title', 'subject', 'num_questions', 'updated_at', 'stats_version')
+        )
+        threshold = settings.QUIZ_AT_RISK_PERCENTAGE
+        
+        # Any progress or assignment change bumps its quiz's stats_version, so
+        # the key changes and a stale overview is never served
+        fingerprint = json.dumps(
+            [threshold] + [
+                [quiz['id'], quiz['stats_version'], quiz['updated_at'].isoformat()]
+                for quiz in quizzes
+            ]
+        )
+        cache_key = (
+            f'quiz_overview:{request.user.id}:'
+            f'{hashlib.sha256(fingerprint.encode()).hexdigest()}'
+        )
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response({**data, 'cache': 'hit'})
+        
+        data = self._compute_overview(request.user, quizzes, threshold)
+        cache.set(cache_key, data, settings.QUIZ_OVERVIEW_CACHE_TTL)
+        return Response({**data, 'cache': 'miss'})
+    
+    def _compute_overview(self, formateur, quizzes, threshold):
+        """
+        Build the overview with one grouped query over the formateur's
+        assignments, plus one for the at-risk learners.
+        """
+        # Learners without progress have a score of 0 whatever the maximum
+        rows = self._annotate_learner_stats(
+            QuizAssignment.objects.filter(quiz__created_by=formateur), 0
+        )
+        totals = {
+            row['quiz_id']: row
+            for row in rows.order_by().values('quiz_id').annotate(
+                total_assigned=Count('id'),
+                total_completed=Count('id', filter=Q(progress_completed=True)),
+                average_score=Avg('progress_percentage', filter=Q(progress_completed=True)),
+            )
+        }
+        at_risk = {}
+        at_risk_rows = rows.filter(
+            progress_completed=True, progress_percentage__lt=threshold
+        ).order_by('quiz_id', 'progress_percentage', 'id').values(
+            'quiz_id', 'learner_id', 'learner__username', 'learner__first_name',
+            'learner__last_name', 'progress_completed_at', 'progress_percentage'
+        )
+        for row in at_risk_rows:
+            at_risk.setdefault(row['quiz_id'], []).append({
+                'learner_id': row['learner_id'],
+                'learner_username': row['learner__username'],
+                'learner_name': f"{row['learner__first_name']} {row['learner__last_name']}".strip() or row['learner__username'],
+                'completed_at': row['progress_completed_at'],
+                'percentage': round(row['progress_percentage'], 2),
+            })
+        
+        overview = []
+        for quiz in quizzes:
+            row = totals.get(quiz['id'], {})
+            total_assigned = row.get('total_assigned', 0)
+            total_completed = row.get('total_completed', 0)
+            completion_rate = (total_completed / total_assigned * 100) if total_assigned > 0 else 0
+            overview.append({
+                'quiz_id': quiz['id'],
+                'quiz_title': quiz['title'],
+                'quiz_subject': quiz['subject'],
+                'num_questions': quiz['num_questions'],
+                'total_assigned': total_assigned,
+                'total_completed': total_completed,
+                'completion_rate': round(completion_rate, 2),
+                'average_score': round(row.get('average_score') or 0, 2),
+                'at_risk_learners': at_risk.get(quiz['id'], []),
+            })
+        return {'at_risk_threshold': threshold, 'quizzes': overview}
+    
+    def _annotate_learner_stats(self, assignments, default_max_score):
+        """
+        Annotate assignments with the latest progress of their learner.
+        
+        Mirrors ``Progress.objects.filter(user=..., quiz=...).first()`` with
+        correlated subqueries so the whole table is produced by one query.
+        Learners without progress get a score of 0 out of ``default_max_score``.
+        """
+        latest_progress = Progress.objects.filter(
+            user=OuterRef('learner_id'),
+            quiz=OuterRef('quiz_id')
+        ).order_by('-updated_at', '-id')
+        
+        return assignments.annotate(
+            progress_completed=Coalesce(
+                Subquery(latest_progress.values('completed')[:1]), Value(False)
+            ),
+            progress_completed_at=Subquery(latest_progress.values('completed_at')[:1]),
+            progress_score=Coalesce(
+                Subquery(latest_progress.values('score')[:1]), Value(0)
+            ),
+            progress_max_score=Coalesce(
+                Subquery(latest_progress.values('max_score')[:1]), Value(default_max_score)
+            ),
+        ).annotate(
+            progress_percentage=Case(
+                When(
+                    progress_max_score__gt=0,
+                    then=ExpressionWrapper(
+                        F('progress_score') * 100.0 / F('progress_max_score'),
+                        output_field=FloatField()
+                    )
+                ),
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+        )
 
 
 class EvaluationSessionViewSet(viewsets.ModelViewSet):
@@ -605,12 +1125,37 @@ class EvaluationSessionViewSet(viewsets.ModelViewSet):
     serializer_class = EvaluationSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    # Upper bound on the number of responses accepted by one bulk submission
+    MAX_BULK_RESPONSES = 100
+    
+    def get_serializer_class(self):
+        """Use the summary serializer for list view."""
+        if self.action == 'list':
+            return EvaluationSessionListSerializer
+        return EvaluationSessionSerializer
+    
     def get_queryset(self):
-        """Filter sessions based on user type."""
+        """Filter sessions based on user type and preload what serializers read."""
+        queryset = EvaluationSession.objects.select_related('learner')
         if self.request.user.user_type == 'apprenant':
-            return EvaluationSession.objects.filter(learner=self.request.user)
+            queryset = queryset.filter(learner=self.request.user)
         # Formateurs can see all sessions
-        return EvaluationSession.objects.all()
+        
+        if self.action == 'list':
+            queryset = queryset.annotate(
+                # Running aggregates: no join on the responses
+                num_responses=F('response_count'),
+                num_correct=F('correct_count'),
+                duration=ExpressionWrapper(
+                    F('completed_at') - F('started_at'),
+                    output_field=DurationField()
+                ),
+            )
+        elif self.action == 'retrieve':
+            queryset = queryset.prefetch_related('responses', 'competence_stats')
+        # complete and bulk_responses reload the session under a lock
+        
+        return queryset
     
     def perform_create(self, serializer):
         """Set the learner field to the current user if apprenant."""
@@ -624,211 +1169,161 @@ class EvaluationSessionViewSet(viewsets.ModelViewSet):
         """Complete an evaluation session and trigger analysis."""
         session = self.get_object()
         
+        try:
+            with transaction.atomic():
+                session = self._lock_session(session)
+                if session.is_completed:
+                    return Response(
+                        {'error': 'Cette session est déjà terminée'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                profile, job = self._complete_session(session)
+        except Exception as e:
+            return Response(
+                {'error': f'Erreur lors de l\'analyse: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        return self._completion_response(session, profile, job)
+    
+    @action(detail=True, methods=['post'], url_path='responses/bulk')
+    def bulk_responses(self, request, pk=None):
+        """Record a batch of question responses, optionally completing the session."""
+        session = self.get_object()
+        
+        # Ownership is checked once for the whole batch
+        if session.learner_id != request.user.id:
+            return Response(
+                {'error': 'Vous ne pouvez répondre que dans vos propres sessions'},
+                status=status.HTTP_403_FORBIDDEN
+            )
         if session.is_completed:
             return Response(
                 {'error': 'Cette session est déjà terminée'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        session.completed_at = timezone.now()
-        session.is_completed = True
-        session.save()
+        if isinstance(request.data, list):
+            items, complete = request.data, False
+        else:
+            items = request.data.get('responses')
+            complete = str(request.data.get('complete', '')).lower() in ('true', '1')
+        if not isinstance(items, list) or not items:
+            return Response(
+                {'error': 'Une liste non vide de réponses est requise'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.MAX_BULK_RESPONSES:
+            return Response(
+                {'error': f'Maximum {self.MAX_BULK_RESPONSES} réponses par envoi'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Trigger cognitive profile analysis
+        serializer = QuestionResponseBulkSerializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        # The responses and the completion are committed together: a failed
+        # completion saves nothing, so retrying the batch cannot duplicate it
         try:
-            profile = self._analyze_session(session)
-            serializer = self.get_serializer(session)
-            return Response({
-                'session': serializer.data,
-                'profile': CognitiveProfileSerializer(profile).data,
-                'message': 'Session complétée et profil cognitif généré'
-            })
+            with transaction.atomic():
+                session = self._lock_session(session)
+                if session.is_completed:
+                    return Response(
+                        {'error': 'Cette session est déjà terminée'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                created = QuestionResponse.objects.bulk_create([
+                    QuestionResponse(session=session, **item)
+                    for item in serializer.validated_data
+                ])
+                if complete:
+                    profile, job = self._complete_session(session)
         except Exception as e:
             return Response(
-                {'error': f'Erreur lors de l\'analyse: {str(e)}'},
+                {'error': f'Erreur lors de l\'enregistrement des réponses: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _analyze_session(self, session):
-        """Analyze evaluation session using OpenAI and generate cognitive profile."""
-        responses = session.responses.all()
-        
-        # Calculate cognitive indicators
-        indicators = self._calculate_indicators(responses)
         
-        # Use OpenAI to analyze and generate pedagogical insights
-        if settings.OPENAI_API_KEY:
-            try:
-                ai_analysis = self._get_ai_analysis(indicators, responses)
-            except Exception as e:
-                # Fallback to rule-based analysis if AI fails
-                ai_analysis = self._fallback_analysis(indicators)
-        else:
-            ai_analysis = self._fallback_analysis(indicators)
-        
-        # Create or update cognitive profile
-        profile, created = CognitiveProfile.objects.update_or_create(
-            learner=session.learner,
-            defaults={
-                'strengths': ai_analysis.get('strengths', []),
-                'weaknesses': ai_analysis.get('weaknesses', []),
-                'learning_style': ai_analysis.get('learning_style', ''),
-                'confidence_level': ai_analysis.get('confidence_level', 'moyen'),
-                'recommendations': ai_analysis.get('recommendations', []),
-                'analysis_data': indicators,
-                'last_evaluation_session': session
-            }
-        )
+        if complete:
+            return self._completion_response(session, profile, job)
         
-        return profile
+        return Response({
+            'session': session.id,
+            'created': len(created),
+            'message': 'Réponses enregistrées'
+        }, status=status.HTTP_201_CREATED)
     
-    def _calculate_indicators(self, responses):
-        """Calculate cognitive indicators from responses."""
-        if not responses:
-            return {}
-        
-        # Group by competence type
-        by_competence = {}
-        for resp in responses:
-            comp = resp.competence_type
-            if comp not in by_competence:
-                by_competence[comp] = []
-            by_competence[comp].append(resp)
-        
-        # Calculate indicators
-        indicators = {
-            'total_responses': len(responses),
-            'overall_success_rate': sum(1 for r in responses if r.is_correct) / len(responses) * 100,
-            'average_response_time': sum(r.response_time_ms for r in responses) / len(responses),
-            'help_usage_rate': sum(1 for r in responses if r.help_used) / len(responses) * 100,
-            'by_competence': {}
-        }
-        
-        # Competence-specific indicators
-        for comp, comp_responses in by_competence.items():
-            indicators['by_competence'][comp] = {
-                'count': len(comp_responses),
-                'success_rate': sum(1 for r in comp_responses if r.is_correct) / len(comp_responses) * 100,
-                'avg_time': sum(r.response_time_ms for r in comp_responses) / len(comp_responses),
-                'help_rate': sum(1 for r in comp_responses if r.help_used) / len(comp_responses) * 100,
-                'avg_attempts': sum(r.attempts for r in comp_responses) / len(comp_responses)
-            }
-        
-        # Response time variability
-        times = [r.response_time_ms for r in responses]
-        avg_time = sum(times) / len(times)
-        variance = sum((t - avg_time) ** 2 for t in times) / len(times)
-        indicators['response_time_variability'] = variance ** 0.5
-        
-        return indicators
-    
-    def _get_ai_analysis(self, indicators, responses):
-        """Use OpenAI to generate pedagogical insights."""
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        # Prepare data summary for AI
-        summary = {
-            'total_questions': indicators['total_responses'],
-            'success_rate': round(indicators['overall_success_rate'], 2),
-            'avg_response_time_seconds': round(indicators['average_response_time'] / 1000, 2),
-            'help_usage': round(indicators['help_usage_rate'], 2),
-            'competences': indicators['by_competence']
-        }
+    @action(detail=True, methods=['post'])
+    def feedback(self, request, pk=None):
+        """Generate the feedback on every response of the session in batched AI calls."""
+        session = self.get_object()
         
-        prompt = f"""En tant qu'expert pédagogique, analyse ces résultats d'évaluation diagnostique d'un élève.
-
-Données d'évaluation :
-{json.dumps(summary, indent=2, ensure_ascii=False)}
-
-Consignes STRICTES :
-1. Tu dois formuler des HYPOTHÈSES PÉDAGOGIQUES, JAMAIS de diagnostics médicaux
-2. Identifie OBLIGATOIREMENT au moins 2 forces cognitives
-3. Identifie les fragilités possibles (pas plus de 3)
-4. Propose un style d'apprentissage (visuel/logique/guidé)
-5. Donne 3-4 recommandations pédagogiques concrètes
-
-Format de réponse JSON STRICTEMENT :
-{{
-  "strengths": ["force1", "force2"],
-  "weaknesses": ["fragilité1", "fragilité2"],
-  "learning_style": "style d'apprentissage",
-  "confidence_level": "faible|moyen|élevé",
-  "recommendations": ["recommandation1", "recommandation2", "recommandation3"],
-  "reasoning": "Explication brève de l'analyse"
-}}"""
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Tu es un expert pédagogique qui analyse les performances d'élèves pour identifier leurs forces et adapter l'enseignement. Tu ne poses JAMAIS de diagnostic médical."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=1000
-        )
+        if not is_configured():
+            return Response(
+                {'error': 'OpenAI API non configurée'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         
-        ai_text = response.choices[0].message.content
+        responses = list(session.responses.order_by('created_at', 'id'))
+        if not responses:
+            return Response(
+                {'error': 'Aucune réponse dans cette session'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
+        force_refresh = str(request.data.get('force_refresh', '')).lower() in ('true', '1')
         try:
-            return json.loads(ai_text)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown code blocks
-            if '```json' in ai_text:
-                ai_text = ai_text.split('```json')[1].split('```')[0].strip()
-            elif '```' in ai_text:
-                ai_text = ai_text.split('```')[1].split('```')[0].strip()
-            return json.loads(ai_text)
-    
-    def _fallback_analysis(self, indicators):
-        """Rule-based analysis as fallback."""
-        by_comp = indicators.get('by_competence', {})
-        
-        # Identify strengths (success rate > 70%)
-        strengths = [
-            comp for comp, data in by_comp.items()
-            if data['success_rate'] > 70
-        ]
-        
-        # Identify weaknesses (success rate < 50%)
-        weaknesses = [
-            comp for comp, data in by_comp.items()
-            if data['success_rate'] < 50
-        ]
+            result = session_feedback(responses, force_refresh=force_refresh)
+        except Exception as e:
+            return Response(
+                {'error': f'Erreur lors de la génération du feedback: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response({'session': session.id, **result})
+    
+    def _lock_session(self, session):
+        """
+        Reload the session locked until the end of the current transaction,
+        so concurrent submissions and completions of it run one at a time.
+        """
+        return EvaluationSession.objects.select_for_update().get(pk=session.pk)
+    
+    def _complete_session(self, session):
+        """
+        Mark a session as completed and write the rule-based profile right away.
+        The AI analysis, when configured, is queued for the run_jobs worker.
+        Must run inside the caller's transaction; errors propagate so that it
+        rolls back. Returns `(profile, job)`.
+        """
+        session.completed_at = timezone.now()
+        session.is_completed = True
+        session.save()
         
-        # Determine learning style
-        help_rate = indicators.get('help_usage_rate', 0)
-        avg_time = indicators.get('average_response_time', 0)
+        # Aggregates may have changed since the session was loaded (bulk submission)
+        session.refresh_from_db()
+        indicators = session_indicators(session)
+        profile = save_profile(session, fallback_analysis(indicators), indicators)
         
-        if help_rate < 20 and avg_time < 10000:
-            learning_style = "autonome et rapide"
-        elif help_rate > 50:
-            learning_style = "guidé avec étayage"
-        else:
-            learning_style = "équilibré"
-        
-        # Confidence level
-        success_rate = indicators.get('overall_success_rate', 0)
-        if success_rate > 70:
-            confidence = 'élevé'
-        elif success_rate > 50:
-            confidence = 'moyen'
-        else:
-            confidence = 'faible'
-        
-        return {
-            'strengths': strengths[:2] if strengths else ['persévérance'],
-            'weaknesses': weaknesses[:3],
-            'learning_style': learning_style,
-            'confidence_level': confidence,
-            'recommendations': [
-                f"Valoriser les compétences en {strengths[0] if strengths else 'réflexion'}",
-                f"Renforcer progressivement {weaknesses[0] if weaknesses else 'les bases'}",
-                "Adapter le rythme selon les besoins"
-            ]
-        }
+        job = None
+        if is_configured():
+            job = enqueue('analyze_session', {'session_id': session.id}, user=self.request.user)
+        return profile, job
+    
+    def _completion_response(self, session, profile, job):
+        """Response of a completion: 200 with the profile, 202 when an AI analysis is queued."""
+        serializer = self.get_serializer(session)
+        if job is None:
+            return Response({
+                'session': serializer.data,
+                'profile': CognitiveProfileSerializer(profile).data,
+                'job': None,
+                'message': 'Session complétée et profil cognitif généré'
+            })
+        return Response({
+            'session': serializer.data,
+            'profile': CognitiveProfileSerializer(profile).data,
+            'job': JobSerializer(job).data,
+            'message': 'Session complétée, analyse détaillée en cours'
+        }, status=status.HTTP_202_ACCEPTED)
 
 
 class QuestionResponseViewSet(viewsets.ModelViewSet):
@@ -837,82 +1332,135 @@ class QuestionResponseViewSet(viewsets.ModelViewSet):
     serializer_class = QuestionResponseSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    pagination_class = OptionalCursorPagination
+    
+    # Query parameters accepted by the list endpoint
+    FILTER_PARAMS = [
+        'session', 'learner', 'competence_type', 'is_correct',
+        'created_after', 'created_before'
+    ]
+    # Filters that bound the result size, allowing an unpaginated list
+    SCOPE_PARAMS = ['session', 'learner']
+    
     def get_queryset(self):
-        """Filter responses based on user type and session."""
+        """Filter responses based on user type and query parameters."""
         user = self.request.user
         if user.user_type == 'apprenant':
             # Learners can only see responses from their own sessions
-            return QuestionResponse.objects.filter(session__learner=user)
-        # Formateurs can see all responses
-        return QuestionResponse.objects.all()
+            queryset = QuestionResponse.objects.filter(session__learner=user)
+        else:
+            # Formateurs can see all responses
+            queryset = QuestionResponse.objects.all()
+        
+        if self.action == 'list':
+            queryset = self._apply_filters(queryset, self.request.query_params)
+        return queryset
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List responses. Formateurs get an unpaginated list only when scoped by
+        session or learner; other filters fall back to the default page size
+        and unfiltered, unpaginated dumps are refused.
+        """
+        params = request.query_params
+        if (
+            request.user.user_type != 'apprenant'
+            and not any(param in params for param in self.SCOPE_PARAMS)
+            and self.paginator.get_page_size(request) is None
+        ):
+            if not any(param in params for param in self.FILTER_PARAMS):
+                return Response(
+                    {'error': f'Filtrez par {", ".join(self.FILTER_PARAMS)} ou paginez avec page_size'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            self.paginator.page_size = settings.PAGINATION_PAGE_SIZE
+        return super().list(request, *args, **kwargs)
+    
+    def _apply_filters(self, queryset, params):
+        """Apply the supported query parameter filters to the queryset."""
+        errors = {}
+        
+        for param, lookup in [('session', 'session_id'), ('learner', 'session__learner_id')]:
+            if param in params:
+                try:
+                    queryset = queryset.filter(**{lookup: int(params[param])})
+                except (TypeError, ValueError):
+                    errors[param] = 'Identifiant invalide'
+        
+        if 'competence_type' in params:
+            competence_types = dict(QuestionResponse.COMPETENCE_CHOICES)
+            if params['competence_type'] in competence_types:
+                queryset = queryset.filter(competence_type=params['competence_type'])
+            else:
+                errors['competence_type'] = f'Valeurs acceptées: {", ".join(competence_types)}'
+        
+        if 'is_correct' in params:
+            value = params['is_correct'].lower()
+            if value in ('true', '1'):
+                queryset = queryset.filter(is_correct=True)
+            elif value in ('false', '0'):
+                queryset = queryset.filter(is_correct=False)
+            else:
+                errors['is_correct'] = 'Valeur booléenne attendue (true/false)'
+        
+        for param, lookup in [('created_after', 'created_at__gte'), ('created_before', 'created_at__lt')]:
+            if param in params:
+                value = parse_datetime(params[param])
+                if value is None:
+                    date = parse_date(params[param])
+                    if date is not None:
+                        value = datetime.combine(date, time.min)
+                if value is None:
+                    errors[param] = 'Date invalide (format ISO 8601 attendu)'
+                    continue
+                if timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                queryset = queryset.filter(**{lookup: value})
+        
+        if errors:
+            raise ValidationError(errors)
+        return queryset
     
     @action(detail=True, methods=['post'])
     def generate_feedback(self, request, pk=None):
-        """Generate personalized feedback for a response using AI."""
+        """Generate personalized feedback for a response using AI, or reuse cached feedback."""
         response_obj = self.get_object()
         
-        if not settings.OPENAI_API_KEY:
+        if not is_configured():
             return Response(
                 {'error': 'OpenAI API non configurée'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
         
+        force_refresh = str(request.data.get('force_refresh', '')).lower() in ('true', '1')
+        
+        # Learners giving the same answer in the same conditions share the feedback
         try:
-            feedback = self._generate_ai_feedback(response_obj)
-            return Response({'feedback': feedback})
+            result = get_feedback(feedback_context(response_obj), force_refresh=force_refresh)
+            QuestionResponse.objects.filter(pk=response_obj.pk).update(feedback=result['feedback'])
+            return Response(result)
+        except (LLMUnavailable, *RETRYABLE_ERRORS):
+            # The API is down or overloaded: answer with the rule-based feedback
+            return Response({'feedback': fallback_feedback(response_obj), 'fallback': True})
         except Exception as e:
             return Response(
                 {'error': f'Erreur lors de la génération du feedback: {str(e)}'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    
-    def _generate_ai_feedback(self, response_obj):
-        """Generate adaptive feedback using OpenAI."""
-        client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        context = {
-            'question': response_obj.question_text,
-            'student_answer': response_obj.answer,
-            'correct_answer': response_obj.correct_answer,
-            'is_correct': response_obj.is_correct,
-            'time_taken': response_obj.response_time_ms / 1000,
-            'attempts': response_obj.attempts,
-            'help_used': response_obj.help_used
-        }
-        
-        prompt = f"""En tant qu'enseignant bienveillant, donne un feedback pédagogique à un élève.
-
-Question : {context['question']}
-Réponse de l'élève : {context['student_answer']}
-Réponse correcte : {context['correct_answer']}
-Résultat : {"✓ Correct" if context['is_correct'] else "✗ Incorrect"}
-Temps de réponse : {context['time_taken']} secondes
-Tentatives : {context['attempts']}
-Aide utilisée : {"Oui" if context['help_used'] else "Non"}
-
-Consignes pour le feedback :
-1. VALORISE le raisonnement, même si la réponse est incorrecte
-2. EXPLIQUE l'erreur sans culpabiliser
-3. PROPOSE une stratégie alternative si nécessaire
-4. Reste BIENVEILLANT et ENCOURAGEANT
-5. Maximum 3-4 phrases
 
-Ton feedback :"""
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "Tu es un enseignant bienveillant qui donne des feedbacks constructifs et encourageants."
-                },
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=200
-        )
-        
-        return response.choices[0].message.content
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ViewSet exposing the status of background jobs."""
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        """Filter jobs based on user type."""
+        if self.request.user.user_type == 'apprenant':
+            return Job.objects.filter(created_by=self.request.user)
+        # Formateurs can see all jobs
+        return Job.objects.all()
 
 
 class CognitiveProfileViewSet(viewsets.ModelViewSet):
@@ -1,6 +1,6 @@
 import axios from 'axios';
 
-const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api';
+export const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000/api';
 
 // Créer une instance axios avec configuration de base
 const api = axios.create({
@@ -66,4 +66,10 @@ api.interceptors.response.use(
   }
 );
 
+// Lire la page suivante d'une liste paginée par curseur (URL `next` renvoyée par l'API)
+export const getNextPage = async (nextUrl) => {
+  const response = await api.get(nextUrl);
+  return response.data;
+};
+
 export default api;
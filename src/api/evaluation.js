@@ -2,8 +2,9 @@ import api from './config';
 
 export const evaluationService = {
   // Evaluation Sessions
-  getEvaluationSessions: async () => {
-    const response = await api.get('/evaluation-sessions/');
+  // Paginated by cursor: returns { next, previous, results }
+  getEvaluationSessions: async (params = {}) => {
+    const response = await api.get('/evaluation-sessions/', { params });
     return response.data;
   },
 
@@ -17,17 +18,40 @@ export const evaluationService = {
     return response.data;
   },
 
+  // Submit several question responses at once, optionally completing the session
+  submitQuestionResponses: async (sessionId, responses, { complete = false } = {}) => {
+    const response = await api.post(`/evaluation-sessions/${sessionId}/responses/bulk/`, {
+      responses,
+      complete,
+    });
+    return response.data;
+  },
+
   completeEvaluationSession: async (sessionId) => {
     const response = await api.post(`/evaluation-sessions/${sessionId}/complete/`);
     return response.data;
   },
 
+  // Feedback on every response of the session, built in a few batched AI calls
+  // and stored on the responses: returns { session, responses, completions, tokens_used, tokens_saved }
+  generateSessionFeedback: async (sessionId, { forceRefresh = false } = {}) => {
+    const response = await api.post(`/evaluation-sessions/${sessionId}/feedback/`, {
+      force_refresh: forceRefresh,
+    });
+    return response.data;
+  },
+
+  // Background jobs (e.g. the AI analysis queued by completeEvaluationSession)
+  getJob: async (jobId) => {
+    const response = await api.get(`/jobs/${jobId}/`);
+    return response.data;
+  },
+
   // Question Responses
-  getQuestionResponses: async (sessionId = null) => {
-    const url = sessionId 
-      ? `/question-responses/?session=${sessionId}`
-      : '/question-responses/';
-    const response = await api.get(url);
+  // filters: { learner, competence_type, is_correct, created_after, created_before, page_size }
+  getQuestionResponses: async (sessionId = null, filters = {}) => {
+    const params = sessionId ? { ...filters, session: sessionId } : filters;
+    const response = await api.get('/question-responses/', { params });
     return response.data;
   },
 
@@ -42,8 +66,9 @@ export const evaluationService = {
   },
 
   // Cognitive Profiles
-  getCognitiveProfiles: async () => {
-    const response = await api.get('/cognitive-profiles/');
+  // Paginated by cursor: returns { next, previous, results }
+  getCognitiveProfiles: async (params = {}) => {
+    const response = await api.get('/cognitive-profiles/', { params });
     return response.data;
   },
 
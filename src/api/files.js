@@ -1,12 +1,15 @@
-import api from './config';
+import api, { getNextPage } from './config';
 
 export const fileService = {
-  // Lister tous les fichiers
-  getFiles: async () => {
-    const response = await api.get('/files/');
+  // Lister les fichiers (page par curseur : { next, previous, results })
+  getFiles: async (params = {}) => {
+    const response = await api.get('/files/', { params });
     return response.data;
   },
 
+  // Charger la page suivante à partir de l'URL `next`
+  getNextPage,
+
   // Téléverser un fichier
   uploadFile: async (fileData) => {
     const formData = new FormData();
@@ -1,12 +1,15 @@
-import api from './config';
+import api, { getNextPage } from './config';
 
 export const progressService = {
-  // Obtenir toute la progression
-  getProgress: async () => {
-    const response = await api.get('/progress/');
+  // Obtenir la progression (page par curseur : { next, previous, results })
+  getProgress: async (params = {}) => {
+    const response = await api.get('/progress/', { params });
     return response.data;
   },
 
+  // Charger la page suivante à partir de l'URL `next`
+  getNextPage,
+
   // Obtenir les statistiques
   getStats: async () => {
     const response = await api.get('/progress/stats/');
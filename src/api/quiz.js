@@ -1,4 +1,18 @@
-import api from './config';
+import api, { API_BASE_URL } from './config';
+
+// Parse one server-sent event ('event: ...' and 'data: ...' lines)
+const parseEvent = (message) => {
+  let event = 'message';
+  let data = '';
+  for (const line of message.split('\n')) {
+    if (line.startsWith('event: ')) {
+      event = line.slice(7);
+    } else if (line.startsWith('data: ')) {
+      data += line.slice(6);
+    }
+  }
+  return { event, data: data ? JSON.parse(data) : null };
+};
 
 export const quizService = {
   // Get all quizzes (formateur: their quizzes, apprenant: assigned quizzes)
@@ -31,6 +45,22 @@ export const quizService = {
     return response.data;
   },
 
+  // Assign a quiz to a list of learners (bulk)
+  assignLearners: async (quizId, learnerIds) => {
+    const response = await api.post(`/quizzes/${quizId}/assign/`, {
+      learner_ids: learnerIds,
+    });
+    return response.data;
+  },
+
+  // Remove a quiz from a list of learners (bulk)
+  unassignLearners: async (quizId, learnerIds) => {
+    const response = await api.post(`/quizzes/${quizId}/unassign/`, {
+      learner_ids: learnerIds,
+    });
+    return response.data;
+  },
+
   // Get list of all learners (for assignment)
   getLearners: async () => {
     const response = await api.get('/quizzes/learners/');
@@ -38,18 +68,78 @@ export const quizService = {
   },
 
   // Generate quiz from text
-  generateQuiz: async (text, numQuestions = 5) => {
+  // options: { forceRefresh } bypasses the server-side cache of generated quizzes,
+  // { longDocument, documentId } generates from every section of the uploaded document
+  generateQuiz: async (text, numQuestions = 5, options = {}) => {
+    const { forceRefresh = false, longDocument = false, documentId } = options;
     const response = await api.post('/quiz/generate/', {
-      text,
+      text: longDocument && documentId ? '' : text,
       num_questions: numQuestions,
+      force_refresh: forceRefresh,
+      long_document: longDocument,
+      document_id: documentId,
     });
     return response.data;
   },
 
-  // Upload document and extract text
-  uploadDocument: async (file) => {
+  // Generate quiz from text, receiving each question as soon as it is generated.
+  // onQuestion(question, index) is called per question; resolves with the final
+  // usage ({ count, cache, tokens_used, tokens_saved }). Errors carry
+  // err.response.data.error like axios errors.
+  generateQuizStream: async (text, numQuestions = 5, { forceRefresh = false, onQuestion } = {}) => {
+    const response = await fetch(`${API_BASE_URL}/quiz/generate/stream/`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${localStorage.getItem('accessToken')}`,
+      },
+      body: JSON.stringify({
+        text,
+        num_questions: numQuestions,
+        force_refresh: forceRefresh,
+      }),
+    });
+    const fail = (status, data) => {
+      const error = new Error(data?.error || 'Erreur lors de la génération du quiz');
+      error.response = { status, data };
+      return error;
+    };
+    if (!response.ok) {
+      throw fail(response.status, await response.json().catch(() => null));
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) {
+        break;
+      }
+      buffer += decoder.decode(value, { stream: true });
+      let end;
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const { event, data } = parseEvent(buffer.slice(0, end));
+        buffer = buffer.slice(end + 2);
+        if (event === 'question') {
+          onQuestion?.(data.question, data.index);
+        } else if (event === 'done') {
+          return data;
+        } else if (event === 'error') {
+          throw fail(data.status, data);
+        }
+      }
+    }
+    throw fail(response.status, { error: 'Génération interrompue' });
+  },
+
+  // Upload document and extract text (at most maxChars characters, server default if omitted)
+  uploadDocument: async (file, maxChars) => {
     const formData = new FormData();
     formData.append('file', file);
+    if (maxChars) {
+      formData.append('max_chars', maxChars);
+    }
     const response = await api.post('/documents/upload/', formData, {
       headers: {
         'Content-Type': 'multipart/form-data',
@@ -58,9 +148,36 @@ export const quizService = {
     return response.data;
   },
 
+  // Get the full text of an uploaded document, a few pages at a time
+  getDocumentText: async (documentId, page = 1, pageSize) => {
+    const response = await api.get(`/documents/${documentId}/text/`, {
+      params: { page, page_size: pageSize },
+    });
+    return response.data;
+  },
+
   // Get quiz statistics (for formateurs)
-  getQuizStats: async (quizId) => {
-    const response = await api.get(`/quizzes/${quizId}/stats/`);
+  // params: { ordering, page, page_size } to sort and paginate learner_stats
+  getQuizStats: async (quizId, params = {}) => {
+    const response = await api.get(`/quizzes/${quizId}/stats/`, { params });
+    return response.data;
+  },
+
+  // Submit a learner's answers: [{ question_index, answer }]
+  submitQuiz: async (quizId, answers) => {
+    const response = await api.post(`/quizzes/${quizId}/submit/`, { answers });
+    return response.data;
+  },
+
+  // Get the difficulty, discrimination and option shares of each question (for formateurs)
+  getQuizItems: async (quizId) => {
+    const response = await api.get(`/quizzes/${quizId}/items/`);
+    return response.data;
+  },
+
+  // Get completion, average score and at-risk learners of all own quizzes (for formateurs)
+  getQuizzesOverview: async () => {
+    const response = await api.get('/quizzes/overview/');
     return response.data;
   },
 };
@@ -1,4 +1,4 @@
-import api from './config';
+import api, { getNextPage } from './config';
 
 export const userService = {
   // Obtenir les informations de l'utilisateur connecté
@@ -7,12 +7,15 @@ export const userService = {
     return response.data;
   },
 
-  // Lister tous les utilisateurs
-  getUsers: async () => {
-    const response = await api.get('/users/');
+  // Lister les utilisateurs (page par curseur : { next, previous, results })
+  getUsers: async (params = {}) => {
+    const response = await api.get('/users/', { params });
     return response.data;
   },
 
+  // Charger la page suivante à partir de l'URL `next`
+  getNextPage,
+
   // Obtenir un utilisateur par ID
   getUser: async (userId) => {
     const response = await api.get(`/users/${userId}/`);
@@ -22,6 +22,8 @@ import {
   Paper,
   Tabs,
   Tab,
+  Checkbox,
+  FormControlLabel,
   Stepper,
   Step,
   StepLabel,
@@ -58,6 +60,9 @@ function QuizEdit({ open, onClose, onQuizSaved, existingQuiz = null }) {
   // AI generation state
   const [selectedFile, setSelectedFile] = useState(null);
   const [extractedText, setExtractedText] = useState('');
+  const [documentId, setDocumentId] = useState(null);
+  const [textTruncated, setTextTruncated] = useState(false);
+  const [wholeDocument, setWholeDocument] = useState(false);
   const [numQuestions, setNumQuestions] = useState(5);
   const [generatingQuiz, setGeneratingQuiz] = useState(false);
   const [extractingText, setExtractingText] = useState(false);
@@ -104,6 +109,9 @@ function QuizEdit({ open, onClose, onQuizSaved, existingQuiz = null }) {
     setActiveStep(0);
     setSelectedFile(null);
     setExtractedText('');
+    setDocumentId(null);
+    setTextTruncated(false);
+    setWholeDocument(false);
     setNumQuestions(5);
     setError('');
     setSuccess('');
@@ -146,6 +154,9 @@ function QuizEdit({ open, onClose, onQuizSaved, existingQuiz = null }) {
       
       const response = await quizService.uploadDocument(selectedFile);
       setExtractedText(response.text);
+      setDocumentId(response.document_id);
+      setTextTruncated(response.truncated);
+      setWholeDocument(response.truncated);
       setSuccess('Texte extrait avec succès !');
       setActiveStep(1);
       
@@ -168,12 +179,36 @@ function QuizEdit({ open, onClose, onQuizSaved, existingQuiz = null }) {
       setGeneratingQuiz(true);
       setError('');
       
-      const response = await quizService.generateQuiz(extractedText, numQuestions);
-      
-      if (response.quiz && response.quiz.questions) {
-        setQuestions(response.quiz.questions);
+      if (wholeDocument) {
+        // Whole-document generation merges every section, so it is not streamed
+        const response = await quizService.generateQuiz(extractedText, numQuestions, {
+          longDocument: true,
+          documentId,
+        });
+
+        if (response.quiz && response.quiz.questions) {
+          setQuestions(response.quiz.questions);
+          setSuccess('Questions générées avec succès ! Vous pouvez les modifier avant de sauvegarder.');
+          setActiveStep(2);
+          setTimeout(() => setSuccess(''), 5000);
+        } else {
+          setError('Format de réponse invalide de l\'API');
+        }
+        return;
+      }
+
+      // Show the review step with the first question, the others follow as they arrive
+      const received = [];
+      const result = await quizService.generateQuizStream(extractedText, numQuestions, {
+        onQuestion: (question) => {
+          received.push(question);
+          setQuestions([...received]);
+          setActiveStep(2);
+        },
+      });
+
+      if (result.count > 0) {
         setSuccess('Questions générées avec succès ! Vous pouvez les modifier avant de sauvegarder.');
-        setActiveStep(2);
         setTimeout(() => setSuccess(''), 5000);
       } else {
         setError('Format de réponse invalide de l\'API');
@@ -350,6 +385,19 @@ function QuizEdit({ open, onClose, onQuizSaved, existingQuiz = null }) {
               sx={{ mb: 2 }}
             />
 
+            {textTruncated && (
+              <FormControlLabel
+                control={
+                  <Checkbox
+                    checked={wholeDocument}
+                    onChange={(e) => setWholeDocument(e.target.checked)}
+                    disabled={generatingQuiz}
+                  />
+                }
+                label="Couvrir tout le document (seul le début est affiché)"
+              />
+            )}
+
             <TextField
               type="number"
               label="Nombre de questions"
@@ -15,6 +15,8 @@ import {
   TableContainer,
   TableHead,
   TableRow,
+  TablePagination,
+  TableSortLabel,
   CircularProgress,
   Alert,
   Chip,
@@ -34,18 +36,26 @@ function QuizStats({ open, onClose, quizId, quizTitle }) {
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
+  const [page, setPage] = useState(0);
+  const [rowsPerPage, setRowsPerPage] = useState(25);
+  const [orderBy, setOrderBy] = useState('assigned_at');
+  const [order, setOrder] = useState('desc');
 
   useEffect(() => {
     if (open && quizId) {
       loadStats();
     }
-  }, [open, quizId]);
+  }, [open, quizId, page, rowsPerPage, orderBy, order]);
 
   const loadStats = async () => {
     try {
       setLoading(true);
       setError('');
-      const response = await quizService.getQuizStats(quizId);
+      const response = await quizService.getQuizStats(quizId, {
+        ordering: order === 'desc' ? `-${orderBy}` : orderBy,
+        page: page + 1,
+        page_size: rowsPerPage,
+      });
       setStats(response);
     } catch (err) {
       console.error('Error loading quiz stats:', err);
@@ -70,6 +80,28 @@ function QuizStats({ open, onClose, quizId, quizTitle }) {
     return date ? formatDate(date) : 'N/A';
   };
 
+  const handleSort = (field) => {
+    if (orderBy === field) {
+      setOrder(order === 'asc' ? 'desc' : 'asc');
+    } else {
+      setOrderBy(field);
+      setOrder('asc');
+    }
+    setPage(0);
+  };
+
+  const renderSortableHeader = (field, label, align = 'left') => (
+    <TableCell align={align} sortDirection={orderBy === field ? order : false}>
+      <TableSortLabel
+        active={orderBy === field}
+        direction={orderBy === field ? order : 'asc'}
+        onClick={() => handleSort(field)}
+      >
+        {label}
+      </TableSortLabel>
+    </TableCell>
+  );
+
   const getScoreColor = (percentage) => {
     if (percentage >= 80) return 'success';
     if (percentage >= 60) return 'warning';
@@ -168,12 +200,12 @@ function QuizStats({ open, onClose, quizId, quizTitle }) {
                 <Table>
                   <TableHead>
                     <TableRow>
-                      <TableCell>Apprenant</TableCell>
-                      <TableCell>Date d'assignation</TableCell>
+                      {renderSortableHeader('learner_username', 'Apprenant')}
+                      {renderSortableHeader('assigned_at', "Date d'assignation")}
                       <TableCell>Statut</TableCell>
-                      <TableCell>Date de complétion</TableCell>
-                      <TableCell align="right">Score</TableCell>
-                      <TableCell align="right">Pourcentage</TableCell>
+                      {renderSortableHeader('completed_at', 'Date de complétion')}
+                      {renderSortableHeader('score', 'Score', 'right')}
+                      {renderSortableHeader('percentage', 'Pourcentage', 'right')}
                     </TableRow>
                   </TableHead>
                   <TableBody>
@@ -243,6 +275,19 @@ function QuizStats({ open, onClose, quizId, quizTitle }) {
                     ))}
                   </TableBody>
                 </Table>
+                <TablePagination
+                  component="div"
+                  count={stats.pagination?.count ?? stats.total_assigned}
+                  page={page}
+                  onPageChange={(event, newPage) => setPage(newPage)}
+                  rowsPerPage={rowsPerPage}
+                  onRowsPerPageChange={(event) => {
+                    setRowsPerPage(parseInt(event.target.value, 10));
+                    setPage(0);
+                  }}
+                  rowsPerPageOptions={[10, 25, 50, 100]}
+                  labelRowsPerPage="Apprenants par page"
+                />
               </TableContainer>
             ) : (
               <Paper sx={{ p: 3, textAlign: 'center' }}>
@@ -35,6 +35,8 @@ function DashboardApprenant() {
   const navigate = useNavigate();
   const [stats, setStats] = useState(null);
   const [progress, setProgress] = useState([]);
+  const [progressNext, setProgressNext] = useState(null);
+  const [loadingMoreProgress, setLoadingMoreProgress] = useState(false);
   const [assignedQuizzes, setAssignedQuizzes] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
@@ -55,7 +57,8 @@ function DashboardApprenant() {
         quizService.getQuizzes(),
       ]);
       setStats(statsData);
-      setProgress(progressData);
+      setProgress(progressData.results);
+      setProgressNext(progressData.next);
       setAssignedQuizzes(quizzesData);
     } catch (err) {
       console.error('Error loading data:', err);
@@ -65,6 +68,20 @@ function DashboardApprenant() {
     }
   };
 
+  const loadMoreProgress = async () => {
+    try {
+      setLoadingMoreProgress(true);
+      const data = await progressService.getNextPage(progressNext);
+      setProgress((items) => [...items, ...data.results]);
+      setProgressNext(data.next);
+    } catch (err) {
+      console.error('Error loading progress:', err);
+      setError('Erreur lors du chargement des données. Veuillez réessayer.');
+    } finally {
+      setLoadingMoreProgress(false);
+    }
+  };
+
   const getStatusChip = (completed, percentage) => {
     if (completed) {
       return (
@@ -322,6 +339,13 @@ function DashboardApprenant() {
               ))}
             </List>
           )}
+          {progressNext && (
+            <Box sx={{ display: 'flex', justifyContent: 'center', mt: 1 }}>
+              <Button onClick={loadMoreProgress} disabled={loadingMoreProgress}>
+                {loadingMoreProgress ? 'Chargement...' : 'Charger plus'}
+              </Button>
+            </Box>
+          )}
         </Paper>
       )}
     </Container>
@@ -42,6 +42,8 @@ function DashboardFormateur() {
   const [uploadSuccess, setUploadSuccess] = useState(false);
   const [uploadError, setUploadError] = useState('');
   const [uploadedFiles, setUploadedFiles] = useState([]);
+  const [filesNext, setFilesNext] = useState(null);
+  const [loadingMoreFiles, setLoadingMoreFiles] = useState(false);
   const [quizzes, setQuizzes] = useState([]);
   const [loading, setLoading] = useState(true);
   const [uploading, setUploading] = useState(false);
@@ -62,7 +64,8 @@ function DashboardFormateur() {
     try {
       setLoading(true);
       const data = await fileService.getFiles();
-      setUploadedFiles(data);
+      setUploadedFiles(data.results);
+      setFilesNext(data.next);
     } catch (error) {
       console.error('Error loading files:', error);
     } finally {
@@ -70,6 +73,19 @@ function DashboardFormateur() {
     }
   };
 
+  const loadMoreFiles = async () => {
+    try {
+      setLoadingMoreFiles(true);
+      const data = await fileService.getNextPage(filesNext);
+      setUploadedFiles((files) => [...files, ...data.results]);
+      setFilesNext(data.next);
+    } catch (error) {
+      console.error('Error loading files:', error);
+    } finally {
+      setLoadingMoreFiles(false);
+    }
+  };
+
   const loadQuizzes = async () => {
     try {
       const data = await quizService.getQuizzes();
@@ -317,6 +333,13 @@ function DashboardFormateur() {
                 ))}
               </List>
             )}
+            {!loading && filesNext && (
+              <Box sx={{ display: 'flex', justifyContent: 'center', mt: 1 }}>
+                <Button onClick={loadMoreFiles} disabled={loadingMoreFiles}>
+                  {loadingMoreFiles ? 'Chargement...' : 'Charger plus'}
+                </Button>
+              </Box>
+            )}
           </Paper>
         </Box>
       )}
@@ -173,6 +173,7 @@ function DiagnosticEvaluation() {
   const { user } = useAuth();
   const [currentQuestion, setCurrentQuestion] = useState(0);
   const [answers, setAnswers] = useState({});
+  const [pendingResponses, setPendingResponses] = useState([]);
   const [sessionId, setSessionId] = useState(null);
   const [questionStartTime, setQuestionStartTime] = useState(Date.now());
   const [showHelp, setShowHelp] = useState({});
@@ -211,10 +212,10 @@ function DiagnosticEvaluation() {
     setAnswers({ ...answers, [question.id]: selectedAnswer });
     setAttempts({ ...attempts, [question.id]: questionAttempts + 1 });
 
-    // Send response to backend
-    try {
-      await evaluationService.createQuestionResponse({
-        session: sessionId,
+    // Buffer the response; the whole session is sent in one request at the end
+    const responses = [
+      ...pendingResponses,
+      {
         question_id: question.id,
         question_text: question.text,
         question_type: question.type,
@@ -226,28 +227,26 @@ function DiagnosticEvaluation() {
         attempts: questionAttempts + 1,
         help_used: helpUsed,
         help_type: helpUsed ? 'progressive_hint' : '',
-      });
+      },
+    ];
+    setPendingResponses(responses);
 
-      // Move to next question
-      if (currentQuestion < DIAGNOSTIC_QUESTIONS.length - 1) {
-        setCurrentQuestion(currentQuestion + 1);
-        setQuestionStartTime(Date.now());
-      } else {
-        // Complete the session
-        await completeSession();
-      }
-    } catch (err) {
-      console.error('Error recording response:', err);
-      setError('Erreur lors de l\'enregistrement de la réponse');
+    // Move to next question
+    if (currentQuestion < DIAGNOSTIC_QUESTIONS.length - 1) {
+      setCurrentQuestion(currentQuestion + 1);
+      setQuestionStartTime(Date.now());
+    } else {
+      // Send all responses and complete the session
+      await completeSession(responses);
     }
   };
 
-  const completeSession = async () => {
+  const completeSession = async (responses) => {
     if (!sessionId) return;
 
     setLoading(true);
     try {
-      await evaluationService.completeEvaluationSession(sessionId);
+      await evaluationService.submitQuestionResponses(sessionId, responses, { complete: true });
       setCompleted(true);
       
       // Navigate to profile after a short delay